@@ -0,0 +1,130 @@
+"""
+Benchmarks the time taken by the expval step in exact mode as the number of
+operators grows.
+
+The step is timed once evaluating every operator against a single simulated
+wavefunction and once simulating the circuit separately for each operator (the
+behaviour of backends that do not provide their wavefunction). Running the
+benchmark requires the packages used by the steps to be installed locally.
+
+Example:
+
+    python benchmarks/bench_expval_step.py --qubits 10 --operators 1 4 16 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "steps"))
+
+import expval  # pylint: disable=wrong-import-position
+
+default_backend = '{"module_name": "qequlacs.simulator", "function_name": "QulacsSimulator"}'
+
+
+class PerOperatorBackend:
+    """Wraps a backend hiding its ``get_wavefunction`` method, such that the
+    circuit is simulated separately for each operator.
+
+    Args:
+        backend (QuantumBackend): the wrapped backend
+    """
+
+    def __init__(self, backend):
+        self.n_samples = backend.n_samples
+        self.get_exact_expectation_values = backend.get_exact_expectation_values
+
+
+def random_circuit(num_qubits, depth, rng):
+    """Creates an OpenQASM 2.0 program with layers of random rotations followed
+    by a ladder of CNOT gates.
+
+    Args:
+        num_qubits (int): the number of qubits
+        depth (int): the number of layers
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        str: the OpenQASM 2.0 program
+    """
+    qasm = f'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[{num_qubits}];\ncreg c[{num_qubits}];\n'
+    for _ in range(depth):
+        for qubit in range(num_qubits):
+            qasm += f"ry({rng.uniform(0, 2 * np.pi)}) q[{qubit}];\n"
+            qasm += f"rz({rng.uniform(0, 2 * np.pi)}) q[{qubit}];\n"
+        for qubit in range(num_qubits - 1):
+            qasm += f"cx q[{qubit}],q[{qubit + 1}];\n"
+
+    return qasm
+
+
+def random_operator(num_qubits, num_terms, rng):
+    """Creates an operator as a sum of random Pauli words.
+
+    Args:
+        num_qubits (int): the number of qubits
+        num_terms (int): the number of terms
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        str: the operator in an ``openfermion.QubitOperator`` representation
+    """
+    terms = []
+    for _ in range(num_terms):
+        word = " ".join(
+            f"{rng.choice(['X', 'Y', 'Z'])}{qubit}"
+            for qubit in range(num_qubits)
+            if rng.random() < 0.5
+        )
+        terms.append(f"{rng.uniform(-1, 1)} [{word}]")
+
+    return " + ".join(terms)
+
+
+def time_step(backend, circuit, ops, repeat):
+    """Returns the best time out of several evaluations of the expectation
+    values."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        expval._get_expval(backend, circuit, ops)  # pylint: disable=protected-access
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend-specs", default=default_backend)
+    parser.add_argument("--qubits", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--terms", type=int, default=4, help="Pauli terms per operator")
+    parser.add_argument("--operators", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    backend = expval.create_object(json.loads(args.backend_specs))
+    per_operator_backend = PerOperatorBackend(backend)
+    qasm = random_circuit(args.qubits, args.depth, rng)
+
+    print(f"{'operators':>10} {'single [s]':>12} {'per operator [s]':>18} {'speedup':>9}")
+    for num_ops in args.operators:
+        operators = [random_operator(args.qubits, args.terms, rng) for _ in range(num_ops)]
+
+        # pylint: disable=protected-access
+        ops = expval._create_operators(backend, operators)
+        circuit = expval._prepare_circuit(qasm, ops)
+
+        single = time_step(backend, circuit, ops, args.repeat)
+        per_operator = time_step(per_operator_backend, circuit, ops, args.repeat)
+        print(f"{num_ops:>10} {single:>12.4f} {per_operator:>18.4f} {per_operator / single:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmarks the serialization of large Hamiltonians on the client.
+
+For an increasing number of random Pauli terms acting on a device with many
+wires, the time taken to create the OpenFermion operator string (as done for
+the observables of a circuit) and the compact encoding (as done by
+``OrquestraDevice.hamiltonian_expval``) is reported along with the time per
+term, which stays constant when the serialization scales linearly.
+
+Example:
+
+    python benchmarks/bench_operator_serialization.py --wires 50 --terms 100 1000 10000
+"""
+import argparse
+import time
+
+import numpy as np
+import pennylane as qml
+
+from pennylane_orquestra.utils import _terms_to_qubit_operator_string
+
+paulis = [qml.PauliX, qml.PauliY, qml.PauliZ]
+
+
+def random_hamiltonian(wires, num_terms, weight, rng):
+    """Creates a Hamiltonian with random Pauli words.
+
+    Args:
+        wires (list): the wire labels
+        num_terms (int): the number of terms
+        weight (int): the number of wires acted on by each term
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        ~.Hamiltonian: the Hamiltonian
+    """
+    coeffs = rng.uniform(-1, 1, size=num_terms)
+    ops = []
+    for _ in range(num_terms):
+        term_wires = rng.choice(len(wires), size=weight, replace=False)
+        ops.append(
+            qml.operation.Tensor(*[paulis[rng.integers(3)](wires=wires[w]) for w in term_wires])
+        )
+
+    return qml.Hamiltonian(coeffs, ops)
+
+
+def best_time(function, repeat):
+    """Returns the best time out of several calls of a function."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--wires", type=int, default=50)
+    parser.add_argument("--weight", type=int, default=4, help="wires acted on by each term")
+    parser.add_argument("--terms", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    wires = [f"w{idx}" for idx in range(args.wires)]
+    dev = qml.device("orquestra.qulacs", wires=wires)
+
+    print(
+        f"{'terms':>8} {'string [s]':>12} {'per term [us]':>14}"
+        f" {'encoding [s]':>13} {'per term [us]':>14}"
+    )
+    for num_terms in args.terms:
+        H = random_hamiltonian(wires, num_terms, args.weight, rng)
+        coeffs, ops = H.terms
+
+        string_time = best_time(
+            lambda: _terms_to_qubit_operator_string(coeffs, ops, wire_index=dev._wire_index),
+            args.repeat,
+        )
+        encoding_time = best_time(lambda: dev.encode_hamiltonian(H), args.repeat)
+
+        print(
+            f"{num_terms:>8} {string_time:>12.4f} {1e6 * string_time / num_terms:>14.1f}"
+            f" {encoding_time:>13.4f} {1e6 * encoding_time / num_terms:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmarks the submission, polling and retrieval pipeline of the Orquestra
+device against a local stand-in of the platform with injected latency.
+
+The stand-in is the mock server of the workflow API, which is reached either
+directly (``--transport api``) or through a ``qe`` CLI shim placed on the
+path (``--transport cli``). Queueing delays, failure rates, response
+latencies and the size and download rate of the results are configurable.
+The throughput and the latency percentiles of ``OrquestraDevice.execute``
+and the throughput of ``OrquestraDevice.batch_execute`` are reported.
+
+Example:
+
+    python benchmarks/bench_pipeline.py --transport cli --duration 0.5 --spread 0.5 \\
+        --failure-rate 0.05 --executions 50 --batch-circuits 40 --batch-sizes 5 10 40
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pennylane as qml
+
+# The mock server is one of the test helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests"))
+from mock_server import MockOrquestraServer  # pylint: disable=wrong-import-position
+
+
+def percentile(values, q):
+    """Returns a percentile of the values, or NaN if there are none."""
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def make_tape(angle):
+    """Creates a two-qubit circuit measuring two observables."""
+    with qml.tape.QuantumTape() as tape:
+        qml.RX(angle, wires=0)
+        qml.CNOT(wires=[0, 1])
+        qml.expval(qml.PauliZ(0))
+        qml.expval(qml.PauliX(1))
+
+    return tape
+
+
+def bench_execute(dev, executions):
+    """Times executing circuits one after the other.
+
+    Args:
+        dev (OrquestraDevice): the device
+        executions (int): the number of executions
+
+    Returns:
+        tuple[list[float], int]: the latency of each successful execution and
+        the number of failed executions
+    """
+    latencies = []
+    failures = 0
+
+    for idx in range(executions):
+        tape = make_tape(0.1 * idx)
+        start = time.perf_counter()
+        try:
+            dev.execute(tape)
+        except (ValueError, TimeoutError):
+            failures += 1
+            continue
+
+        latencies.append(time.perf_counter() - start)
+
+    return latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transport", choices=["cli", "api"], default="cli")
+    parser.add_argument("--duration", type=float, default=0.2, help="mean seconds in the queue")
+    parser.add_argument("--spread", type=float, default=0.5, help="relative spread of durations")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to responses")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--padding", type=int, default=0, help="bytes added to the results")
+    parser.add_argument("--download-rate", type=float, default=None, help="bytes per second")
+    parser.add_argument("--executions", type=int, default=20)
+    parser.add_argument("--batch-circuits", type=int, default=20)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--concurrent", action="store_true", help="await workflows concurrently")
+    parser.add_argument("--initial-delay", type=float, default=0.05)
+    parser.add_argument("--max-interval", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    server_options = {
+        "duration": args.duration,
+        "duration_spread": args.spread,
+        "latency": args.latency,
+        "failure_rate": args.failure_rate,
+        "result_padding": args.padding,
+        "download_rate": args.download_rate,
+        "seed": args.seed,
+    }
+
+    qml.enable_tape()
+    with MockOrquestraServer(**server_options) as server, tempfile.TemporaryDirectory() as tmp:
+        device_options = {
+            "cache": False,
+            "timeout": args.timeout,
+            "concurrent": args.concurrent,
+            "polling": {
+                "initial_delay": args.initial_delay,
+                "max_interval": args.max_interval,
+            },
+        }
+
+        if args.transport == "cli":
+            server.write_qe_shim(tmp)
+            os.environ["PATH"] = tmp + os.pathsep + os.environ["PATH"]
+        else:
+            device_options["transport"] = "api"
+            device_options["transport_options"] = {"url": server.url}
+
+        dev = qml.device("orquestra.forest", wires=2, **device_options)
+
+        start = time.perf_counter()
+        latencies, failures = bench_execute(dev, args.executions)
+        elapsed = time.perf_counter() - start
+
+        print(f"execute ({args.transport} transport, {args.executions} executions)")
+        print(f"  throughput [1/s]: {len(latencies) / elapsed:.2f}")
+        print(f"  failures:         {failures}")
+        for q in (50, 90, 99):
+            print(f"  p{q} latency [s]:  {percentile(latencies, q):.3f}")
+        print(f"  max latency [s]:  {max(latencies, default=float('nan')):.3f}")
+
+        print(f"\nbatch_execute ({args.batch_circuits} circuits)")
+        print(f"{'batch size':>12} {'time [s]':>10} {'circuits [1/s]':>16} {'result':>8}")
+        for batch_size in args.batch_sizes:
+            dev = qml.device("orquestra.forest", wires=2, batch_size=batch_size, **device_options)
+            tapes = [make_tape(0.1 * idx) for idx in range(args.batch_circuits)]
+
+            start = time.perf_counter()
+            try:
+                dev.batch_execute(tapes)
+                outcome = "ok"
+            except (ValueError, TimeoutError):
+                outcome = "failed"
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{batch_size:>12} {elapsed:>10.3f} {args.batch_circuits / elapsed:>16.2f}"
+                f" {outcome:>8}"
+            )
+
+        print(f"\nserver: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Benchmarks each stage of the client-side execution pipeline of the Orquestra
+device with every remote call mocked.
+
+The stages timed are the validation of the circuits, ``serialize_circuit``,
+``process_observables``, ``gen_expval_workflow``, ``serialize_workflow``,
+the (mocked) ``qe_submit_yaml`` and ``loop_until_finished`` calls and the
+extraction of the step results. The remaining time of an execution is
+reported as ``other`` and includes the assembly of the results.
+
+Workloads are varied one parameter at a time around a base workload, such
+that the scaling of each stage with the number of qubits, the circuit depth,
+the number of observables and the batch size can be read off. The results
+are written as JSON. When a baseline produced by an earlier run is given,
+the stages whose median time grew by more than the tolerance are reported
+and the script exits with a non-zero status.
+
+Example:
+
+    python benchmarks/bench_stages.py --output stages.json
+    python benchmarks/bench_stages.py --output new.json --baseline stages.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import datetime
+import functools
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pennylane as qml
+
+import pennylane_orquestra
+from pennylane_orquestra import orquestra_device
+from pennylane_orquestra.orquestra_device import OrquestraDevice
+
+# The mock server is one of the test helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests"))
+from mock_server import zero_results  # pylint: disable=wrong-import-position
+
+STAGES = [
+    "validation",
+    "serialize_circuit",
+    "process_observables",
+    "gen_expval_workflow",
+    "serialize_workflow",
+    "qe_submit_yaml",
+    "loop_until_finished",
+    "step_results",
+]
+
+paulis = [qml.PauliX, qml.PauliY, qml.PauliZ]
+
+
+class StageTimer:
+    """Accumulates the time spent in each stage of an execution."""
+
+    def __init__(self):
+        self.times = {}
+
+    def wrap(self, stage, function):
+        """Returns a function timing the calls of another function as a
+        stage."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.times[stage] = self.times.get(stage, 0.0) + time.perf_counter() - start
+
+        return wrapper
+
+
+@contextlib.contextmanager
+def instrumented(timer):
+    """Wraps the stages of the pipeline with timers and mocks the remote
+    calls for the duration of the context."""
+    workflows = {}
+
+    def mock_qe_submit_yaml(data):
+        return "mock-workflow-id"
+
+    def mock_loop_until_finished(workflow_id, **kwargs):
+        return workflows["results"]
+
+    patches = [
+        (OrquestraDevice, "_check_circuits", "validation"),
+        (OrquestraDevice, "serialize_circuit", "serialize_circuit"),
+        (OrquestraDevice, "process_observables", "process_observables"),
+        (OrquestraDevice, "_step_results", "step_results"),
+        (orquestra_device, "gen_expval_workflow", "gen_expval_workflow"),
+        (orquestra_device, "serialize_workflow", "serialize_workflow"),
+    ]
+    mocks = [
+        (orquestra_device, "qe_submit_yaml", "qe_submit_yaml", mock_qe_submit_yaml),
+        (orquestra_device, "loop_until_finished", "loop_until_finished", mock_loop_until_finished),
+    ]
+
+    originals = []
+    for owner, name, stage in patches:
+        original = owner.__dict__[name]
+        originals.append((owner, name, original))
+
+        function = original.__func__ if isinstance(original, staticmethod) else original
+        wrapped = timer.wrap(stage, function)
+        setattr(
+            owner, name, staticmethod(wrapped) if isinstance(original, staticmethod) else wrapped
+        )
+
+    for owner, name, stage, mock in mocks:
+        originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, timer.wrap(stage, mock))
+
+    # Creating the mocked results is not part of the timed pipeline
+    gen_workflow = orquestra_device.gen_expval_workflow
+
+    def gen_and_prepare_results(*args, **kwargs):
+        workflow = gen_workflow(*args, **kwargs)
+        workflows["results"] = zero_results(workflow)
+        return workflow
+
+    orquestra_device.gen_expval_workflow = gen_and_prepare_results
+
+    try:
+        yield
+    finally:
+        for owner, name, original in reversed(originals):
+            setattr(owner, name, original)
+
+
+def make_tape(num_qubits, depth, num_observables, rng):
+    """Creates a circuit of layers of random rotations and CNOT ladders
+    measuring random Pauli words.
+
+    Args:
+        num_qubits (int): the number of qubits
+        depth (int): the number of layers
+        num_observables (int): the number of observables measured
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        ~.QuantumTape: the circuit
+    """
+    with qml.tape.QuantumTape() as tape:
+        for _ in range(depth):
+            for wire in range(num_qubits):
+                qml.RX(rng.uniform(0, 2 * np.pi), wires=wire)
+                qml.RY(rng.uniform(0, 2 * np.pi), wires=wire)
+            for wire in range(num_qubits - 1):
+                qml.CNOT(wires=[wire, wire + 1])
+
+        for _ in range(num_observables):
+            weight = rng.integers(1, min(num_qubits, 4) + 1)
+            wires = rng.choice(num_qubits, size=weight, replace=False)
+            factors = [paulis[rng.integers(3)](wires=int(w)) for w in wires]
+            qml.expval(qml.operation.Tensor(*factors) if len(factors) > 1 else factors[0])
+
+    return tape
+
+
+def run_workload(workload, repeat, rng):
+    """Times the stages of executing a workload several times.
+
+    Args:
+        workload (dict): the number of qubits, the circuit depth, the number
+            of observables and the batch size
+        repeat (int): the number of executions
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        dict: the median and the minimum of the time spent in each stage and
+        in the whole execution
+    """
+    dev = qml.device(
+        "orquestra.forest",
+        wires=workload["qubits"],
+        batch_size=workload["batch"],
+        cache=False,
+        circuit_cache_size=0,
+        operator_cache_size=0,
+    )
+
+    samples = {stage: [] for stage in STAGES + ["other", "total"]}
+
+    # The first execution is not recorded, as it warms up lazily created state
+    for idx in range(repeat + 1):
+        tapes = [
+            make_tape(workload["qubits"], workload["depth"], workload["observables"], rng)
+            for _ in range(workload["batch"])
+        ]
+
+        timer = StageTimer()
+        with instrumented(timer):
+            start = time.perf_counter()
+            if len(tapes) == 1:
+                dev.execute(tapes[0])
+            else:
+                dev.batch_execute(tapes)
+            total = time.perf_counter() - start
+
+        if idx == 0:
+            continue
+
+        for stage in STAGES:
+            samples[stage].append(timer.times.get(stage, 0.0))
+        samples["other"].append(total - sum(timer.times.values()))
+        samples["total"].append(total)
+
+    return {
+        stage: {"median": float(np.median(values)), "min": float(np.min(values))}
+        for stage, values in samples.items()
+    }
+
+
+def workloads(base, sweeps):
+    """Varies the base workload one parameter at a time.
+
+    Args:
+        base (dict): the base workload
+        sweeps (dict): the values taken by each parameter
+
+    Returns:
+        list[dict]: the workloads, without duplicates
+    """
+    result = [dict(base)]
+    for name, values in sweeps.items():
+        for value in values:
+            workload = dict(base, **{name: value})
+            if workload not in result:
+                result.append(workload)
+
+    return result
+
+
+def workload_key(workload):
+    """Returns a hashable key identifying a workload."""
+    return tuple(workload[name] for name in ("qubits", "depth", "observables", "batch"))
+
+
+def regressions(results, baseline, tolerance, min_time):
+    """Compares the stage timings with a baseline.
+
+    Args:
+        results (list[dict]): the results of the current run
+        baseline (list[dict]): the results of the baseline run
+        tolerance (float): the relative slowdown tolerated
+        min_time (float): stages faster than this number of seconds in the
+            baseline are not compared, as their timing is too noisy
+
+    Returns:
+        list[str]: the descriptions of the regressions found
+    """
+    baseline = {workload_key(entry["workload"]): entry["stages"] for entry in baseline}
+    found = []
+    for entry in results:
+        base_stages = baseline.get(workload_key(entry["workload"]), None)
+        if base_stages is None:
+            continue
+
+        for stage, timing in entry["stages"].items():
+            before = base_stages.get(stage, {}).get("median", None)
+            if before is None or before < min_time:
+                continue
+
+            if timing["median"] > before * (1 + tolerance):
+                found.append(
+                    f"{entry['workload']} {stage}: {before * 1e3:.3f} ms -> "
+                    f"{timing['median'] * 1e3:.3f} ms"
+                )
+
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--observables", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--base", type=int, nargs=4, default=[4, 4, 4, 1], metavar="N")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_stages.json")
+    parser.add_argument("--baseline", default=None, help="results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-time", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    qml.enable_tape()
+    rng = np.random.default_rng(args.seed)
+    base = dict(zip(("qubits", "depth", "observables", "batch"), args.base))
+    sweeps = {
+        "qubits": args.qubits,
+        "depth": args.depth,
+        "observables": args.observables,
+        "batch": args.batch,
+    }
+
+    columns = STAGES + ["other", "total"]
+    print(" ".join(f"{name:>6}" for name in ("qubits", "depth", "obs", "batch")), end=" ")
+    print(" ".join(f"{stage[:10]:>10}" for stage in columns), "  [ms, median]")
+
+    results = []
+    for workload in workloads(base, sweeps):
+        stages = run_workload(workload, args.repeat, rng)
+        results.append({"workload": workload, "stages": stages})
+
+        print(" ".join(f"{value:>6}" for value in workload_key(workload)), end=" ")
+        print(" ".join(f"{stages[stage]['median'] * 1e3:>10.3f}" for stage in columns))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pennylane": qml.__version__,
+            "pennylane_orquestra": pennylane_orquestra.__version__,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+        found = regressions(results, baseline, args.tolerance, args.min_time)
+        for regression in found:
+            print(f"Regression: {regression}")
+
+        if found:
+            sys.exit(1)
+
+        print("No regressions found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmarks the throughput of submitting workflows and querying their status
+against the local mock of the Orquestra workflow API.
+
+The API transport is timed once reusing a persistent connection and once
+opening a new connection for every request. With ``--cli``, the transport
+spawning a ``qe`` process for every call is timed as well, which requires a
+``qe`` executable on the path that is logged in to a platform.
+
+Example:
+
+    python benchmarks/bench_transport.py --requests 500 --steps 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+from pennylane_orquestra.gen_workflow import gen_expval_workflow
+from pennylane_orquestra.http_session import HTTPSession
+from pennylane_orquestra.transport import APITransport, CLITransport
+
+# The mock server is one of the test helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "tests"))
+from mock_server import MockOrquestraServer  # pylint: disable=wrong-import-position
+
+default_backend = '{"module_name": "qeforest.simulator", "function_name": "ForestSimulator"}'
+circuit = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nh q[0];\ncx q[0],q[1];\n'
+
+
+def throughput(function, num_calls):
+    """Returns the number of calls of a function made per second."""
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        function()
+
+    return num_calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=10, help="steps of each workflow")
+    parser.add_argument("--cli", action="store_true", help="also time the CLI transport")
+    args = parser.parse_args()
+
+    workflow = gen_expval_workflow(
+        "qe-forest", default_backend, [circuit] * args.steps, [json.dumps(["1 [Z0]"])] * args.steps
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "expval.yaml")
+        with open(filepath, "w") as file:
+            yaml.dump(workflow, file, sort_keys=False)
+
+        transports = {}
+        with MockOrquestraServer() as server:
+            transports["api, persistent"] = APITransport(server.url, session=HTTPSession())
+            transports["api, new connections"] = APITransport(
+                server.url, session=HTTPSession(max_idle=0)
+            )
+            if args.cli:
+                transports["cli"] = CLITransport()
+
+            print(f"{'transport':>22} {'submissions [1/s]':>18} {'queries [1/s]':>14}")
+            for name, transport in transports.items():
+                workflow_id = transport.submit(filepath, keep_file=True)
+
+                submissions = throughput(
+                    lambda: transport.submit(filepath, keep_file=True), args.requests
+                )
+                queries = throughput(lambda: transport.statuses([workflow_id]), args.requests)
+                print(f"{name:>22} {submissions:>18.1f} {queries:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
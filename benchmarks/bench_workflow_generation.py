@@ -0,0 +1,140 @@
+"""
+Benchmarks generating and serializing workflows as the number of steps grows.
+
+The generation of a workflow by ``gen_expval_workflow`` is timed with the
+cached step skeletons cleared before each run and with the skeletons already
+cached. The serialization of the generated workflow is timed once with the
+pure Python YAML emitter and once with ``serialize_workflow``, and the two
+outputs are checked to be identical.
+
+Example:
+
+    python benchmarks/bench_workflow_generation.py --steps 10 100 1000 --repeat 5
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import yaml
+
+from pennylane_orquestra import gen_workflow
+from pennylane_orquestra.gen_workflow import gen_expval_workflow, serialize_workflow
+
+backend_specs = '{"module_name": "qeforest.simulator", "function_name": "ForestSimulator"}'
+resources = {"cpu": "1000m", "memory": "1Gi", "disk": "10Gi"}
+
+
+def random_circuit(num_qubits, depth, rng):
+    """Creates an OpenQASM 2.0 program with layers of random rotations.
+
+    Args:
+        num_qubits (int): the number of qubits
+        depth (int): the number of layers
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        str: the OpenQASM 2.0 program
+    """
+    qasm = f'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[{num_qubits}];\ncreg c[{num_qubits}];\n'
+    for _ in range(depth):
+        for qubit in range(num_qubits):
+            qasm += f"rx({rng.uniform(0, 2 * np.pi)}) q[{qubit}];\n"
+        for qubit in range(num_qubits - 1):
+            qasm += f"cx q[{qubit}],q[{qubit + 1}];\n"
+
+    return qasm
+
+
+def workflow_arguments(num_steps, num_qubits, depth, rng):
+    """Creates the arguments of ``gen_expval_workflow`` for a workflow with
+    the given number of steps.
+
+    Args:
+        num_steps (int): the number of steps
+        num_qubits (int): the number of qubits of each circuit
+        depth (int): the number of layers of each circuit
+        rng (numpy.random.Generator): the random number generator
+
+    Returns:
+        tuple[list, dict]: the positional and the keyword arguments
+    """
+    circuits = [random_circuit(num_qubits, depth, rng) for _ in range(num_steps)]
+    operators = [[f"[Z{qubit}]" for qubit in range(num_qubits)]] * num_steps
+    args = ["qe-forest", backend_specs, circuits, operators]
+    return args, {"resources": resources}
+
+
+def best_time(function, repeat, setup=None):
+    """Returns the shortest time taken by calling a function.
+
+    Args:
+        function (callable): the function timed
+        repeat (int): the number of calls
+
+    Keyword Args:
+        setup=None (callable): function called before each call, which is not
+            timed
+
+    Returns:
+        float: the shortest time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--qubits", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    emitter = "C" if hasattr(yaml, "CDumper") else "Python"
+    print(f"serialize_workflow emitter available: {emitter}\n")
+    print(
+        f"{'steps':>6} {'gen cold':>10} {'gen cached':>11} {'yaml.dump':>10}"
+        f" {'serialize':>10} {'speedup':>8} {'identical':>10}  [ms]"
+    )
+
+    mismatch = False
+    for num_steps in args.steps:
+        gen_args, gen_kwargs = workflow_arguments(num_steps, args.qubits, args.depth, rng)
+
+        def generate():
+            return gen_expval_workflow(*gen_args, **gen_kwargs)
+
+        cold = best_time(generate, args.repeat, setup=gen_workflow._step_skeleton.cache_clear)
+        cached = best_time(generate, args.repeat)
+
+        workflow = generate()
+        reference = yaml.dump(workflow, sort_keys=False)
+        identical = serialize_workflow(workflow) == reference
+        mismatch = mismatch or not identical
+
+        python = best_time(lambda: yaml.dump(workflow, sort_keys=False), args.repeat)
+        fast = best_time(lambda: serialize_workflow(workflow), args.repeat)
+
+        print(
+            f"{num_steps:>6} {cold * 1e3:>10.3f} {cached * 1e3:>11.3f} {python * 1e3:>10.3f}"
+            f" {fast * 1e3:>10.3f} {python / fast:>7.1f}x {str(identical):>10}"
+        )
+
+    if mismatch:
+        print("\nThe serialized workflows differ from the output of yaml.dump")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
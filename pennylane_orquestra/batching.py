@@ -0,0 +1,175 @@
+"""
+This module contains the adaptive sizing of the circuit batches sent as
+separate workflows by the Orquestra device.
+"""
+import collections
+import math
+import threading
+
+import numpy as np
+
+
+class AdaptiveBatchSize:
+    """Chooses the number of circuits per workflow based on the measured
+    duration of past workflows.
+
+    The duration of a workflow is modelled as a fixed overhead (e.g., the
+    latency of the submission and the queueing of the workflow) plus a cost
+    growing linearly with the number of circuits of its batch. Both are
+    fitted to the durations recorded for the most recent workflows. The
+    batch size chosen for an execution minimizes the predicted wall-clock
+    time of computing every circuit, given the number of workflows that may
+    run at the same time.
+
+    Until workflows of at least two different sizes were recorded, the
+    initial batch size is used and then doubled to gather the data needed
+    for the fit. If doubling the size exceeds the number of circuits of the
+    execution, half of that number is used instead.
+
+    Keyword Args:
+        initial_size=10 (int): the batch size used before the duration of
+            workflows can be predicted
+        max_size=None (int): the largest batch size that may be chosen
+        history=50 (int): the number of most recent workflows used for the fit
+    """
+
+    def __init__(self, initial_size=10, max_size=None, history=50):
+        if initial_size < 1:
+            raise ValueError("The initial batch size must be positive.")
+
+        self.initial_size = initial_size
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._observations = collections.deque(maxlen=history)
+        self._choices = []
+
+    # pylint: disable=too-many-arguments
+    def record(self, workflow_id, num_circuits, submission, wait, queue=None, run=None, steps=None):
+        """Records the duration of a workflow.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+            num_circuits (int): the number of circuits of the batch computed
+                by the workflow
+            submission (float): the seconds taken to submit the workflow
+            wait (float): the seconds waited for the results of the workflow
+                after its submission, including its queueing and execution
+
+        Keyword Args:
+            queue=None (float): the seconds the workflow spent in the queue
+                before running, if observed
+            run=None (float): the seconds the workflow was running for, if
+                observed
+            steps=None (int): the number of steps of the workflow, which may
+                be smaller than the number of circuits if circuits were
+                deduplicated, packed into a step or found in the cache
+        """
+        per_step = None
+        if run is not None and steps:
+            per_step = run / steps
+
+        with self._lock:
+            self._observations.append(
+                {
+                    "workflow_id": workflow_id,
+                    "circuits": num_circuits,
+                    "steps": steps,
+                    "submission": submission,
+                    "queue": queue,
+                    "run": run,
+                    "per_step": per_step,
+                    "wait": wait,
+                    "total": submission + wait,
+                }
+            )
+
+    def model(self):
+        """Fits the duration of a workflow to the number of circuits of its
+        batch.
+
+        Returns:
+            tuple[float] or None: the overhead of a workflow and the cost of
+            each circuit in seconds, or ``None`` if workflows of at least two
+            different sizes were not recorded yet
+        """
+        with self._lock:
+            observations = list(self._observations)
+
+        circuits = np.array([obs["circuits"] for obs in observations], dtype=float)
+        if len(np.unique(circuits)) < 2:
+            return None
+
+        totals = np.array([obs["total"] for obs in observations])
+        per_circuit, overhead = np.polyfit(circuits, totals, 1)
+
+        # Noisy durations may yield a fit without a physical meaning
+        return max(overhead, 0.0), max(per_circuit, 0.0)
+
+    def size(self, num_circuits, parallel=1):
+        """Chooses the batch size for computing several circuits.
+
+        Args:
+            num_circuits (int): the number of circuits to compute
+
+        Keyword Args:
+            parallel=1 (int): the number of workflows that may run at the same
+                time
+
+        Returns:
+            int: the number of circuits to compute in each workflow
+        """
+        largest = num_circuits if self.max_size is None else min(num_circuits, self.max_size)
+        largest = max(largest, 1)
+        model = self.model()
+
+        if model is None:
+            size = self.initial_size
+            with self._lock:
+                sizes = {obs["circuits"] for obs in self._observations}
+
+            if sizes:
+                # Explore a different size to be able to fit the model
+                size = 2 * max(sizes)
+
+            size = min(size, largest)
+            if size in sizes:
+                # Doubling the size was capped, so a smaller size is explored
+                size = max(1, largest // 2)
+
+            predicted = None
+
+        else:
+            overhead, per_circuit = model
+
+            def wall_time(size):
+                rounds = math.ceil(math.ceil(num_circuits / size) / parallel)
+                return rounds * (overhead + per_circuit * size)
+
+            # Prefer fewer workflows for equal predictions
+            size = min(range(1, largest + 1), key=lambda s: (wall_time(s), -s))
+            predicted = wall_time(size)
+
+        with self._lock:
+            self._choices.append(
+                {
+                    "circuits": num_circuits,
+                    "parallel": parallel,
+                    "batch_size": size,
+                    "model": model,
+                    "predicted": predicted,
+                }
+            )
+
+        return size
+
+    @property
+    def stats(self):
+        """The data used for choosing the batch sizes.
+
+        Returns:
+            dict: the durations recorded for the recent workflows
+            (``"workflows"``) and the batch sizes chosen along with the
+            fitted model and the predicted wall-clock time (``"choices"``)
+        """
+        with self._lock:
+            return {"workflows": list(self._observations), "choices": list(self._choices)}
@@ -0,0 +1,174 @@
+"""
+This module contains the persistent cache storing the results of workflow
+steps computing expectation values.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from appdirs import user_data_dir
+
+from pennylane_orquestra._version import __version__
+
+STEPS_VERSION = 1
+"""int: the version of the results computed by ``steps/expval.py``, which has
+to be increased whenever a change to the steps changes their results"""
+
+
+class ResultCache:
+    """On-disk cache of expectation values keyed by the content of the
+    computation.
+
+    Each entry is stored in a separate file whose name is a hash of the
+    versions of the plugin and of the steps, the backend specifications, the
+    serialized circuit and the serialized operator. Entries older than
+    ``ttl`` seconds are discarded. When the total size of the entries exceeds
+    ``max_size`` bytes, the least recently used entries are evicted.
+
+    By default, the entries are placed into the ``cache`` folder of the user
+    specific data folder specified by the output of
+    ``appdirs.user_data_dir("pennylane-orquestra", "Xanadu")``.
+
+    Keyword Args:
+        directory=None (str): the directory to store the entries in
+        max_size=10485760 (int): the maximum total size of the entries in bytes
+        ttl=604800 (float): the number of seconds an entry is valid for
+    """
+
+    def __init__(self, directory=None, max_size=10 * 2 ** 20, ttl=7 * 24 * 3600):
+        if directory is None:
+            directory = os.path.join(user_data_dir("pennylane-orquestra", "Xanadu"), "cache")
+
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(backend_specs, circuit, operator):
+        """Creates the key of an entry.
+
+        The key includes the versions of the plugin and of the steps, such
+        that results computed by earlier versions are not reused.
+
+        Args:
+            backend_specs (str): the Orquestra backend specifications as a json
+                string
+            circuit (str): the serialized circuit
+            operator (str): the serialized operator
+
+        Returns:
+            str: the hexadecimal digest identifying the computation
+        """
+        content = json.dumps([__version__, STEPS_VERSION, backend_specs, circuit, operator])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Gets the value stored for a key.
+
+        Accessing an entry marks it as the most recently used one.
+
+        Args:
+            key (str): the key of the entry
+
+        Returns:
+            object: the value stored or ``None`` if there is no valid entry
+            for the key
+        """
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+
+            expired = time.time() - entry["created"] > self.ttl
+            value = entry["value"]
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        except (KeyError, TypeError):
+            # Malformed entries are discarded
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        if expired:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Update the modification time used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return value
+
+    def update(self, items):
+        """Stores several entries at once and evicts the least recently used
+        entries if the cache grew too large.
+
+        Args:
+            items (Iterable[tuple]): pairs of keys and JSON serializable values
+        """
+        now = time.time()
+        for key, value in items:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as file:
+                json.dump({"created": now, "value": value}, file)
+
+            # Replacing the file is atomic, concurrent readers never see a
+            # partially written entry
+            os.replace(tmp_path, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the total size of the
+        entries does not exceed the maximum size."""
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def clear(self):
+        """Removes every entry of the cache."""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
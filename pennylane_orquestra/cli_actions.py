@@ -2,16 +2,114 @@
 This module contains utilities and auxiliary functions for using the Orquestra
 Quantum Engine command line interface (CLI).
 """
+import io
 import subprocess
 import time
 import os
-import urllib.request
+import random
+import urllib.error
 import json
 import tarfile
+import tempfile
 
-import yaml
 from appdirs import user_data_dir
 
+from pennylane_orquestra.gen_workflow import serialize_workflow
+from pennylane_orquestra.http_session import get_session
+
+RESULTS_FILENAME = "workflow_result.json"
+
+STDIN_PATH = "/dev/stdin"
+"""str: the path passed to the CLI for reading a workflow piped to its
+standard input"""
+
+STDIN_READ_ERRORS = (
+    "no such file",
+    "no such device",
+    "not a regular file",
+    "bad file descriptor",
+    "permission denied",
+    "could not read",
+    "cannot read",
+    "unable to read",
+    "failed to read",
+)
+"""tuple[str]: the messages of the CLI showing that it could not read the
+workflow from its standard input"""
+
+_stdin_readable = True
+
+
+class PollingSchedule:
+    """Schedule for the intervals between consecutive queries made while
+    waiting for the results of a workflow.
+
+    The first query is made right away. The interval slept before the next
+    query starts at ``initial_delay`` and is multiplied by ``backoff`` after
+    each query, until it reaches ``max_interval``. Each interval is randomly
+    stretched or shrunk by at most a ``jitter`` fraction of its value so that
+    several waiting clients do not query the platform at the same time.
+
+    Keyword Args:
+        initial_delay=0.1 (float): seconds to sleep after the first query
+        backoff=1.5 (float): the factor by which the interval grows after each
+            query
+        max_interval=10 (float): the maximum number of seconds to sleep
+            between two queries
+        jitter=0.1 (float): the maximum relative change applied randomly to
+            each interval
+        status_every=4 (int): the number of queries after which the workflow
+            status is also checked for failures
+    """
+
+    def __init__(self, initial_delay=0.1, backoff=1.5, max_interval=10, jitter=0.1, status_every=4):
+        if initial_delay < 0 or max_interval < 0:
+            raise ValueError("The polling intervals must be non-negative.")
+
+        if backoff < 1:
+            raise ValueError("The backoff factor of the polling schedule must be at least 1.")
+
+        if not 0 <= jitter < 1:
+            raise ValueError("The jitter of the polling schedule must be in the [0, 1) interval.")
+
+        if status_every < 1:
+            raise ValueError(
+                "The workflow status has to be checked after a positive number of queries."
+            )
+
+        self.initial_delay = initial_delay
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.status_every = status_every
+
+    @property
+    def key(self):
+        """The parameters of the schedule, which are equal for schedules
+        sleeping the same intervals.
+
+        Returns:
+            tuple: the parameters
+        """
+        return (
+            self.initial_delay,
+            self.backoff,
+            self.max_interval,
+            self.jitter,
+            self.status_every,
+        )
+
+    def intervals(self):
+        """Generates the seconds to sleep between consecutive queries.
+
+        Yields:
+            float: the next interval to sleep
+        """
+        interval = min(self.initial_delay, self.max_interval)
+        while True:
+            yield interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            interval = min(interval * self.backoff, self.max_interval)
+
 
 def qe_get(workflow_id, option="workflow"):
     """Function for getting information via an Orquestra Quantum Engine CLI
@@ -67,6 +165,80 @@ def qe_submit(filepath, keep_file=False):
     if not keep_file:
         os.remove(filepath)
 
+    return _submitted_workflow_id(res)
+
+
+def qe_submit_yaml(data):
+    """Function for submitting a workflow via a CLI call without writing it
+    to a file.
+
+    The workflow is piped to the standard input of the CLI call. If the
+    platform has no ``/dev/stdin`` device or the CLI could not read the
+    workflow from its standard input, the workflow is submitted from a
+    temporary file that is removed after the submission instead. Once the
+    CLI could not read its standard input, later workflows are submitted
+    from files right away.
+
+    Args:
+        data (str): the YAML serialization of the workflow
+
+    Returns:
+        str: the ID of the workflow submitted
+
+    Raises:
+        ValueError: if the submission was not successful
+    """
+    global _stdin_readable  # pylint: disable=global-statement
+
+    stdin_res = None
+    if _stdin_readable and os.path.exists(STDIN_PATH):
+        process = subprocess.Popen(
+            ["qe", "submit", "workflow", STDIN_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        output, _ = process.communicate(data)
+        stdin_res = output.splitlines(keepends=True)
+
+        if "Success" in output:
+            return _submitted_workflow_id(stdin_res)
+
+        if not any(error in output.lower() for error in STDIN_READ_ERRORS):
+            # The workflow was read and rejected
+            raise ValueError(stdin_res)
+
+        _stdin_readable = False
+
+    # The workflow is submitted from a file if the CLI cannot read it from
+    # its standard input
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as file:
+        file.write(data)
+
+    try:
+        return qe_submit(file.name, keep_file=True)
+    except ValueError as e:
+        if stdin_res is None:
+            raise
+
+        raise ValueError(stdin_res, *e.args) from e
+    finally:
+        os.remove(file.name)
+
+
+def _submitted_workflow_id(res):
+    """Extracts the ID of the workflow submitted from the response of a
+    successful submission.
+
+    Args:
+        res (list[str]): the lines of the response
+
+    Returns:
+        str: the ID of the workflow submitted
+
+    Raises:
+        ValueError: if the response does not contain the ID
+    """
     unexpected_resp_msg = "Received an unexpected response after submitting workflow."
     if isinstance(res, list):
         try:
@@ -80,6 +252,21 @@ def qe_submit(filepath, keep_file=False):
     return workflow_id
 
 
+def qe_list():
+    """Function for listing the workflows of the user via a CLI call.
+
+    The listing contains the status of every workflow submitted by the user,
+    such that the status of several workflows can be checked at once.
+
+    Returns:
+        list: response message of the CLI call
+    """
+    process = subprocess.Popen(
+        ["qe", "list", "workflow"], stdout=subprocess.PIPE, universal_newlines=True
+    )
+    return process.stdout.readlines()
+
+
 def workflow_details(workflow_id):
     """Function for getting workflow details via a CLI call.
 
@@ -119,7 +306,8 @@ def write_workflow_file(filename, workflow):
 
     Args:
         filename (str): the name of the file to write
-        workflow (dict): the workflow generated as a dictionary
+        workflow (dict or str): the workflow generated as a dictionary, or its
+            YAML serialization
     """
     # Get the directory to write the file to
     directory = user_data_dir("pennylane-orquestra", "Xanadu")
@@ -129,15 +317,34 @@ def write_workflow_file(filename, workflow):
 
     filepath = os.path.join(directory, filename)
 
+    if not isinstance(workflow, str):
+        workflow = serialize_workflow(workflow)
+
     with open(filepath, "w") as file:
-        # The order of the keys within the YAML file is pre-defined for Orquestra,
-        # hence need to keep the order
-        yaml.dump(workflow, file, sort_keys=False)
+        file.write(workflow)
 
     return filepath
 
 
-def loop_until_finished(workflow_id, timeout=300):
+def trace_event(trace, event, first=False):
+    """Records the time at which an event happened while waiting for the
+    results of a workflow.
+
+    Args:
+        trace (dict or None): the dictionary mapping events to the value of
+            ``time.perf_counter()`` at which they happened, nothing is
+            recorded if ``None``
+        event (str): the name of the event
+
+    Keyword Args:
+        first=False (bool): whether an event that was already recorded should
+            keep its original time
+    """
+    if trace is not None and not (first and event in trace):
+        trace[event] = time.perf_counter()
+
+
+def loop_until_finished(workflow_id, timeout=300, schedule=None, stats=None, trace=None):
     """Loops until the workflow execution has finished by querying workflow
     details using the workflow ID.
 
@@ -150,19 +357,38 @@ def loop_until_finished(workflow_id, timeout=300):
 
     Keyword args:
         timeout (int): seconds to wait until raising a TimeoutError
+        schedule (PollingSchedule): the schedule used for sleeping between
+            queries, a default schedule is used if not specified
+        stats (dict): dictionary in which the number of queries (``"polls"``)
+            and the number of CLI calls spawned (``"spawns"``) are recorded
+        trace (dict): dictionary in which the times at which the workflow was
+            first seen running (``"running"``), at which its results were
+            found (``"finished"``) and at which they were downloaded
+            (``"downloaded"``) are recorded along with the size of the
+            results in bytes (``"download_bytes"``) (see ``trace_event``)
 
     Returns:
         dict: the resulting dictionary parsed from a json file
     """
+    if schedule is None:
+        schedule = PollingSchedule()
+
+    if stats is None:
+        stats = {}
+
+    stats.setdefault("polls", 0)
+    stats.setdefault("spawns", 0)
+
+    intervals = schedule.intervals()
     start = time.time()
-    query_results = True
     tries = 0
-    while query_results:
+    while True:
         tries += 1
 
         # Check if we've exceeded the timeout time, otherwise loop further
         if time.time() - start > timeout:
             current_status = workflow_details(workflow_id)
+            stats["spawns"] += 1
             raise TimeoutError(
                 "The workflow results for workflow "
                 f"{workflow_id} were not obtained after {timeout/60} minutes. \n"
@@ -171,47 +397,106 @@ def loop_until_finished(workflow_id, timeout=300):
                 f"{''.join(current_status)}"
             )
 
-        if tries % 20 == 0:
+        stats["polls"] += 1
+
+        if tries % schedule.status_every == 0:
 
             # Check if the status shows that the workflow failed, after a
             # certain number of tries
             status = workflow_details(workflow_id)
+            stats["spawns"] += 1
             details_string = "".join(status).split()
             if "Failed" in details_string:
                 raise ValueError(f"Something went wrong with executing the workflow. {status}")
 
+            if "Running" in details_string:
+                trace_event(trace, "running", first=True)
+
         results = workflow_results(workflow_id)
+        stats["spawns"] += 1
 
         # 1. Attempt to extract a location
         try:
             # Assume that the second line of the message contains the URL
             location = results[1].split()[1]
-        except IndexError:
-            # The format of the results were not like the message with URL
-            continue
-
-        # 2. Check that the location is a valid URL
-        try:
 
+            # 2. Check that the location is a valid URL by requesting the
+            # results, such that they are downloaded at the same time
             # We expect that this fails if an invalid URL location was outputted
-            urllib.request.urlopen(location)
+            trace_event(trace, "finished")
+            data = get_session().get(location)
+            trace_event(trace, "downloaded")
 
             # If we managed to get the URL, we can stop querying
-            query_results = False
+            break
+
+        except IndexError:
+            # The format of the results were not like the message with URL
+            pass
 
         except urllib.error.URLError:
-            continue
+            pass
+
+        # Sleep until the next query, without oversleeping the timeout
+        remaining = timeout - (time.time() - start)
+        time.sleep(max(0, min(next(intervals), remaining)))
+
+    if trace is not None:
+        trace["download_bytes"] = len(data)
+
+    # 3. Parse the data obtained from the URL
+    return parse_results_archive(io.BytesIO(data))
+
+
+def download_results(location, trace=None):
+    """Downloads and parses the results of a workflow given the location
+    of the results.
+
+    The archive is downloaded into memory using the shared HTTP session and
+    only its ``workflow_result.json`` member is read, nothing is written to
+    disk.
+
+    Args:
+        location (str): the URL of the archive containing the workflow results
+
+    Keyword Args:
+        trace (dict): dictionary in which the time at which the results were
+            downloaded (``"downloaded"``) and their size in bytes
+            (``"download_bytes"``) are recorded
+
+    Returns:
+        dict: the resulting dictionary parsed from a json file
+    """
+    data = get_session().get(location)
+    trace_event(trace, "downloaded")
+
+    if trace is not None:
+        trace["download_bytes"] = len(data)
+
+    return parse_results_archive(io.BytesIO(data))
 
-    # 3. Obtain the data from the URL
-    # Seting filename=None will treat the file as temporary and it will be
-    # removed
-    file_tmp = urllib.request.urlretrieve(location, filename=None)[0]
-    if tarfile.is_tarfile(file_tmp):
-        tar = tarfile.open(file_tmp, "r:gz")
-        tar.extractall()
-        tar.close()
 
-        with open("workflow_result.json") as json_file:
-            data = json.load(json_file)
+def parse_results_archive(fileobj):
+    """Parses the workflow results from a gzipped tar archive.
 
-    return data
+    Args:
+        fileobj (file-like): a binary stream of the archive, which is read
+            sequentially
+
+    Returns:
+        dict: the resulting dictionary parsed from the ``workflow_result.json``
+        member of the archive
+
+    Raises:
+        ValueError: if the stream is not a valid archive or the archive does
+            not contain the results
+    """
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                if member.isfile() and os.path.basename(member.name) == RESULTS_FILENAME:
+                    return json.load(tar.extractfile(member))
+    except tarfile.TarError as e:
+        raise ValueError("The workflow results could not be read from the archive.") from e
+
+    raise ValueError(f"The archive of the workflow results does not contain {RESULTS_FILENAME}.")
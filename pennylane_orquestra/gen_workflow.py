@@ -2,6 +2,11 @@
 This module contains utilities and auxiliary functions for generating Orquestra
 workflows.
 """
+import functools
+import re
+
+import yaml
+
 # Backend import dictionaries used for generating Orquestra workflows
 
 forest_import = {
@@ -30,7 +35,7 @@ backend_import_db = {
 }
 
 
-def step_dictionary(name_suffix):
+def step_dictionary(name_suffix, function="run_circuit_and_get_expval"):
     """Creates a new step with a pre-defined name suffixed with the name
     passed.
 
@@ -38,11 +43,13 @@ def step_dictionary(name_suffix):
         name_suffix (str): The name suffix to use, usually the index of the
             step. Such an index as suffix can be used for sorting the workflow
             steps (e.g., for batch execution for the Orquestra device).
+        function (str): the name of the function defined in
+            ``steps/expval.py`` that is run by the step
 
     Returns:
         dict: the dictionary containing information for the step
     """
-    name = "run-circuit-and-get-expval-" + name_suffix
+    name = function.replace("_", "-") + "-" + name_suffix
     step_dict = {
         "name": name,
         "config": {
@@ -56,7 +63,7 @@ def step_dictionary(name_suffix):
                 ],
                 "parameters": {
                     "file": "pennylane_orquestra/steps/expval.py",
-                    "function": "run_circuit_and_get_expval",
+                    "function": function,
                 },
             }
         },
@@ -67,6 +74,34 @@ def step_dictionary(name_suffix):
     return step_dict
 
 
+@functools.lru_cache(maxsize=None)
+def _step_skeleton(function, component):
+    """Creates the parts of the steps running a function that do not depend
+    on the inputs of the steps.
+
+    The skeleton is created from ``step_dictionary`` once for each function
+    and backend component.
+
+    Args:
+        function (str): the name of the function run by the steps
+        component (str): the name of the Orquestra backend component
+
+    Returns:
+        tuple: the prefix of the step names, the language, the imports and
+        the parameters of the runtime and the outputs of the steps
+    """
+    step = step_dictionary("", function=function)
+    runtime = step["config"]["runtime"]
+
+    return (
+        step["name"],
+        runtime["language"],
+        tuple(runtime["imports"]) + (component,),
+        tuple(runtime["parameters"].items()),
+        tuple(tuple(output.items()) for output in step["outputs"]),
+    )
+
+
 def gen_expval_workflow(component, backend_specs, circuits, operators, **kwargs):
     """Workflow template for computing the expectation value of operators
     given a quantum circuit and a device backend.
@@ -87,6 +122,22 @@ def gen_expval_workflow(component, backend_specs, circuits, operators, **kwargs)
     Keyword arguments:
         resources=None (str): the machine resources to use for executing the
             workflow
+        parameters=None (list): json strings, each representing the
+            parameter table of a step, or ``None`` for the steps that are not
+            parametric. The circuit of a parametric step is a template that is
+            bound to each row of its table by the
+            ``run_circuit_template_and_get_expval`` step function.
+        shifts=None (list): json strings, each representing the parameters
+            to differentiate and their gradient recipes, or ``None`` for the
+            steps that do not compute gradients. Such a step computes the
+            gradient for the parameter values passed as its ``parameters``
+            input using the ``run_circuit_template_and_get_gradient`` step
+            function.
+        circuit_lists=None (list): booleans indicating for each step whether
+            its circuit and operators are json lists holding several circuits
+            and the list of operators of each of them. Such a step computes
+            every circuit using a single backend with the
+            ``run_circuits_and_get_expval`` step function.
 
     Returns:
         dict: the dictionary that contains the workflow template to be
@@ -134,25 +185,126 @@ def gen_expval_workflow(component, backend_specs, circuits, operators, **kwargs)
     expval_template["imports"].append(backend_import)
 
     resources = kwargs.get("resources", None)
+    parameters = kwargs.get("parameters", None) or [None] * len(circuits)
+    shifts = kwargs.get("shifts", None) or [None] * len(circuits)
+    circuit_lists = kwargs.get("circuit_lists", None) or [False] * len(circuits)
+
+    steps = expval_template["steps"]
+    for idx, (circ, ops, params, step_shifts, circuit_list) in enumerate(
+        zip(circuits, operators, parameters, shifts, circuit_lists)
+    ):
+        function = "run_circuit_and_get_expval"
+        if step_shifts is not None:
+            function = "run_circuit_template_and_get_gradient"
+        elif params is not None:
+            function = "run_circuit_template_and_get_expval"
+        elif circuit_list:
+            function = "run_circuits_and_get_expval"
 
-    for idx, (circ, ops) in enumerate(zip(circuits, operators)):
-        new_step = step_dictionary(str(idx))
-        expval_template["steps"].append(new_step)
+        name_prefix, language, imports, runtime_params, outputs = _step_skeleton(
+            function, component
+        )
 
+        # The step is filled in from fresh containers, such that no object is
+        # shared between the steps apart from the resources
+        config = {
+            "runtime": {
+                "language": language,
+                "imports": list(imports),
+                "parameters": dict(runtime_params),
+            }
+        }
         if resources is not None:
-            # Insert the backend component to the import list of the step
-            expval_template["steps"][idx]["config"]["resources"] = resources
+            config["resources"] = resources
 
-        # Insert the backend component to the import list of the step
-        expval_template["steps"][idx]["config"]["runtime"]["imports"].append(component)
+        inputs = [
+            {"backend_specs": backend_specs, "type": "string"},
+            {"operators": ops, "type": "string"},
+            {"circuits" if circuit_list else "circuit": circ, "type": "string"},
+        ]
 
-        # Insert step inputs
-        expval_template["steps"][idx]["inputs"] = []
-        expval_template["steps"][idx]["inputs"].append(
-            {"backend_specs": backend_specs, "type": "string"}
-        )
+        if params is not None:
+            inputs.append({"parameters": params, "type": "string"})
 
-        expval_template["steps"][idx]["inputs"].append({"operators": ops, "type": "string"})
+        if step_shifts is not None:
+            inputs.append({"shifts": step_shifts, "type": "string"})
+
+        steps.append(
+            {
+                "name": name_prefix + str(idx),
+                "config": config,
+                "outputs": [dict(output) for output in outputs],
+                "inputs": inputs,
+            }
+        )
 
-        expval_template["steps"][idx]["inputs"].append({"circuit": circ, "type": "string"})
     return expval_template
+
+
+_DOUBLE_QUOTED = re.compile(r"[^\n\x20-\x7e]| \n|\n ")
+"""re.Pattern: matches the strings that are emitted as double-quoted scalars,
+whose lines are folded differently by the C and the Python YAML emitters"""
+
+
+def _c_emitter_compatible(value):
+    """Checks whether the C YAML emitter produces the same output as the
+    Python emitter for a workflow.
+
+    Args:
+        value (object): the workflow or any of its parts
+
+    Returns:
+        bool: whether no string in the value is emitted as a double-quoted
+        scalar
+    """
+    if isinstance(value, str):
+        return _DOUBLE_QUOTED.search(value) is None
+
+    if isinstance(value, dict):
+        return all(
+            _c_emitter_compatible(key) and _c_emitter_compatible(item)
+            for key, item in value.items()
+        )
+
+    if isinstance(value, list):
+        return all(_c_emitter_compatible(item) for item in value)
+
+    return True
+
+
+def serialize_workflow(workflow):
+    """Serializes a workflow into YAML.
+
+    The C emitter of ``libyaml`` is used when PyYAML was built with it and
+    when it produces the same output as the pure Python emitter, which is
+    the case unless a string has to be emitted as a double-quoted scalar
+    (e.g., a string holding a tab or a non-ASCII character).
+
+    Args:
+        workflow (dict): the workflow generated as a dictionary
+
+    Returns:
+        str: the YAML serialization of the workflow
+    """
+    dumper = yaml.Dumper
+    if hasattr(yaml, "CDumper") and _c_emitter_compatible(workflow):
+        dumper = yaml.CDumper
+
+    # The order of the keys within the YAML file is pre-defined for Orquestra,
+    # hence need to keep the order
+    return yaml.dump(workflow, Dumper=dumper, sort_keys=False)
+
+
+def step_inputs(step):
+    """Collects the inputs of a workflow step.
+
+    Args:
+        step (dict): the step of a workflow generated by
+            ``gen_expval_workflow``
+
+    Returns:
+        dict: maps the names of the inputs to their values
+    """
+    return {
+        name: value for entry in step["inputs"] for name, value in entry.items() if name != "type"
+    }
@@ -0,0 +1,243 @@
+"""
+This module contains the HTTP client used for checking the availability of
+workflow results and downloading them over persistent connections.
+"""
+
+import http.client
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from pennylane_orquestra.utils import LRUCache
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+class HTTPSession:
+    """An HTTP client keeping the connections made to each host alive and
+    reusing them for subsequent requests.
+
+    The bodies of successful responses are stored along with their validators
+    (``ETag`` and ``Last-Modified`` headers), such that requesting the same
+    URL again is made conditionally and the payload is transferred only if it
+    changed.
+
+    URLs with a scheme other than HTTP(S) and URLs that should be reached via
+    a proxy are requested with ``urllib.request.urlopen`` instead.
+
+    The number of requests sent (``"requests"``), connections opened
+    (``"connections"``) and responses answered from the stored bodies
+    (``"not_modified"``) are recorded. The session may be shared by several
+    threads.
+
+    Keyword Args:
+        timeout=30 (float): seconds to wait for the server when connecting
+            and reading
+        max_idle=4 (int): the maximum number of idle connections kept per host
+        max_stored=16 (int): the maximum number of response bodies stored for
+            conditional requests
+    """
+
+    def __init__(self, timeout=30, max_idle=4, max_stored=16):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._stored = LRUCache(max_stored)
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections": 0, "not_modified": 0}
+
+    def get(self, url):
+        """Gets the body of a resource.
+
+        Args:
+            url (str): the URL of the resource
+
+        Returns:
+            bytes: the body of the response
+
+        Raises:
+            urllib.error.HTTPError: if the server responded with an error
+            urllib.error.URLError: if the server could not be reached
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parsed = urllib.parse.urlsplit(url)
+            if parsed.scheme not in ("http", "https") or self._proxied(parsed):
+                with urllib.request.urlopen(url) as response:
+                    return response.read()
+
+            stored = self._stored.get(url)
+            headers = {}
+            if stored is not None:
+                etag, last_modified, _ = stored
+                if etag is not None:
+                    headers["If-None-Match"] = etag
+                if last_modified is not None:
+                    headers["If-Modified-Since"] = last_modified
+
+            status, response_headers, body = self._request("GET", parsed, headers)
+
+            if status in REDIRECT_STATUSES and "Location" in response_headers:
+                url = urllib.parse.urljoin(url, response_headers["Location"])
+                continue
+
+            if status == 304 and stored is not None:
+                with self._lock:
+                    self.stats["not_modified"] += 1
+                return stored[2]
+
+            if status >= 300:
+                raise urllib.error.HTTPError(
+                    url, status, f"HTTP Error {status}", response_headers, None
+                )
+
+            etag = response_headers.get("ETag")
+            last_modified = response_headers.get("Last-Modified")
+            if etag is not None or last_modified is not None:
+                self._stored.set(url, (etag, last_modified, body))
+
+            return body
+
+        raise urllib.error.URLError(f"Too many redirects when requesting {url}.")
+
+    def request(self, method, url, body=None, headers=None):
+        """Sends a request over a persistent connection to the host of a URL.
+
+        Unlike ``~.get``, redirects are not followed and responses with an
+        error status are returned.
+
+        Args:
+            method (str): the HTTP method
+            url (str): the URL of the resource
+
+        Keyword Args:
+            body=None (bytes): the body of the request
+            headers=None (dict): the headers of the request
+
+        Returns:
+            tuple: the status, the headers and the body of the response
+
+        Raises:
+            urllib.error.URLError: if the server could not be reached
+        """
+        return self._request(method, urllib.parse.urlsplit(url), headers or {}, body=body)
+
+    def close(self):
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _request(self, method, parsed, headers, body=None):
+        """Sends a request over an idle connection to the host, or over a new
+        connection if there is none.
+
+        A request failing on a reused connection, which the server may have
+        closed in the meantime, is retried once on a new connection.
+
+        Args:
+            method (str): the HTTP method
+            parsed (urllib.parse.SplitResult): the URL of the resource
+            headers (dict): the headers of the request
+
+        Keyword Args:
+            body=None (bytes): the body of the request
+
+        Returns:
+            tuple: the status, the headers and the body of the response
+        """
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+
+        connection = self._checkout(key)
+        reused = connection is not None
+
+        while True:
+            if connection is None:
+                connection = self._connect(parsed)
+
+            try:
+                with self._lock:
+                    self.stats["requests"] += 1
+
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = None
+
+                if reused:
+                    reused = False
+                    continue
+
+                raise urllib.error.URLError(e) from e
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(key, connection)
+
+            return response.status, response.headers, data
+
+    def _connect(self, parsed):
+        """Opens a new connection to the host of a URL."""
+        if parsed.scheme == "https":
+            connection_class = http.client.HTTPSConnection
+        else:
+            connection_class = http.client.HTTPConnection
+
+        with self._lock:
+            self.stats["connections"] += 1
+
+        return connection_class(parsed.hostname, parsed.port, timeout=self.timeout)
+
+    def _checkout(self, key):
+        """Takes an idle connection to a host from the pool, if there is
+        one."""
+        with self._lock:
+            connections = self._idle.get(key)
+            return connections.pop() if connections else None
+
+    def _checkin(self, key, connection):
+        """Returns a connection to the pool, closing it if the pool of the
+        host is full."""
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle:
+                connections.append(connection)
+                return
+
+        connection.close()
+
+    @staticmethod
+    def _proxied(parsed):
+        """Checks whether a URL should be reached via a proxy."""
+        proxies = urllib.request.getproxies()
+        return parsed.scheme in proxies and not urllib.request.proxy_bypass(parsed.hostname)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the HTTP session shared by the whole process.
+
+    Returns:
+        HTTPSession: the shared session
+    """
+    global _session  # pylint: disable=global-statement
+
+    with _session_lock:
+        if _session is None:
+            _session = HTTPSession()
+
+    return _session
@@ -4,19 +4,62 @@ Base device class for PennyLane-Orquestra.
 """
 import abc
 import json
+import numbers
+import threading
+import time
 import uuid
 import re
+import concurrent.futures
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+import pennylane as qml
 from pennylane import QubitDevice
+from pennylane.circuit_graph import CircuitGraph
 from pennylane.operation import Expectation, Tensor
 from pennylane.ops import Identity
 from pennylane.wires import Wires
-from pennylane.utils import decompose_hamiltonian
 
 from pennylane_orquestra._version import __version__
-from pennylane_orquestra.utils import _terms_to_qubit_operator_string
-from pennylane_orquestra.gen_workflow import gen_expval_workflow
-from pennylane_orquestra.cli_actions import qe_submit, loop_until_finished, write_workflow_file
+from pennylane_orquestra.utils import (
+    LRUCache,
+    _bind_parameters,
+    _fingerprint,
+    _pauli_decomposition,
+    _qwc_groups,
+    _terms_to_qubit_operator_string,
+)
+from pennylane_orquestra.gen_workflow import gen_expval_workflow, serialize_workflow
+from pennylane_orquestra.cli_actions import (
+    PollingSchedule,
+    qe_submit,
+    qe_submit_yaml,
+    loop_until_finished,
+    write_workflow_file,
+)
+from pennylane_orquestra.transport import create_transport
+from pennylane_orquestra.watcher import get_watcher
+from pennylane_orquestra.cache import ResultCache
+from pennylane_orquestra.batching import AdaptiveBatchSize
+
+_MEASUREMENT_BASES = {
+    "PauliX": ["h"],
+    "PauliY": ["z", "s", "h"],
+    "PauliZ": [],
+    "Hadamard": [f"ry({-np.pi / 4})"],
+}
+"""dict[str, list[str]]: Maps the single-qubit observables with eigenvalues
+:math:`\\pm 1` to the OpenQASM 2.0 gates rotating them into the computational
+basis."""
+
+_PAULI_OBSERVABLES = {"I": Identity, "X": qml.PauliX, "Y": qml.PauliY, "Z": qml.PauliZ}
+"""dict[str, type]: Maps the letters of the Pauli words obtained by decomposing
+a matrix to the PennyLane observables."""
+
+_PAULI_MASKS = {"Identity": (0, 0), "PauliX": (1, 0), "PauliY": (1, 1), "PauliZ": (0, 1)}
+"""dict[str, tuple[int]]: Maps the Pauli observables to the bits they set in the
+X and Z masks of the compact encoding of a Hamiltonian."""
 
 
 class OrquestraDevice(QubitDevice, abc.ABC):
@@ -29,16 +72,61 @@ class OrquestraDevice(QubitDevice, abc.ABC):
     The ``~.batch_execute`` method can be utilized to send workflows that
     contain several circuits which are computed in parallel on a remote device.
 
-    The workflow files generated are placed into a user specific data folder
-    specified by the output of ``appdirs.user_data_dir("pennylane-orquestra",
-    "Xanadu")``. By default, such files are removed (see
-    ``keep_files`` keyword argument). After each device execution,
-    filenames for the generated workflows are stored in the ``filenames``
-    attribute.
+    By default, the workflows generated are submitted from memory without
+    writing any file. If the workflow files should be kept (see the
+    ``keep_files`` keyword argument), then they are placed into a user
+    specific data folder specified by the output of
+    ``appdirs.user_data_dir("pennylane-orquestra", "Xanadu")`` and their
+    filenames are stored in the ``filenames`` attribute after each device
+    execution.
 
     Computing the expectation value of the identity operator does not involve a
     workflow submission (hence no files are created).
 
+    Circuits of a batch that only differ in the values of their gate
+    parameters may be sent as a single OpenQASM 2.0 template along with a
+    table of parameter values (see the ``parametric_templates`` keyword
+    argument). The size of the workflow then grows with the number of
+    parameters rather than with the number of circuits times their length.
+
+    Circuits of a batch that have the same serialization are computed only
+    once, by a workflow step that computes the operators of each of them.
+
+    In sampling mode, the observables of a circuit may be split into groups
+    of qubit-wise commuting terms (see the ``grouping`` keyword argument).
+    Each group is measured by a separately rotated circuit in the same
+    workflow, such that the number of circuit executions scales with the
+    number of groups rather than with the number of terms.
+
+    The expectation value of a ``~.Hamiltonian`` may be computed directly
+    (see ``~.hamiltonian_expval``), in which case the Hamiltonian is passed to
+    the workflow steps using a compact encoding of its terms instead of an
+    OpenFermion operator string.
+
+    In tape mode, the device may provide its own Jacobian (see the
+    ``device_jacobian`` keyword argument and ``~.jacobian``), which computes
+    the gradients with respect to every trainable parameter of a circuit
+    using a single workflow submission. By default, QNodes are differentiated
+    by PennyLane.
+
+    Every workflow step runs in its own container, which imports the
+    Orquestra packages and creates the backend before computing anything.
+    For small circuits, this startup cost may be amortized by computing
+    several circuits in each step (see the ``circuits_per_step`` keyword
+    argument).
+
+    The expectation values computed may be stored in a persistent on-disk
+    cache (see the ``cache`` keyword argument). Only the operators without a
+    cached result are then included in the workflows submitted. Caching is
+    disabled by default, as the cached results persist across sessions and
+    the results obtained by sampling are random.
+
+    Every workflow submitted is traced: the time spent in each stage of its
+    execution, its ID, its number of steps, the size of the workflow and of
+    its results and the number of queries made are stored in the ``traces``
+    attribute and passed to the ``trace_callback`` keyword argument, if
+    specified.
+
     Args:
         wires (int, Iterable[Number, str]]): Number of subsystems represented
             by the device, or iterable that contains unique labels for the
@@ -54,12 +142,64 @@ class OrquestraDevice(QubitDevice, abc.ABC):
     Keyword Args:
         backend=None (str): the Orquestra backend device to use for the
             specific Orquestra backend, if applicable
-        batch_size=10 (int): the size of each circuit batch when using the
-            ``~.batch_execute`` method to send multiple workflows
-        keep_files=False (bool): Whether or not the workflow files
-            generated during the circuit execution should be kept or deleted.
+        batch_size=10 (int or str): the size of each circuit batch when using
+            the ``~.batch_execute`` method to send multiple workflows, or
+            ``"auto"`` to choose the size based on the measured duration of the
+            workflows submitted (see ``~.batch_stats``)
+        concurrent=False (bool): Whether or not the workflows created by the
+            ``~.batch_execute`` method should be submitted and awaited
+            concurrently instead of one after the other
+        max_workflows=None (int): the maximum number of workflows that may be
+            in flight at the same time when ``concurrent=True``; by default
+            every workflow of a batch execution is submitted up front
+        keep_files=False (bool): Whether or not the workflow files generated
+            during the circuit execution should be written and kept, by
+            default the workflows are submitted without writing files
         resources (dict): the resources to be specified for each workflow step
         timeout=300 (int): seconds to wait until raising a TimeoutError
+        polling (dict): keyword arguments for the ``PollingSchedule`` used
+            while waiting for workflow results (e.g., ``initial_delay``,
+            ``backoff``, ``max_interval`` and ``jitter``)
+        use_watcher=False (bool): Whether or not to wait for the workflow
+            results using the workflow watcher shared by the devices with the
+            same transport and polling schedule, which checks the status of
+            all the outstanding workflows at once
+        transport=None (str or Transport): the transport used for submitting
+            the workflows and querying their results, either ``"cli"``,
+            ``"api"`` for the Orquestra workflow API, ``"local"`` for running
+            the workflow steps in a local process pool or a ``Transport``; by
+            default the ``qe`` CLI is called
+        transport_options (dict): keyword arguments for the transport created
+            (e.g., ``url`` and ``token`` for the ``"api"`` transport or
+            ``max_workers`` for the ``"local"`` transport)
+        cache=False (bool): Whether or not to cache the results of the
+            workflows on disk and reuse them across sessions, which is only
+            advisable in analytic mode as sampled results are random
+        cache_options (dict): keyword arguments for the ``ResultCache`` used
+            (e.g., ``directory``, ``max_size`` and ``ttl``)
+        circuit_cache_size=128 (int): the maximum number of serialized
+            circuits kept in memory for reuse
+        operator_cache_size=128 (int): the maximum number of serialized
+            observables kept in memory for reuse
+        parametric_templates=False (bool): Whether or not structurally
+            identical circuits of a batch should be computed by a single
+            workflow step that binds each row of a parameter table to a
+            circuit template
+        grouping=False (bool): Whether or not the observables should be
+            measured in groups of qubit-wise commuting terms when the device
+            is in sampling mode
+        circuits_per_step=1 (int): the maximum number of circuits computed by
+            a single workflow step, each step sharing its backend between its
+            circuits
+        device_jacobian=False (bool): Whether or not the device provides the
+            Jacobian of tapes, which is computed by a single workflow, such
+            that QNodes in tape mode may use ``diff_method="device"``; by
+            default PennyLane computes the gradients
+        trace_callback=None (callable): function called with the trace of
+            each workflow once its results were obtained or it failed (see
+            ``~.traces``)
+        max_traces=100 (int): the number of traces of the most recent
+            workflows stored in the ``traces`` attribute
     """
 
     name = "Orquestra device"
@@ -101,14 +241,47 @@ class OrquestraDevice(QubitDevice, abc.ABC):
     def __init__(self, wires, shots=1000, analytic=True, **kwargs):
         super().__init__(wires=wires, shots=shots, analytic=analytic)
 
+        # The qubit of each wire label, shared by every serialization path
+        self._wire_index = {wire: idx for idx, wire in enumerate(self.wires.labels)}
+
         self.backend = kwargs.get("backend", None)
         self._batch_size = kwargs.get("batch_size", 10)
+        self._batch_sizer = AdaptiveBatchSize() if self._batch_size == "auto" else None
+        self._concurrent = kwargs.get("concurrent", False)
+        self._max_workflows = kwargs.get("max_workflows", None)
         self._keep_files = kwargs.get("keep_files", False)
         self._resources = kwargs.get("resources", None)
         self._timeout = kwargs.get("timeout", 300)
+        self._polling = PollingSchedule(**kwargs.get("polling", {}))
+        self._poll_stats = {}
+        self._use_watcher = kwargs.get("use_watcher", False)
+
+        transport = kwargs.get("transport", None)
+        if transport is not None:
+            transport = create_transport(transport, **kwargs.get("transport_options", {}))
+        self._transport = transport
+
+        use_cache = kwargs.get("cache", False)
+        self._cache = ResultCache(**kwargs.get("cache_options", {})) if use_cache else None
+        self._circuit_cache = LRUCache(kwargs.get("circuit_cache_size", 128))
+        self._operator_cache = LRUCache(kwargs.get("operator_cache_size", 128))
+        self._parametric_templates = kwargs.get("parametric_templates", False)
+        self._grouping = kwargs.get("grouping", False)
+        self._circuits_per_step = kwargs.get("circuits_per_step", 1)
         self._latest_id = None
         self._filenames = []
         self._backend_specs = None
+        self._trace_callback = kwargs.get("trace_callback", None)
+        self._traces = deque(maxlen=kwargs.get("max_traces", 100))
+
+        # The start of the execution being prepared by each thread and the
+        # number of circuits of its batch if the duration is recorded
+        self._tracing = threading.local()
+
+        # The QNodes using the "best" differentiation method pick the device
+        # gradient if it is provided, so it is only provided on request
+        if kwargs.get("device_jacobian", False):
+            self.capabilities = self._jacobian_capabilities
 
     def apply(self, operations, **kwargs):
         pass
@@ -121,9 +294,25 @@ class OrquestraDevice(QubitDevice, abc.ABC):
             supports_inverse_operations=False,
             supports_analytic_computation=True,
             returns_probs=False,
+            # Only the devices created with device_jacobian=True provide the
+            # Jacobian
+            provides_jacobian=False,
         )
         return capabilities
 
+    def _jacobian_capabilities(self):
+        """The capabilities of a device computing the Jacobian of tapes using
+        ``~.jacobian``.
+
+        Returns:
+            dict: the capabilities
+        """
+        capabilities = type(self).capabilities()
+
+        # The Jacobian is computed for tapes only
+        capabilities.update(provides_jacobian=qml.tape_mode_active())
+        return capabilities
+
     @property
     def backend_specs(self):
         """The backend specifications defined for the device.
@@ -158,71 +347,10 @@ class OrquestraDevice(QubitDevice, abc.ABC):
         return backend_specs
 
     def execute(self, circuit, **kwargs):
-
-        # Input checks
-        not_all_expval = any(obs.return_type is not Expectation for obs in circuit.observables)
-        if not_all_expval:
-            raise NotImplementedError(
-                f"The {self.short_name} device only supports returning expectation values."
-            )
-
-        self.check_validity(circuit.operations, circuit.observables)
-
-        # 1. Create qasm strings from the circuits
-        try:
-            qasm_circuit = self.serialize_circuit(circuit)
-        except AttributeError:
-            # QuantumTape case: need to extract the CircuitGraph
-            qasm_circuit = self.serialize_circuit(circuit.graph)
-
-        # 2. Create the qubit operators
-        ops, identity_indices = self.process_observables(circuit.observables)
-
-        if not ops:
-            # All the observables were identity, no workflow submission needed
-            return self._asarray([1] * len(identity_indices))
-
-        ops_json = json.dumps(ops)
-
-        # Single step: need to nest the operators into a list
-        ops = [ops_json]
-        qasm_circuit = [qasm_circuit]
-
-        # 4-5. Create the backend specs & workflow file
-        workflow = gen_expval_workflow(
-            self.qe_component,
-            self.backend_specs,
-            qasm_circuit,
-            ops,
-            resources=self._resources,
-            **kwargs,
-        )
         file_id = str(uuid.uuid4())
-        filename = f"expval-{file_id}.yaml"
-        filepath = write_workflow_file(filename, workflow)
-
-        # 6. Submit the workflow
-        workflow_id = qe_submit(filepath, keep_file=self._keep_files)
 
-        if self._keep_files:
-            self._filenames.append(filename)
-
-        self._latest_id = workflow_id
-
-        # 7. Loop until finished
-        data = loop_until_finished(workflow_id, timeout=self._timeout)
-
-        # Assume that there's only one step
-        results = [v for k, v in data.items()][0]["expval"]["list"]
-
-        # Insert the theoretical value for the expectation value of the
-        # identity operator
-        for idx in identity_indices:
-            results.insert(idx, 1)
-
-        res = self._asarray(results)
-
-        return res
+        # A single circuit is executed as a batch with a single step
+        return self._batch_execute([circuit], file_id, **kwargs)[0]
 
     @staticmethod
     def insert_identity_res_batch(results, empty_obs_list, identity_indices):
@@ -254,6 +382,171 @@ class OrquestraDevice(QubitDevice, abc.ABC):
 
         return results
 
+    def jacobian(self, circuit):
+        """Computes the Jacobian of a tape with respect to its trainable
+        parameters using the parameter-shift rule.
+
+        The circuit is sent as a template (see ``~.serialize_circuit_template``)
+        along with the values of its parameters and the gradient recipe of each
+        trainable parameter. A single workflow step then generates and
+        evaluates every shifted circuit. If the circuit cannot be represented by
+        a template, the shifted circuits are created locally and computed by a
+        single workflow.
+
+        Parameters of operations that do not support the parameter-shift rule
+        and parameters of observables are differentiated by PennyLane instead.
+
+        Args:
+            circuit (~.JacobianTape): the tape to differentiate
+
+        Returns:
+            array[float]: the Jacobian with a row for each observable and a
+            column for each trainable parameter
+        """
+        self._start_execution()
+        self._check_circuits([circuit])
+        graph = self._circuit_graph(circuit)
+
+        # The position of each gate parameter in the parameters of a template
+        positions = {}
+        for op in graph.operations:
+            for p_idx in range(len(op.data)):
+                positions[(id(op), p_idx)] = len(positions)
+
+        # The tape index, the template position and the recipe of the
+        # parameters with a non-zero derivative
+        shifts = []
+        trainable_params = sorted(circuit.trainable_params)
+        columns = []
+
+        for col, idx in enumerate(trainable_params):
+            op = circuit._par_info[idx]["op"]
+            p_idx = circuit._par_info[idx]["p_idx"]
+
+            if op.grad_method is None:
+                continue
+
+            position = positions.get((id(op), p_idx), None)
+            if position is None or op.grad_method != "A":
+                return circuit.jacobian(self, method="best")
+
+            recipe = [[float(c), float(a), float(s)] for c, a, s in op.get_parameter_shift(p_idx)]
+            shifts.append((idx, position, recipe))
+            columns.append(col)
+
+        observables = graph.observables
+        jac = np.zeros((len(observables), len(trainable_params)))
+
+        ops, identity_indices = self.process_observables(observables)
+        if not shifts or not ops:
+            # The expectation value of the identity is constant
+            return jac
+
+        file_id = str(uuid.uuid4())
+        template = self.serialize_circuit_template(graph)
+
+        if template is not None:
+            step_shifts = [[position, recipe] for _, position, recipe in shifts]
+            gradients = self._run_workflow(
+                [template[0]],
+                [json.dumps(ops)],
+                file_id,
+                parameters=[json.dumps(template[1])],
+                shifts=[json.dumps(step_shifts)],
+            )[0]
+        else:
+            gradients = self._shifted_circuits_gradients(circuit, shifts, identity_indices, file_id)
+
+        rows = [idx for idx in range(len(observables)) if idx not in identity_indices]
+        jac[np.ix_(rows, columns)] = np.transpose(gradients)
+        return jac
+
+    def _shifted_circuits_gradients(self, circuit, shifts, identity_indices, file_id):
+        """Computes gradients by executing the shifted circuits of a tape in a
+        single workflow.
+
+        Args:
+            circuit (~.JacobianTape): the tape to differentiate
+            shifts (list[tuple]): the tape index, the template position and
+                the gradient recipe of each parameter to differentiate
+            identity_indices (list[int]): the indices of the identity
+                observables, which are left out of the gradients
+            file_id (str): the file id to be used for naming the workflow file
+
+        Returns:
+            list[list[float]]: the gradient of the non-identity observables
+            with respect to each parameter
+        """
+        params = circuit.get_parameters(trainable_only=False)
+
+        shifted_circuits = []
+        for idx, _, recipe in shifts:
+            for _, multiplier, shift in recipe:
+                shifted_params = list(params)
+                shifted_params[idx] = multiplier * params[idx] + shift
+
+                shifted_circuit = circuit.copy(copy_operations=True)
+                shifted_circuit.set_parameters(shifted_params, trainable_only=False)
+                shifted_circuits.append(shifted_circuit)
+
+        results = iter(self._batch_execute(shifted_circuits, file_id))
+
+        gradients = []
+        for _, _, recipe in shifts:
+            gradient = sum(coeff * np.asarray(next(results)) for coeff, _, _ in recipe)
+            gradients.append(np.delete(gradient, identity_indices))
+
+        return gradients
+
+    def _wait_for_results(self, workflow_id, trace=None):
+        """Waits for the results of a submitted workflow using the polling
+        schedule of the device.
+
+        The number of queries and CLI calls made for the workflow are stored
+        in the ``poll_stats`` attribute. When the shared workflow watcher is
+        used, the CLI calls that check the status of every outstanding
+        workflow at once are not included.
+
+        Args:
+            workflow_id (str): the ID of the workflow submitted
+
+        Keyword Args:
+            trace (dict): dictionary in which the progress of the workflow is
+                recorded (see ``cli_actions.loop_until_finished``)
+
+        Returns:
+            dict: the workflow results
+        """
+        uses_cli = self._transport is None or self._transport.spawns_processes
+
+        # The submission of the workflow already spawned a CLI call
+        stats = {"polls": 0, "spawns": int(uses_cli)}
+        self._poll_stats[workflow_id] = stats
+
+        if self._use_watcher:
+            watcher = get_watcher(self._transport, schedule=self._polling)
+            future = watcher.watch(workflow_id, stats=stats, trace=trace)
+
+            try:
+                return future.result(timeout=self._timeout)
+            except concurrent.futures.TimeoutError as e:
+                watcher.unwatch(workflow_id)
+                raise TimeoutError(
+                    "The workflow results for workflow "
+                    f"{workflow_id} were not obtained after {self._timeout/60} minutes. \n"
+                    "The timeout can be adjusted by specifying the 'timeout' "
+                    "keyword argument."
+                ) from e
+
+        if self._transport is not None:
+            return self._transport.wait(
+                workflow_id, timeout=self._timeout, schedule=self._polling, stats=stats, trace=trace
+            )
+
+        return loop_until_finished(
+            workflow_id, timeout=self._timeout, schedule=self._polling, stats=stats, trace=trace
+        )
+
     @property
     def latest_id(self):
         """Returns the latest workflow ID that has been executed.
@@ -263,6 +556,110 @@ class OrquestraDevice(QubitDevice, abc.ABC):
         """
         return self._latest_id
 
+    @property
+    def poll_stats(self):
+        """Returns the number of queries and CLI calls spent on each workflow
+        submitted by the device.
+
+        Returns:
+            dict: maps workflow IDs to dictionaries with the number of queries
+            (``"polls"``) and CLI calls (``"spawns"``)
+        """
+        return self._poll_stats
+
+    @property
+    def traces(self):
+        """Returns the traces of the most recent workflows submitted by the
+        device.
+
+        Each trace is a dictionary holding the ID of the workflow
+        (``"workflow_id"``), the time of its submission in seconds since the
+        epoch (``"submitted_at"``), its number of steps (``"steps"``), the size
+        of the workflow file (``"payload_bytes"``) and of the archive of its
+        results (``"download_bytes"``) in bytes, the number of queries and CLI
+        calls made (``"polls"`` and ``"spawns"``), the error raised while
+        waiting for it (``"error"``) and the seconds spent in each stage
+        (``"timings"``):
+
+        * ``"serialize"``: validating and serializing the circuits and the
+          observables and looking up the cached results,
+        * ``"generate"``: generating the workflow,
+        * ``"write"``: serializing the workflow into YAML and writing the
+          workflow file if it is kept,
+        * ``"pending"``: waiting for a thread to submit the workflow, which
+          only takes time when workflows are submitted concurrently,
+        * ``"submit"``: submitting the workflow,
+        * ``"queue"``: until the workflow was first seen running,
+        * ``"run"``: until the results of the workflow were found,
+        * ``"download"``: downloading the results,
+        * ``"parse"``: parsing the results and extracting those of each step,
+        * ``"wait"``: from the submission until the results were parsed,
+        * ``"total"``: the whole execution.
+
+        The stages that were not observed, such as the queueing of a
+        workflow that was never seen running or the stages following an
+        error, are ``None``.
+
+        Returns:
+            list[dict]: the traces in the order of submission
+        """
+        return list(self._traces)
+
+    @property
+    def batch_stats(self):
+        """Returns the data used for choosing the batch sizes when the device
+        was created with ``batch_size="auto"``.
+
+        Returns:
+            dict: the number of circuits, the submission, queueing, running
+            and waiting times and the running time per step recorded for the
+            recent workflows of batch executions (``"workflows"``) and the
+            batch sizes chosen for each batch execution along with the fitted
+            workflow overhead and cost per circuit and the predicted
+            wall-clock time (``"choices"``), or ``None`` if the batch size is
+            fixed
+        """
+        if self._batch_sizer is None:
+            return None
+
+        return self._batch_sizer.stats
+
+    @property
+    def cache(self):
+        """Returns the cache storing the results of the device executions.
+
+        Returns:
+            ResultCache: the cache or ``None`` if caching is disabled
+        """
+        return self._cache
+
+    @property
+    def serialization_cache_info(self):
+        """Returns the statistics of the in-memory cache of serialized
+        circuits.
+
+        Returns:
+            dict: the number of hits, misses, circuits stored and the maximum
+            number of circuits stored
+        """
+        return self._circuit_cache.info()
+
+    @property
+    def operator_cache_info(self):
+        """Returns the statistics of the in-memory cache of serialized
+        observables.
+
+        Returns:
+            dict: the number of hits, misses, observables stored and the
+            maximum number of observables stored
+        """
+        return self._operator_cache.info()
+
+    def clear_operator_cache(self):
+        """Removes every serialized observable from the in-memory cache and
+        resets its statistics."""
+        self._operator_cache.clear()
+
     @property
     def filenames(self):
         """Returns the names of the workflow files created during device
@@ -291,7 +688,7 @@ class OrquestraDevice(QubitDevice, abc.ABC):
         """Device specific Orquestra component name used in the backend
         specification."""
 
-    def serialize_circuit(self, circuit):
+    def serialize_circuit(self, circuit, rotations=None):
         """Serializes the circuit before submission according to the backend
         specified.
 
@@ -301,16 +698,228 @@ class OrquestraDevice(QubitDevice, abc.ABC):
 
         Args:
             circuit (~.CircuitGraph): circuit to serialize
+            rotations (bool): whether or not to include the rotations
+                diagonalizing the observables, by default these are included
+                if the device is in sampling mode
 
         Returns:
             str: OpenQASM 2.0 representation of the circuit without any
             measurement instructions
         """
-        qasm_str = circuit.to_openqasm(rotations=not self.analytic)
+        if rotations is None:
+            rotations = not self.analytic
+
+        key = self._circuit_fingerprint(circuit, rotations)
+
+        qasm_without_measurements = self._circuit_cache.get(key)
+        if qasm_without_measurements is None:
+            qasm_without_measurements = self._to_openqasm(circuit, rotations)
+            self._circuit_cache.set(key, qasm_without_measurements)
 
-        qasm_without_measurements = re.sub("measure.*?;\n?\s*", "", qasm_str)
         return qasm_without_measurements
 
+    def serialize_circuit_template(self, circuit, rotations=None):
+        """Serializes the circuit as an OpenQASM 2.0 template where the gate
+        parameters are replaced by the placeholders ``{p0}``, ``{p1}``, etc.
+
+        Structurally identical circuits share the same template, which is only
+        created once. A circuit cannot be represented by a template if one of
+        its parameters is not a real scalar or if the serialization does not
+        contain the values of the parameters as they are (e.g., because an
+        operation is decomposed into gates depending on a function of its
+        parameters).
+
+        **Example**
+
+        >>> dev = qml.device("orquestra.forest", wires=1)
+        >>> with qml.tape.QuantumTape() as tape:
+        ...     qml.RX(0.1, wires=0)
+        ...     qml.expval(qml.PauliZ(0))
+        >>> template, row = dev.serialize_circuit_template(tape.graph)
+        >>> print(template)
+        OPENQASM 2.0;
+        include "qelib1.inc";
+        qreg q[1];
+        creg c[1];
+        rx({p0}) q[0];
+        >>> row
+        [0.1]
+
+        Args:
+            circuit (~.CircuitGraph): circuit to serialize
+            rotations (bool): whether or not to include the rotations
+                diagonalizing the observables, by default these are included
+                if the device is in sampling mode
+
+        Returns:
+            tuple or None: the template and the list of parameter values of
+            the circuit or ``None`` if the circuit cannot be represented by a
+            template
+        """
+        if rotations is None:
+            rotations = not self.analytic
+
+        key = ("template",) + self._circuit_fingerprint(circuit, rotations, parameters=False)
+
+        template = self._circuit_cache.get(key)
+        if template is None:
+            # An empty string marks circuits without a template
+            template = self._create_template(circuit, rotations) or ""
+            self._circuit_cache.set(key, template)
+
+        if not template:
+            return None
+
+        row = [self._parameter_value(p) for op in circuit.operations for p in op.parameters]
+        if any(value is None for value in row):
+            return None
+
+        return template, row
+
+    def _create_template(self, circuit, rotations):
+        """Creates the OpenQASM 2.0 template of a circuit.
+
+        The circuit is serialized twice, substituting two different sets of
+        distinct sentinel values for its parameters. The sentinels found in
+        the gate parameters of each serialization are replaced by
+        placeholders. The template is only valid if the two results match.
+
+        Args:
+            circuit (~.CircuitGraph): the circuit
+            rotations (bool): whether or not the rotations diagonalizing the
+                observables are included in the serialization
+
+        Returns:
+            str or None: the template or ``None`` if the circuit cannot be
+            represented by a template
+        """
+        operations = circuit.operations
+        for op in operations:
+            if any(self._parameter_value(p) is None for p in op.parameters):
+                return None
+
+        templates = []
+        for offset in (0.123456789, 0.987654321):
+            placeholders = {}
+            original_data = [op.data for op in operations]
+
+            try:
+                for op in operations:
+                    sentinels = []
+                    for _ in op.data:
+                        sentinel = offset + len(placeholders)
+                        placeholders[str(sentinel)] = f"{{p{len(placeholders)}}}"
+                        sentinels.append(sentinel)
+
+                    op.data = sentinels
+
+                qasm = self._to_openqasm(circuit, rotations)
+            finally:
+                for op, data in zip(operations, original_data):
+                    op.data = data
+
+            replace_params = lambda match: ",".join(
+                placeholders.get(p, p) for p in match.group(1).split(",")
+            )
+            templates.append(re.sub(r"(?<=\()([^()]*)(?=\))", replace_params, qasm))
+
+        if templates[0] != templates[1]:
+            return None
+
+        return templates[0]
+
+    @staticmethod
+    def _parameter_value(param):
+        """Converts a gate parameter to a real scalar that can be stored in
+        a parameter table.
+
+        Args:
+            param (object): the parameter
+
+        Returns:
+            float or int or None: the value of the parameter or ``None`` if the
+            parameter is not a real scalar
+        """
+        if isinstance(param, np.ndarray):
+            if param.ndim != 0:
+                return None
+
+            param = param.item()
+
+        if not isinstance(param, numbers.Real):
+            return None
+
+        return param.item() if isinstance(param, np.generic) else param
+
+    @staticmethod
+    def _to_openqasm(circuit, rotations):
+        """Creates the OpenQASM 2.0 program of a circuit without any
+        measurement instructions.
+
+        Args:
+            circuit (~.CircuitGraph): the circuit
+            rotations (bool): whether or not to include the rotations
+                diagonalizing the observables
+
+        Returns:
+            str: the OpenQASM 2.0 program
+        """
+        # The operations of a tape graph are the list of operations of the
+        # tape, which to_openqasm extends in place with the diagonalizing
+        # gates when rotations are included. The list is restored, such that
+        # the tape is unchanged. Other circuit graphs return a new list.
+        operations = circuit.operations
+        num_operations = len(operations)
+
+        qasm_str = circuit.to_openqasm(rotations=rotations)
+        del operations[num_operations:]
+
+        return re.sub(r"measure.*?;\n?\s*", "", qasm_str)
+
+    @staticmethod
+    def _circuit_fingerprint(circuit, rotations, parameters=True):
+        """Creates a canonical fingerprint of a circuit that identifies its
+        OpenQASM 2.0 representation.
+
+        The fingerprint consists of the wires of the circuit, the name, wires
+        and parameters of each operation and, if rotations are included, the
+        observables of the circuit.
+
+        Args:
+            circuit (~.CircuitGraph): the circuit
+            rotations (bool): whether or not the rotations diagonalizing the
+                observables are included in the serialization
+            parameters (bool): whether or not the values of the gate
+                parameters are included, otherwise only their number is
+                included and the fingerprint identifies the structure of the
+                circuit
+
+        Returns:
+            tuple: the hashable fingerprint
+        """
+        get_name = lambda op: tuple(op.name) if isinstance(op.name, list) else op.name
+        get_params = lambda op: (
+            tuple(_fingerprint(p) for p in op.parameters) if parameters else len(op.data)
+        )
+
+        operations = tuple(
+            (get_name(op), op.inverse, tuple(op.wires.tolist()), get_params(op))
+            for op in circuit.operations
+        )
+
+        observables = ()
+        if rotations:
+            observables = tuple(
+                (
+                    get_name(obs),
+                    tuple(obs.wires.tolist()),
+                    tuple(_fingerprint(p) for p in obs.parameters),
+                )
+                for obs in circuit.observables
+            )
+
+        return (rotations, tuple(circuit.wires.tolist()), operations, observables)
+
     def process_observables(self, observables):
         """Processes the observables provided with the circuits.
 
@@ -352,8 +961,7 @@ class OrquestraDevice(QubitDevice, abc.ABC):
             str: string representation of terms making up the observable
         """
         if not self.analytic:
-            obs_wires = observable.wires
-            wires = self.wires.indices(obs_wires)
+            wires = [self._wire_index[w] for w in observable.wires.labels]
             op_str = self.pauliz_operator_string(wires)
         else:
             op_str = self.qubit_operator_string(observable)
@@ -396,7 +1004,9 @@ class OrquestraDevice(QubitDevice, abc.ABC):
         be passed when creating an ``openfermion.QubitOperator``.
 
         This method decomposes an observable into a sum of Pauli terms and
-        identities, if needed.
+        identities, if needed. The strings created are cached in memory, keyed
+        by the name, the wire labels and the parameters (e.g., the matrix of
+        a ``Hermitian`` observable) of each factor of the observable.
 
         **Example**
 
@@ -410,6 +1020,28 @@ class OrquestraDevice(QubitDevice, abc.ABC):
         >>> print(op_str)
         0.7071067811865475 [X0] + 0.7071067811865475 [Z0]
 
+        Args:
+            observable (pennylane.operation.Observable): the observable to serialize
+
+        Returns:
+            str: the ``openfermion.QubitOperator`` string representation
+        """
+        factors = observable.obs if isinstance(observable, Tensor) else [observable]
+        key = ("operator",) + tuple(
+            (o.name, tuple(o.wires.labels), _fingerprint(o.parameters)) for o in factors
+        )
+
+        op_str = self._operator_cache.get(key)
+        if op_str is None:
+            op_str = self._create_qubit_operator_string(observable)
+            self._operator_cache.set(key, op_str)
+
+        return op_str
+
+    def _create_qubit_operator_string(self, observable):
+        """Creates the OpenFermion operator string of an observable without
+        using the cache.
+
         Args:
             observable (pennylane.operation.Observable): the observable to serialize
 
@@ -424,26 +1056,7 @@ class OrquestraDevice(QubitDevice, abc.ABC):
             need_decomposition = observable.name not in accepted_obs
 
         if need_decomposition:
-
-            original_observable = observable
-
-            # Decompose the matrix of the observable
-            # This removes information about the wire labels used and
-            # consecutive integer wires are used
-            coeffs, obs_list = decompose_hamiltonian(original_observable.matrix)
-
-            for idx in range(len(obs_list)):
-                obs = obs_list[idx]
-
-                if not isinstance(obs, Tensor):
-                    # Convert terms to Tensor such that _terms_to_qubit_operator
-                    # can be used
-                    obs_list[idx] = Tensor(obs)
-
-                # Need to use the custom wire labels of the original observable
-                original_wires = original_observable.wires.tolist()
-                for o, mapped_w in zip(obs_list[idx].obs, original_wires):
-                    o._wires = Wires(mapped_w)
+            coeffs, obs_list = self._decompose_observable(observable)
 
         else:
             if not isinstance(observable, Tensor):
@@ -454,53 +1067,378 @@ class OrquestraDevice(QubitDevice, abc.ABC):
             coeffs = [1]
             obs_list = [observable]
 
-        # Use consecutive integers as default wire_map
-        wire_map = {v: idx for idx, v in enumerate(self.wires)}
-        return _terms_to_qubit_operator_string(coeffs, obs_list, wires=wire_map)
+        # The index of each wire on the device is its qubit
+        return _terms_to_qubit_operator_string(coeffs, obs_list, wire_index=self._wire_index)
+
+    @staticmethod
+    def _decompose_observable(observable):
+        """Decomposes the matrix of an observable into a linear combination of
+        Pauli words.
+
+        Args:
+            observable (pennylane.operation.Observable): the observable
+
+        Returns:
+            tuple[list[float], list[~.Tensor]]: the coefficient of each term
+            and the terms acting on the wires of the observable
+        """
+        coeffs, words = _pauli_decomposition(observable.matrix)
+
+        # The qubits of the decomposition follow the order of the wires of
+        # the observable
+        original_wires = observable.wires.tolist()
+        obs_list = [
+            Tensor(
+                *[_PAULI_OBSERVABLES[letter](wires=w) for letter, w in zip(word, original_wires)]
+            )
+            for word in words
+        ]
+
+        return coeffs, obs_list
+
+    def measurement_terms(self, observable):
+        """Splits an observable into terms that can be measured by rotating
+        single qubits into the computational basis.
+
+        Each term is a product of single-qubit observables with eigenvalues
+        :math:`\\pm 1`, represented as a word: a tuple of the wire label and
+        the name of the observable for each non-identity factor, sorted by the
+        index of the wire on the device. Observables that are not such a
+        product are decomposed into a linear combination of Pauli words.
+
+        **Example**
+
+        >>> dev = qml.device("orquestra.forest", wires=2, analytic=False)
+        >>> dev.measurement_terms(qml.Hadamard(1) @ qml.PauliX(0))
+        [(1, ((0, 'PauliX'), (1, 'Hadamard')))]
+        >>> dev.measurement_terms(qml.Hermitian(np.diag([1, 3]), wires=[0]))
+        [(2.0, ()), (-1.0, ((0, 'PauliZ'),))]
+
+        Args:
+            observable (pennylane.operation.Observable): the observable
+
+        Returns:
+            list[tuple[float, tuple]]: the coefficient and the word of each
+            term
+        """
+        factors = observable.obs if isinstance(observable, Tensor) else [observable]
+
+        if all(o.name in _MEASUREMENT_BASES or o.name == "Identity" for o in factors):
+            return [(1, self._measurement_word(factors))]
+
+        coeffs, obs_list = self._decompose_observable(observable)
+        return [
+            (float(np.real(coeff)), self._measurement_word(term.obs))
+            for coeff, term in zip(coeffs, obs_list)
+        ]
+
+    def _measurement_word(self, factors):
+        """Creates the word representing a product of single-qubit
+        observables.
+
+        Args:
+            factors (list[pennylane.operation.Observable]): the single-qubit
+                observables
+
+        Returns:
+            tuple: the wire label and the name of each non-identity factor
+        """
+        word = [(o.wires.labels[0], o.name) for o in factors if o.name != "Identity"]
+        return tuple(sorted(word, key=lambda factor: self._wire_index[factor[0]]))
+
+    def encode_hamiltonian(self, hamiltonian):
+        """Creates the compact encoding of a Hamiltonian that is passed to a
+        workflow step as an operator.
+
+        Each term of the Hamiltonian is represented by its coefficient and a
+        pair of bitmasks: bit ``i`` of the X mask is set if the term acts on
+        qubit ``i`` with :math:`X` or :math:`Y` and bit ``i`` of the Z mask is
+        set if it acts with :math:`Z` or :math:`Y`. The qubits are the indices
+        of the wires on the device. Terms that are not products of Pauli
+        operators are decomposed into Pauli words first.
+
+        **Example**
+
+        >>> dev = qml.device("orquestra.forest", wires=2)
+        >>> H = qml.Hamiltonian([0.5, -1], [qml.PauliX(0) @ qml.PauliY(1), qml.Identity(0)])
+        >>> dev.encode_hamiltonian(H)
+        '{"coeffs": [0.5, -1.0], "x": [3, 0], "z": [2, 0]}'
+
+        Args:
+            hamiltonian (~.Hamiltonian): the Hamiltonian
+
+        Returns:
+            str: the json string of the coefficients (``"coeffs"``), the X masks
+            (``"x"``) and the Z masks (``"z"``) of the terms
+        """
+        coeffs = []
+        x_masks = []
+        z_masks = []
+
+        for coeff, obs in zip(*hamiltonian.terms):
+            factors = obs.obs if isinstance(obs, Tensor) else [obs]
+
+            if all(o.name in _PAULI_MASKS for o in factors):
+                terms = [(1, factors)]
+            else:
+                decomposed_coeffs, obs_list = self._decompose_observable(obs)
+                terms = [(c, term.obs) for c, term in zip(decomposed_coeffs, obs_list)]
+
+            for term_coeff, term_factors in terms:
+                x_mask = z_mask = 0
+                for o in term_factors:
+                    x_bit, z_bit = _PAULI_MASKS[o.name]
+                    qubit = self._wire_index[o.wires.labels[0]]
+                    x_mask |= x_bit << qubit
+                    z_mask |= z_bit << qubit
+
+                coeffs.append(float(np.real(coeff * term_coeff)))
+                x_masks.append(x_mask)
+                z_masks.append(z_mask)
+
+        return json.dumps({"coeffs": coeffs, "x": x_masks, "z": z_masks})
+
+    def hamiltonian_expval(self, circuits, hamiltonian, **kwargs):
+        """Computes the expectation value of a Hamiltonian with respect to the
+        state prepared by each circuit using a single workflow.
+
+        In analytic mode, the Hamiltonian is passed to each workflow step
+        using the compact encoding created by ``~.encode_hamiltonian``, such
+        that a large number of terms does not need to be converted into
+        OpenFermion operator strings. In sampling mode, the terms of the
+        Hamiltonian are measured in groups of qubit-wise commuting terms (see
+        the ``grouping`` keyword argument of the device). The measurements of
+        the circuits are ignored.
+
+        Args:
+            circuits (list[~.CircuitGraph or ~.QuantumTape]): the circuits
+                preparing the states
+            hamiltonian (~.Hamiltonian): the Hamiltonian
+
+        Returns:
+            array[float]: the expectation value of the Hamiltonian for each
+            circuit
+        """
+        self._start_execution()
+
+        # The terms of the Hamiltonian refer to the qubits by the indices of
+        # the device wires, hence the circuits act on every device wire
+        circuits = [
+            CircuitGraph(self._circuit_graph(circuit).operations, {}, self.wires)
+            for circuit in circuits
+        ]
+        for circuit in circuits:
+            self.check_validity(circuit.operations, [])
+
+        file_id = str(uuid.uuid4())
+
+        if not self.analytic:
+            terms = [
+                (coeff * term_coeff, word)
+                for coeff, obs in zip(*hamiltonian.terms)
+                for term_coeff, word in self.measurement_terms(obs)
+            ]
+            results = self._grouped_batch_execute(
+                circuits, file_id, terms=[[terms]] * len(circuits), **kwargs
+            )
+        else:
+            qasm_circuits = [self.serialize_circuit(circuit) for circuit in circuits]
+            op = self.encode_hamiltonian(hamiltonian)
+            results = self._compute_expvals(
+                qasm_circuits, [None] * len(circuits), [[op]] * len(circuits), file_id, **kwargs
+            )
+
+        return np.array([res[0] for res in results], dtype=float)
+
+    @staticmethod
+    def _rotation_qasm(basis, circuit_wires):
+        """Creates the OpenQASM 2.0 instructions rotating the measured qubits
+        into the computational basis.
+
+        Args:
+            basis (dict): maps wire labels to the name of the observable
+                measured on the wire
+            circuit_wires (Wires): the wires of the circuit, which determine
+                the index of the qubit for each wire
+
+        Returns:
+            str: the OpenQASM 2.0 instructions
+        """
+        qasm_str = ""
+        for wire, name in sorted(basis.items(), key=lambda item: circuit_wires.index(item[0])):
+            qubit = circuit_wires.index(wire)
+            for gate in _MEASUREMENT_BASES[name]:
+                qasm_str += f"{gate} q[{qubit}];\n"
+
+        return qasm_str
 
     def batch_execute(self, circuits, **kwargs):
-        results = []
-        idx = 0
         file_prefix = f"{str(uuid.uuid4())}"
 
-        # Iterating through the circuits based on the allowed number of
-        # circuits per workflow
-        while idx < len(circuits):
-            end_idx = idx + self._batch_size
+        batch_size = self._batch_size
+        if self._batch_sizer is not None:
+            parallel = 1
+            if self._concurrent:
+                parallel = self._max_workflows or len(circuits)
+
+            batch_size = self._batch_sizer.size(len(circuits), parallel=parallel)
+
+        # Splitting the circuits based on the allowed number of circuits per
+        # workflow
+        batches = []
+        for idx in range(0, len(circuits), batch_size):
+            end_idx = idx + batch_size
             batch = circuits[idx:end_idx]
             file_id = f"{file_prefix}-{str(idx)}"
+            batches.append((batch, file_id))
 
-            res = self._batch_execute(batch, file_id, **kwargs)
+        if self._concurrent and len(batches) > 1:
+            batch_results = self._concurrent_batch_execute(batches, **kwargs)
+        else:
+            batch_results = [
+                self._batch_execute(batch, file_id, record_duration=True, **kwargs)
+                for batch, file_id in batches
+            ]
 
+        results = []
+        for res in batch_results:
             results.extend(res)
-            idx += self._batch_size
 
         return results
 
-    def _batch_execute(self, circuits, file_id, **kwargs):
+    def _concurrent_batch_execute(self, batches, **kwargs):
+        """Submits the workflow of each batch and waits for all of them
+        concurrently.
+
+        At most ``max_workflows`` workflows are in flight at the same time. If
+        no such limit was specified, then every workflow is submitted up
+        front.
+
+        The circuits are serialized and the workflows are generated on the
+        calling thread, as PennyLane queues operations in a context shared by
+        every thread. Only submitting the workflows and waiting for their
+        results is done by the worker threads.
+
+        Args:
+            batches (list[tuple]): pairs of circuits to execute in a single
+                workflow and the file id to be used for naming the workflow file
+
+        Returns:
+            list[list[array[float]]]: the results of each batch in the order
+            the batches were passed
+        """
+        max_workers = self._max_workflows or len(batches)
+        pipelines = [
+            self._batch_pipeline(batch, file_id, record_duration=True, **kwargs)
+            for batch, file_id in batches
+        ]
+        results = [None] * len(pipelines)
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            def advance(idx, step_results):
+                # Prepares the next workflow of a batch or stores its results
+                try:
+                    workflow = pipelines[idx].send(step_results)
+                except StopIteration as e:
+                    results[idx] = e.value
+                    return
+
+                futures[executor.submit(self._submit_workflow, workflow)] = idx
+
+            for idx in range(len(pipelines)):
+                advance(idx, None)
+
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    advance(futures.pop(future), future.result())
+
+        return results
+
+    def _batch_execute(self, circuits, file_id, record_duration=False, **kwargs):
         """Creates a multi-step workflow for executing a batch of circuits.
 
         Args:
             circuits (list[QuantumTape]): circuits to execute on the device
             file_id (str): the file id to be used for naming the workflow file
+            record_duration (bool): whether the duration of the workflow is
+                recorded for choosing the batch size
 
         Returns:
             list[array[float]]: list of measured value(s) for the batch
         """
-        for circuit in circuits:
-            # Input checks
-            not_all_expval = any(obs.return_type is not Expectation for obs in circuit.observables)
-            if not_all_expval:
-                raise NotImplementedError(
-                    f"The {self.short_name} device only supports returning expectation values."
-                )
+        return self._run_pipeline(
+            self._batch_pipeline(circuits, file_id, record_duration=record_duration, **kwargs)
+        )
 
-            self.check_validity(circuit.operations, circuit.observables)
+    def _start_execution(self, batch_circuits=None):
+        """Marks the start of the execution prepared by the current thread.
+
+        Args:
+            batch_circuits (int): the number of circuits of the batch executed
+                if the duration of its workflow is recorded for choosing the
+                batch size
+        """
+        self._tracing.start = time.perf_counter()
+        self._tracing.batch_circuits = batch_circuits
+
+    def _run_pipeline(self, pipeline):
+        """Runs a pipeline, submitting each workflow it prepares and sending
+        back the results of its steps.
+
+        Args:
+            pipeline (generator): the pipeline, which yields the workflows
+                prepared by ``~._prepare_workflow`` and returns its result
+
+        Returns:
+            object: the result of the pipeline
+        """
+        try:
+            workflow = next(pipeline)
+            while True:
+                workflow = pipeline.send(self._submit_workflow(workflow))
+        except StopIteration as e:
+            return e.value
+
+    def _batch_pipeline(self, circuits, file_id, record_duration=False, **kwargs):
+        """Prepares the multi-step workflow executing a batch of circuits and
+        creates the results of the batch from the results of its steps.
+
+        Args:
+            circuits (list[QuantumTape]): circuits to execute on the device
+            file_id (str): the file id to be used for naming the workflow file
+            record_duration (bool): whether the duration of the workflow is
+                recorded for choosing the batch size
+
+        Yields:
+            dict: the prepared workflow, the results of its steps are sent back
+
+        Returns:
+            list[array[float]]: list of measured value(s) for the batch
+        """
+        self._start_execution(len(circuits) if record_duration else None)
+        self._check_circuits(circuits)
 
         # 1. Create qasm strings from the circuits
         # Extract the CircuitGraph object from QuantumTape
-        circuits = [circ.graph for circ in circuits]
-        qasm_circuits = [self.serialize_circuit(circuit) for circuit in circuits]
+        circuits = [self._circuit_graph(circ) for circ in circuits]
+
+        if self._grouping and not self.analytic:
+            return (yield from self._grouped_pipeline(circuits, file_id, **kwargs))
+
+        templates = [None] * len(circuits)
+        if self._parametric_templates:
+            templates = [self.serialize_circuit_template(circuit) for circuit in circuits]
+
+        # Binding the parameters to a template is cheaper than serializing
+        qasm_circuits = [
+            self.serialize_circuit(circuit) if template is None else _bind_parameters(*template)
+            for circuit, template in zip(circuits, templates)
+        ]
 
         # 2. Create the qubit operators of observables for each circuit
         ops = []
@@ -518,53 +1456,627 @@ class OrquestraDevice(QubitDevice, abc.ABC):
 
             identity_indices[idx] = current_id_indices
 
-        if not all(ops):
-            # There were batches which had only identity observables
+        # 3. Compute the expectation values
+        results = yield from self._expvals_pipeline(
+            qasm_circuits, templates, ops, file_id, **kwargs
+        )
+
+        # Only identity observables were specified for the empty lists
+        results = [res for idx, res in enumerate(results) if idx not in empty_obs_list]
+
+        results = self.insert_identity_res_batch(results, empty_obs_list, identity_indices)
+        results = [self._asarray(res) for res in results]
+
+        return results
+
+    def _grouped_batch_execute(self, circuits, file_id, terms=None, **kwargs):
+        """Executes a batch of circuits by measuring groups of qubit-wise
+        commuting terms (see ``~._grouped_pipeline``).
+
+        Args:
+            circuits (list[~.CircuitGraph]): circuits to execute on the device
+            file_id (str): the file id to be used for naming the workflow file
+            terms (list[list[list[tuple]]]): the terms of each observable of
+                each circuit as returned by ``~.measurement_terms``, by default
+                the terms of the observables of the circuits
+
+        Returns:
+            list[array[float]]: list of measured value(s) for the batch
+        """
+        return self._run_pipeline(self._grouped_pipeline(circuits, file_id, terms=terms, **kwargs))
+
+    def _grouped_pipeline(self, circuits, file_id, terms=None, **kwargs):
+        """Executes a batch of circuits by measuring groups of qubit-wise
+        commuting terms.
+
+        The observables of each circuit are split into terms (see
+        ``~.measurement_terms``), which are grouped such that the terms of a
+        group share the measurement basis on every wire. Each group is
+        measured by the circuit rotated into the basis of the group and the
+        expectation values of the observables are recombined from the values
+        obtained for their terms.
+
+        Args:
+            circuits (list[~.CircuitGraph]): circuits to execute on the device
+            file_id (str): the file id to be used for naming the workflow file
+            terms (list[list[list[tuple]]]): the terms of each observable of
+                each circuit as returned by ``~.measurement_terms``, by default
+                the terms of the observables of the circuits
+
+        Yields:
+            dict: the prepared workflow, the results of its steps are sent back
+
+        Returns:
+            list[array[float]]: list of measured value(s) for the batch
+        """
+        qasm_circuits = []
+        templates = []
+        ops = []
+
+        # The terms of each observable and the index of the first group of
+        # each circuit
+        circuit_terms = []
+        group_offsets = []
+
+        if terms is None:
+            terms = [
+                [self.measurement_terms(obs) for obs in circuit.observables] for circuit in circuits
+            ]
+
+        for circuit, circuit_obs_terms in zip(circuits, terms):
+            words = [word for obs_terms in circuit_obs_terms for _, word in obs_terms if word]
+            groups = _qwc_groups(words)
+
+            template = None
+            if self._parametric_templates:
+                template = self.serialize_circuit_template(circuit, rotations=False)
+
+            if template is None:
+                qasm_circuit = self.serialize_circuit(circuit, rotations=False)
+            else:
+                qasm_circuit = _bind_parameters(*template)
+
+            circuit_terms.append((circuit_obs_terms, groups))
+            group_offsets.append(len(qasm_circuits))
+
+            for basis, group_words in groups:
+                rotations = self._rotation_qasm(basis, circuit.wires)
+                qasm_circuits.append(qasm_circuit + rotations)
+                templates.append(
+                    None if template is None else (template[0] + rotations, template[1])
+                )
+                ops.append(
+                    [
+                        self.pauliz_operator_string([self._wire_index[w] for w, _ in word])
+                        for word in group_words
+                    ]
+                )
+
+        group_results = yield from self._expvals_pipeline(
+            qasm_circuits, templates, ops, file_id, **kwargs
+        )
+
+        results = []
+        for (circuit_obs_terms, groups), offset in zip(circuit_terms, group_offsets):
+            word_values = {(): 1}
+            for group_idx, (_, group_words) in enumerate(groups):
+                word_values.update(zip(group_words, group_results[offset + group_idx]))
+
+            res = [
+                sum(coeff * word_values[word] for coeff, word in obs_terms)
+                for obs_terms in circuit_obs_terms
+            ]
+            results.append(self._asarray(res))
+
+        return results
+
+    def _compute_expvals(self, qasm_circuits, templates, ops, file_id, **kwargs):
+        """Computes the expectation values of operators for circuits using a
+        single workflow (see ``~._expvals_pipeline``).
+
+        Args:
+            qasm_circuits (list[str]): the OpenQASM 2.0 programs of the circuits
+            templates (list[tuple or None]): the template and parameter values
+                of each circuit, ``None`` for circuits without a template
+            ops (list[list[str]]): the serialized operators of each circuit
+            file_id (str): the file id to be used for naming the workflow file
+
+        Returns:
+            list[list[float]]: the expectation value of each operator for each
+            circuit
+        """
+        return self._run_pipeline(
+            self._expvals_pipeline(qasm_circuits, templates, ops, file_id, **kwargs)
+        )
+
+    def _expvals_pipeline(self, qasm_circuits, templates, ops, file_id, **kwargs):
+        """Computes the expectation values of operators for circuits using a
+        single workflow.
+
+        The cached results are looked up first, such that only the operators
+        without a cached result are computed by the workflow. Circuits with
+        the same serialization are computed once, by a single step that
+        computes the operators of every such circuit.
+
+        Args:
+            qasm_circuits (list[str]): the OpenQASM 2.0 programs of the circuits
+            templates (list[tuple or None]): the template and parameter values
+                of each circuit, ``None`` for circuits without a template
+            ops (list[list[str]]): the serialized operators of each circuit
+            file_id (str): the file id to be used for naming the workflow file
+
+        Yields:
+            dict: the prepared workflow, the results of its steps are sent back
+
+        Returns:
+            list[list[float]]: the expectation value of each operator for each
+            circuit
+        """
+        results = [[None] * len(circuit_ops) for circuit_ops in ops]
+
+        # The circuit computing each serialization, the distinct operators to
+        # compute for it and the positions of each such operator in the
+        # results
+        unique_circuits = {}
+        merged_ops = {}
+        positions = {}
+
+        for idx, (qasm_circuit, circuit_ops) in enumerate(zip(qasm_circuits, ops)):
+            for op_idx, op in enumerate(circuit_ops):
+                value = None
+                if self._cache is not None:
+                    value = self._cache.get(self._cache_key(qasm_circuit, op))
+
+                if value is not None:
+                    results[idx][op_idx] = value
+                    continue
+
+                unique_idx = unique_circuits.setdefault(qasm_circuit, idx)
+                op_positions = positions.setdefault(unique_idx, {})
+                if op not in op_positions:
+                    op_positions[op] = []
+                    merged_ops.setdefault(unique_idx, []).append(op)
+
+                op_positions[op].append((idx, op_idx))
+
+        steps = [(idx, list(range(len(merged_ops[idx])))) for idx in merged_ops]
+
+        if steps:
+            workflow_steps = self._workflow_steps(steps, qasm_circuits, templates, merged_ops)
+            workflow_steps = self._pack_steps(workflow_steps, self._circuits_per_step)
+            step_circuits = [circuit for _, circuit, _, _, _ in workflow_steps]
+            step_ops = [step_ops for _, _, step_ops, _, _ in workflow_steps]
+            step_params = [params for _, _, _, params, _ in workflow_steps]
+            circuit_lists = [circuit_list for _, _, _, _, circuit_list in workflow_steps]
+
+            step_results = yield self._prepare_workflow(
+                step_circuits,
+                step_ops,
+                file_id,
+                parameters=step_params,
+                circuit_lists=circuit_lists,
+                **kwargs,
+            )
+
+            computed = []
+            for (members, _, _, params, circuit_list), res in zip(workflow_steps, step_results):
+                # Parametric and multi-circuit steps return the results for
+                # each of their circuits
+                member_results = res if params is not None or circuit_list else [res]
+
+                for (idx, missing), circuit_res in zip(members, member_results):
+                    for op_idx, value in zip(missing, circuit_res):
+                        op = merged_ops[idx][op_idx]
+                        for res_idx, res_op_idx in positions[idx][op]:
+                            results[res_idx][res_op_idx] = value
+
+                        if self._cache is not None:
+                            computed.append((self._cache_key(qasm_circuits[idx], op), value))
+
+            if self._cache is not None:
+                self._cache.update(computed)
+
+        return results
+
+    @staticmethod
+    def _workflow_steps(steps, qasm_circuits, templates, ops):
+        """Arranges the computations of a batch into workflow steps.
+
+        Circuits sharing the same template and computing the same operators
+        are merged into a single parametric step, whose parameter table
+        contains a row for each circuit. Every other circuit is computed by a
+        regular step.
+
+        Args:
+            steps (list[tuple]): pairs of the index of a circuit and the
+                indices of the operators to compute for the circuit
+            qasm_circuits (list[str]): the OpenQASM 2.0 programs of the circuits
+            templates (list[tuple or None]): the template and parameter values
+                of each circuit, ``None`` for circuits without a template
+            ops (list[list[str]] or dict): the serialized operators of each
+                circuit
+
+        Returns:
+            list[tuple]: the circuit indices and operator indices computed by
+            the step, the circuit or template, the json string of the
+            operators and the json string of the parameter table (``None`` for
+            regular steps) of each workflow step
+        """
+        workflow_steps = []
+        groups = {}
+
+        for idx, missing in steps:
+            step_ops = json.dumps([ops[idx][i] for i in missing])
+            template = templates[idx]
+
+            if template is None:
+                workflow_steps.append(([(idx, missing)], qasm_circuits[idx], step_ops, None))
+                continue
+
+            key = (template[0], step_ops)
+            if key not in groups:
+                groups[key] = len(workflow_steps)
+                workflow_steps.append(([], template[0], step_ops, []))
+
+            members, _, _, rows = workflow_steps[groups[key]]
+            members.append((idx, missing))
+            rows.append(template[1])
+
+        for step_idx, (members, circuit, step_ops, rows) in enumerate(workflow_steps):
+            if rows is None:
+                continue
+
+            if len(rows) == 1:
+                # No need for a template with a single circuit
+                workflow_steps[step_idx] = (members, qasm_circuits[members[0][0]], step_ops, None)
+            else:
+                workflow_steps[step_idx] = (members, circuit, step_ops, json.dumps(rows))
+
+        return workflow_steps
+
+    @staticmethod
+    def _pack_steps(workflow_steps, circuits_per_step):
+        """Packs the regular steps of a workflow into steps computing several
+        circuits each.
+
+        Consecutive regular steps are packed into chunks of at most
+        ``circuits_per_step`` circuits. The circuits and the operators of a
+        packed step are passed as json lists, such that the step creates its
+        backend once for all of its circuits. Parametric steps are kept as
+        they are.
+
+        Args:
+            workflow_steps (list[tuple]): the workflow steps as returned by
+                ``~._workflow_steps``
+            circuits_per_step (int): the maximum number of circuits computed
+                by a packed step
+
+        Returns:
+            list[tuple]: the workflow steps, each extended with a boolean
+            indicating whether the step computes a list of circuits
+        """
+        packed = []
+        chunk = []
+
+        def flush():
+            if len(chunk) == 1:
+                packed.append(chunk[0] + (False,))
+            elif chunk:
+                members = [member for step in chunk for member in step[0]]
+                circuits = json.dumps([circuit for _, circuit, _, _ in chunk])
+                step_ops = json.dumps([json.loads(ops) for _, _, ops, _ in chunk])
+                packed.append((members, circuits, step_ops, None, True))
+            chunk.clear()
+
+        for step in workflow_steps:
+            if step[3] is not None or circuits_per_step <= 1:
+                flush()
+                packed.append(step + (False,))
+                continue
+
+            chunk.append(step)
+            if len(chunk) == circuits_per_step:
+                flush()
+
+        flush()
+        return packed
+
+    def _check_circuits(self, circuits):
+        """Checks that the circuits can be executed on the device.
+
+        Args:
+            circuits (list[QuantumTape]): circuits to execute on the device
+
+        Raises:
+            NotImplementedError: if a circuit returns anything but expectation
+                values
+        """
+        for circuit in circuits:
+            not_all_expval = any(obs.return_type is not Expectation for obs in circuit.observables)
+            if not_all_expval:
+                raise NotImplementedError(
+                    f"The {self.short_name} device only supports returning expectation values."
+                )
+
+            self.check_validity(circuit.operations, circuit.observables)
+
+    def _run_workflow(
+        self,
+        qasm_circuits,
+        ops,
+        file_id,
+        parameters=None,
+        shifts=None,
+        circuit_lists=None,
+        **kwargs,
+    ):
+        """Generates and submits a workflow with a step for each circuit and
+        waits for its results.
 
-            if not any(ops):
-                # All the batches only had identity observables, no workflow submission needed
-                return [self._asarray([1] * len(circuit.observables)) for circuit in circuits]
+        Args:
+            qasm_circuits (list[str]): the OpenQASM 2.0 programs of the circuits
+            ops (list[str]): json strings, each representing the list of
+                operators to compute for the corresponding circuit
+            file_id (str): the file id to be used for naming the workflow file
+            parameters (list[str or None]): json strings, each representing
+                the parameter table of a parametric step, ``None`` for regular
+                steps
+            shifts (list[str or None]): json strings, each representing the
+                parameters to differentiate and their gradient recipes for a
+                gradient step, ``None`` for other steps
+            circuit_lists (list[bool]): whether the circuit and operators of
+                each step are json lists holding several circuits
 
-            # Remove the empty lists so that those are not submitted
-            ops = [o for o in ops if o]
+        Returns:
+            list[list[float]]: the results of each step in the order of the
+            circuits
+        """
+        workflow = self._prepare_workflow(
+            qasm_circuits,
+            ops,
+            file_id,
+            parameters=parameters,
+            shifts=shifts,
+            circuit_lists=circuit_lists,
+            **kwargs,
+        )
+        return self._submit_workflow(workflow)
+
+    def _prepare_workflow(
+        self,
+        qasm_circuits,
+        ops,
+        file_id,
+        parameters=None,
+        shifts=None,
+        circuit_lists=None,
+        **kwargs,
+    ):
+        """Generates and serializes a workflow with a step for each circuit,
+        writing the workflow file if files are kept.
 
-        # Multiple steps: need to create json strings as elements of the list
-        ops = [json.dumps(o) for o in ops]
+        Args:
+            qasm_circuits (list[str]): the OpenQASM 2.0 programs of the circuits
+            ops (list[str]): json strings, each representing the list of
+                operators to compute for the corresponding circuit
+            file_id (str): the file id to be used for naming the workflow file
+            parameters (list[str or None]): json strings, each representing
+                the parameter table of a parametric step, ``None`` for regular
+                steps
+            shifts (list[str or None]): json strings, each representing the
+                parameters to differentiate and their gradient recipes for a
+                gradient step, ``None`` for other steps
+            circuit_lists (list[bool]): whether the circuit and operators of
+                each step are json lists holding several circuits
 
-        # 3-4. Create the backend specs & workflow file
+        Returns:
+            dict: the serialized workflow (``"payload"``), the path of the
+            workflow file or ``None`` (``"filepath"``), the number of steps
+            (``"steps"``), the number of circuits of the batch whose duration
+            is recorded for choosing the batch size or ``None``
+            (``"batch_circuits"``) and the trace of the execution
+            (``"trace"``)
+        """
+        trace = {"serialized": time.perf_counter()}
+        trace["started"] = getattr(self._tracing, "start", trace["serialized"])
+
+        # Create the backend specs & workflow file
         workflow = gen_expval_workflow(
             self.qe_component,
             self.backend_specs,
             qasm_circuits,
             ops,
             resources=self._resources,
+            parameters=parameters,
+            shifts=shifts,
+            circuit_lists=circuit_lists,
             **kwargs,
         )
+        trace["generated"] = time.perf_counter()
 
-        filename = f"expval-{file_id}.yaml"
-        filepath = write_workflow_file(filename, workflow)
-
-        # 5. Submit the workflow
-        workflow_id = qe_submit(filepath, keep_file=self._keep_files)
-        self._latest_id = workflow_id
+        # The serialization only contains ASCII characters
+        payload = serialize_workflow(workflow)
+        trace["payload_bytes"] = len(payload)
 
+        # Files are only written if they should be kept
+        filepath = None
         if self._keep_files:
+            filename = f"expval-{file_id}.yaml"
+            filepath = write_workflow_file(filename, payload)
             self._filenames.append(filename)
 
-        # 6. Loop until finished
-        data = loop_until_finished(workflow_id, timeout=self._timeout)
+        trace["written"] = time.perf_counter()
+        return {
+            "payload": payload,
+            "filepath": filepath,
+            "steps": len(qasm_circuits),
+            "batch_circuits": getattr(self._tracing, "batch_circuits", None),
+            "trace": trace,
+        }
 
-        # Due to parallel execution, results might have been written in any order
-        # Sort the results by the step name
-        get_step_name = lambda entry: entry[1]["stepName"]
-        data = dict(sorted(data.items(), key=get_step_name))
+    def _submit_workflow(self, workflow):
+        """Submits a workflow prepared by ``~._prepare_workflow`` and waits for
+        its results.
 
-        # There are multiple steps
-        # Obtain the results for each step
-        result_dicts = [v for k, v in data.items()]
-        results = [dct["expval"]["list"] for dct in result_dicts]
+        Args:
+            workflow (dict): the prepared workflow
 
-        results = self.insert_identity_res_batch(results, empty_obs_list, identity_indices)
-        results = [self._asarray(res) for res in results]
+        Returns:
+            list[list[float]]: the results of each step in the order of the
+            circuits
+        """
+        payload = workflow["payload"]
+        filepath = workflow["filepath"]
+        steps = workflow["steps"]
+        trace = workflow["trace"]
+
+        # Submit the workflow
+        trace["submitting"] = time.perf_counter()
+        trace["submitted_at"] = time.time()
+        if filepath is not None:
+            submit = qe_submit if self._transport is None else self._transport.submit
+            workflow_id = submit(filepath, keep_file=True)
+        else:
+            submit = qe_submit_yaml if self._transport is None else self._transport.submit_yaml
+            workflow_id = submit(payload)
+
+        trace["submitted"] = time.perf_counter()
+        self._latest_id = workflow_id
+
+        # Loop until finished
+        try:
+            results_data = self._wait_for_results(workflow_id, trace=trace)
+            results = self._step_results(results_data)
+        except Exception as e:
+            self._record_trace(workflow_id, steps, trace, error=e)
+            raise
+
+        trace["parsed"] = time.perf_counter()
+
+        record = self._record_trace(workflow_id, steps, trace)
+
+        batch_circuits = workflow["batch_circuits"]
+        if self._batch_sizer is not None and batch_circuits is not None:
+            timings = record["timings"]
+
+            # The running time is only known if the start of the run was seen
+            run = timings["run"] if timings["queue"] is not None else None
+            self._batch_sizer.record(
+                workflow_id,
+                batch_circuits,
+                timings["submit"],
+                timings["wait"],
+                queue=timings["queue"],
+                run=run,
+                steps=steps,
+            )
 
         return results
+
+    def _record_trace(self, workflow_id, steps, trace, error=None):
+        """Stores the trace of a workflow and passes it to the trace
+        callback.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+            steps (int): the number of steps of the workflow
+            trace (dict): the times at which the events of the execution
+                happened and the sizes recorded
+
+        Keyword Args:
+            error=None (Exception): the error raised while waiting for the
+                results of the workflow
+
+        Returns:
+            dict: the trace record
+        """
+
+        def span(begin, end):
+            # The first of the events marking the beginning that happened
+            begin = next((trace[event] for event in begin if event in trace), None)
+            if begin is None or end not in trace:
+                return None
+
+            return trace[end] - begin
+
+        stats = self._poll_stats.get(workflow_id, {})
+        record = {
+            "workflow_id": workflow_id,
+            "submitted_at": trace["submitted_at"],
+            "steps": steps,
+            "payload_bytes": trace["payload_bytes"],
+            "download_bytes": trace.get("download_bytes", None),
+            "polls": stats.get("polls", 0),
+            "spawns": stats.get("spawns", 0),
+            "error": None if error is None else repr(error),
+            "timings": {
+                "serialize": span(["started"], "serialized"),
+                "generate": span(["serialized"], "generated"),
+                "write": span(["generated"], "written"),
+                "pending": span(["written"], "submitting"),
+                "submit": span(["submitting"], "submitted"),
+                "queue": span(["submitted"], "running"),
+                "run": span(["running", "submitted"], "finished"),
+                "download": span(["finished"], "downloaded"),
+                "parse": span(["downloaded", "finished"], "parsed"),
+                "wait": span(["submitted"], "parsed"),
+                "total": span(["started"], "parsed"),
+            },
+        }
+
+        self._traces.append(record)
+        if self._trace_callback is not None:
+            self._trace_callback(record)
+
+        return record
+
+    @staticmethod
+    def _step_results(data):
+        """Extracts the results of each step from the workflow results.
+
+        Due to parallel execution, results might have been written in any
+        order, hence they are sorted by the index of the step that is the
+        suffix of the step name.
+
+        Args:
+            data (dict): the workflow results
+
+        Returns:
+            list[list[float]]: the results of each step
+        """
+        result_dicts = list(data.values())
+
+        if len(result_dicts) > 1:
+            get_step_idx = lambda dct: int(dct["stepName"].rsplit("-", 1)[-1])
+            result_dicts = sorted(result_dicts, key=get_step_idx)
+
+        return [dct["expval"]["list"] for dct in result_dicts]
+
+    def _cache_key(self, qasm_circuit, op):
+        """Creates the key of the cache entry for the expectation value of an
+        operator with respect to a circuit.
+
+        Args:
+            qasm_circuit (str): the OpenQASM 2.0 program of the circuit
+            op (str): the serialized operator
+
+        Returns:
+            str: the key of the cache entry
+        """
+        return ResultCache.key(self.backend_specs, qasm_circuit, op)
+
+    @staticmethod
+    def _circuit_graph(circuit):
+        """Returns the CircuitGraph of a circuit.
+
+        Args:
+            circuit (~.CircuitGraph or ~.QuantumTape): the circuit
+
+        Returns:
+            ~.CircuitGraph: the circuit graph
+        """
+        if isinstance(circuit, CircuitGraph):
+            return circuit
+
+        # QuantumTape case: need to extract the CircuitGraph
+        return circuit.graph
@@ -0,0 +1,585 @@
+"""
+This module contains the transports used for submitting workflows to
+Orquestra and querying their status and results.
+"""
+
+import abc
+import concurrent.futures
+import importlib.util
+import io
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import yaml
+
+from pennylane_orquestra import cli_actions
+from pennylane_orquestra.cli_actions import PollingSchedule
+from pennylane_orquestra.gen_workflow import step_inputs
+from pennylane_orquestra.http_session import get_session
+
+FINISHED_STATUS = "Succeeded"
+FAILED_STATUSES = {"Failed", "Error"}
+
+
+def parse_workflow_list(listing, workflow_ids):
+    """Extracts the status of the specified workflows from the listing of
+    workflows.
+
+    Lines of the listing that do not refer to any of the specified workflows
+    are ignored. The status of a workflow is the first word of its line that
+    is a known status.
+
+    Args:
+        listing (list[str]): the lines of the workflow listing
+        workflow_ids (Iterable[str]): the IDs of the workflows to look for
+
+    Returns:
+        dict: maps the workflow IDs found in the listing to their status
+    """
+    known_statuses = FAILED_STATUSES | {FINISHED_STATUS, "Pending", "Running"}
+    workflow_ids = set(workflow_ids)
+
+    statuses = {}
+    for line in listing:
+        words = line.split()
+        ids_in_line = workflow_ids.intersection(words)
+        if not ids_in_line:
+            continue
+
+        status = next((w for w in words if w in known_statuses), None)
+        if status is not None:
+            for workflow_id in ids_in_line:
+                statuses[workflow_id] = status
+
+    return statuses
+
+
+class Transport(abc.ABC):
+    """The interface used for submitting workflows and querying their status
+    and results.
+
+    Transports sharing the same ``key`` reach the same account on the same
+    platform, such that their workflows can be awaited by a single watcher.
+    """
+
+    key = None
+    """tuple: identifies the platform and the account reached by the
+    transport"""
+
+    spawns_processes = False
+    """bool: whether every submission and query spawns a process"""
+
+    @abc.abstractmethod
+    def submit(self, filepath, keep_file=False):
+        """Submits a workflow.
+
+        Args:
+            filepath (str): the path of the workflow file
+
+        Keyword Args:
+            keep_file=False (bool): whether or not to keep or delete the
+                workflow file after submission
+
+        Returns:
+            str: the ID of the workflow submitted
+
+        Raises:
+            ValueError: if the submission was not successful
+        """
+
+    def submit_yaml(self, data):
+        """Submits a workflow without writing it to the user data folder.
+
+        By default, the workflow is written to a temporary file, which is
+        submitted and removed.
+
+        Args:
+            data (str): the YAML serialization of the workflow
+
+        Returns:
+            str: the ID of the workflow submitted
+
+        Raises:
+            ValueError: if the submission was not successful
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as file:
+            file.write(data)
+
+        return self.submit(file.name)
+
+    @abc.abstractmethod
+    def statuses(self, workflow_ids):
+        """Gets the status of several workflows at once.
+
+        Args:
+            workflow_ids (Iterable[str]): the IDs of the workflows
+
+        Returns:
+            dict: maps the IDs of the workflows found to their status
+        """
+
+    @abc.abstractmethod
+    def results_location(self, workflow_id):
+        """Gets the URL of the archive holding the results of a workflow.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+
+        Returns:
+            str or None: the URL, or ``None`` if the results are not
+            available yet
+        """
+
+    @abc.abstractmethod
+    def details(self, workflow_id):
+        """Gets the details of a workflow for reporting errors.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+
+        Returns:
+            str: the details of the workflow
+        """
+
+    def download_results(self, location, trace=None):
+        """Downloads and parses the results of a workflow.
+
+        Args:
+            location (str): the URL of the archive containing the workflow
+                results
+
+        Keyword Args:
+            trace (dict): dictionary in which the time at which the results
+                were downloaded (``"downloaded"``) and their size in bytes
+                (``"download_bytes"``) are recorded
+
+        Returns:
+            dict: the workflow results
+        """
+        return cli_actions.download_results(location, trace=trace)
+
+    def wait(self, workflow_id, timeout=300, schedule=None, stats=None, trace=None):
+        """Waits for the results of a workflow by querying its status.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+
+        Keyword Args:
+            timeout (int): seconds to wait until raising a TimeoutError
+            schedule (PollingSchedule): the schedule used for sleeping
+                between queries, a default schedule is used if not specified
+            stats (dict): dictionary in which the number of queries
+                (``"polls"``) is recorded
+            trace (dict): dictionary in which the progress of the workflow is
+                recorded (see ``cli_actions.loop_until_finished``)
+
+        Returns:
+            dict: the workflow results
+        """
+        schedule = schedule or PollingSchedule()
+        stats = {} if stats is None else stats
+        stats.setdefault("polls", 0)
+
+        intervals = schedule.intervals()
+        start = time.time()
+        while True:
+            stats["polls"] += 1
+            status = self.statuses([workflow_id]).get(workflow_id, None)
+
+            if status in FAILED_STATUSES:
+                raise ValueError(
+                    "Something went wrong with executing the workflow. "
+                    f"{self.details(workflow_id)}"
+                )
+
+            if status == "Running":
+                cli_actions.trace_event(trace, "running", first=True)
+
+            if status == FINISHED_STATUS:
+                location = self.results_location(workflow_id)
+                if location is not None:
+                    cli_actions.trace_event(trace, "finished")
+                    return self.download_results(location, trace=trace)
+
+            remaining = timeout - (time.time() - start)
+            if remaining <= 0:
+                raise TimeoutError(
+                    "The workflow results for workflow "
+                    f"{workflow_id} were not obtained after {timeout/60} minutes. \n"
+                    "The timeout can be adjusted by specifying the 'timeout' "
+                    "keyword argument."
+                )
+
+            time.sleep(max(0, min(next(intervals), remaining)))
+
+
+class CLITransport(Transport):
+    """Transport using the Orquestra Quantum Engine command line interface.
+
+    Every submission and query spawns a ``qe`` process whose output is
+    parsed.
+    """
+
+    key = ("cli",)
+    spawns_processes = True
+
+    def submit(self, filepath, keep_file=False):
+        return cli_actions.qe_submit(filepath, keep_file=keep_file)
+
+    def submit_yaml(self, data):
+        return cli_actions.qe_submit_yaml(data)
+
+    def statuses(self, workflow_ids):
+        return parse_workflow_list(cli_actions.qe_list(), workflow_ids)
+
+    def results_location(self, workflow_id):
+        results = cli_actions.workflow_results(workflow_id)
+
+        try:
+            # Assume that the second line of the message contains the URL
+            return results[1].split()[1]
+        except IndexError:
+            return None
+
+    def details(self, workflow_id):
+        return "".join(cli_actions.workflow_details(workflow_id))
+
+    def wait(self, workflow_id, timeout=300, schedule=None, stats=None, trace=None):
+        return cli_actions.loop_until_finished(
+            workflow_id, timeout=timeout, schedule=schedule, stats=stats, trace=trace
+        )
+
+
+class APITransport(Transport):
+    """Transport sending requests to the Orquestra workflow API over a
+    persistent connection and receiving structured responses.
+
+    The API is expected to provide the following endpoints, each answering
+    with a JSON object:
+
+    * ``POST /workflows`` submits the workflow in the YAML body of the
+      request and responds with its ID (``{"id": ...}``),
+    * ``GET /workflows?ids=<id>,<id>`` responds with the status of each
+      workflow (``{"workflows": [{"id": ..., "status": ...}]}``),
+    * ``GET /workflows/<id>`` responds with the status of a workflow and the
+      URL of its results once available
+      (``{"id": ..., "status": ..., "result": ...}``).
+
+    Error responses hold a message in their ``"error"`` field.
+
+    Args:
+        url (str): the base URL of the API
+
+    Keyword Args:
+        token=None (str): the token sent for authorization
+        session=None (HTTPSession): the HTTP session used for the requests,
+            the session shared by the process is used if not specified
+    """
+
+    def __init__(self, url, token=None, session=None):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.session = session or get_session()
+        self.key = ("api", self.url, token)
+
+    def submit(self, filepath, keep_file=False):
+        with open(filepath) as file:
+            workflow_id = self.submit_yaml(file.read())
+
+        if not keep_file:
+            os.remove(filepath)
+
+        return workflow_id
+
+    def submit_yaml(self, data):
+        body = data.encode("utf-8")
+        response = self._call("POST", "/workflows", body=body, content_type="application/x-yaml")
+
+        try:
+            return response["id"]
+        except KeyError as e:
+            raise ValueError("Received an unexpected response after submitting workflow.") from e
+
+    def statuses(self, workflow_ids):
+        ids = ",".join(urllib.parse.quote(str(workflow_id)) for workflow_id in workflow_ids)
+        response = self._call("GET", f"/workflows?ids={ids}")
+        return {wf["id"]: wf["status"] for wf in response.get("workflows", [])}
+
+    def results_location(self, workflow_id):
+        return self._call("GET", f"/workflows/{urllib.parse.quote(workflow_id)}").get("result")
+
+    def download_results(self, location, trace=None):
+        data = self.session.get(location)
+        cli_actions.trace_event(trace, "downloaded")
+
+        if trace is not None:
+            trace["download_bytes"] = len(data)
+
+        return cli_actions.parse_results_archive(io.BytesIO(data))
+
+    def details(self, workflow_id):
+        return json.dumps(self._call("GET", f"/workflows/{urllib.parse.quote(workflow_id)}"))
+
+    def _call(self, method, path, body=None, content_type=None):
+        """Sends a request to the API.
+
+        Args:
+            method (str): the HTTP method
+            path (str): the path of the endpoint
+
+        Keyword Args:
+            body=None (bytes): the body of the request
+            content_type=None (str): the content type of the body
+
+        Returns:
+            dict: the response parsed from JSON
+
+        Raises:
+            ValueError: if the API responded with an error
+        """
+        headers = {"Accept": "application/json"}
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        if self.token is not None:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        status, _, data = self.session.request(method, self.url + path, body=body, headers=headers)
+
+        try:
+            response = json.loads(data) if data else {}
+        except ValueError:
+            response = {"error": data.decode("utf-8", errors="replace")}
+
+        if status >= 400:
+            raise ValueError(
+                f"The Orquestra API responded with status {status}: "
+                f"{response.get('error', response)}"
+            )
+
+        return response
+
+
+def default_steps_file():
+    """Locates the file defining the workflow step functions.
+
+    Returns:
+        str: the path of the ``steps/expval.py`` file
+
+    Raises:
+        FileNotFoundError: if the file could not be found
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for directory in (package_dir, os.path.dirname(package_dir)):
+        path = os.path.join(directory, "steps", "expval.py")
+        if os.path.isfile(path):
+            return path
+
+    raise FileNotFoundError("The file defining the workflow steps could not be found.")
+
+
+_step_modules = {}
+
+
+def run_step(steps_file, function, inputs):
+    """Runs a workflow step in the current process.
+
+    The list of results that the step function would save to a file is
+    returned instead.
+
+    Args:
+        steps_file (str): the path of the file defining the step functions
+        function (str): the name of the step function
+        inputs (dict): the inputs of the step passed as keyword arguments
+
+    Returns:
+        list: the results of the step
+    """
+    module = _step_modules.get(steps_file, None)
+    if module is None:
+        spec = importlib.util.spec_from_file_location("pennylane_orquestra_steps", steps_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _step_modules[steps_file] = module
+
+    saved = []
+    module.save_list = lambda array, filename: saved.append(array)
+    getattr(module, function)(**inputs)
+
+    return saved[-1]
+
+
+def _step_failed(future):
+    """Checks if the future of a step run by the local transport failed or
+    was cancelled.
+
+    Args:
+        future (concurrent.futures.Future): the future of the step
+
+    Returns:
+        bool: whether the step failed
+    """
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class LocalTransport(Transport):
+    """Transport running the steps of the workflows in a local process pool
+    instead of submitting them to Orquestra.
+
+    Each step runs the same function from ``steps/expval.py`` with the same
+    inputs as it would on a remote Orquestra node, such that the results have
+    the same shape as the results of remote workflows. Running the steps
+    requires the packages used by the step functions to be installed locally.
+
+    Keyword Args:
+        max_workers=None (int): the maximum number of processes running steps
+            at the same time, by default the number of processors
+        steps_file=None (str): the path of the file defining the step
+            functions, by default the ``steps/expval.py`` file of the plugin
+    """
+
+    def __init__(self, max_workers=None, steps_file=None):
+        # The workflow IDs are only known to the transport that created them
+        self.key = ("local", id(self))
+        self.max_workers = max_workers
+        self.steps_file = steps_file or default_steps_file()
+        self._executor = None
+        self._workflows = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def submit(self, filepath, keep_file=False):
+        with open(filepath) as file:
+            workflow_id = self.submit_yaml(file.read())
+
+        if not keep_file:
+            os.remove(filepath)
+
+        return workflow_id
+
+    def submit_yaml(self, data):
+        workflow = yaml.load(data, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+
+            workflow_id = f"local-{next(self._ids)}"
+            self._workflows[workflow_id] = {
+                step["name"]: self._executor.submit(
+                    run_step,
+                    self.steps_file,
+                    step["config"]["runtime"]["parameters"]["function"],
+                    step_inputs(step),
+                )
+                for step in workflow["steps"]
+            }
+
+        return workflow_id
+
+    def statuses(self, workflow_ids):
+        statuses = {}
+        for workflow_id in workflow_ids:
+            steps = self._workflows.get(workflow_id, None)
+            if steps is None:
+                continue
+
+            if any(_step_failed(f) for f in steps.values()):
+                statuses[workflow_id] = "Failed"
+            elif all(f.done() for f in steps.values()):
+                statuses[workflow_id] = FINISHED_STATUS
+            else:
+                statuses[workflow_id] = "Running"
+
+        return statuses
+
+    def results_location(self, workflow_id):
+        return f"local://{workflow_id}"
+
+    def download_results(self, location, trace=None):
+        workflow_id = location[len("local://") :]
+        with self._lock:
+            steps = self._workflows.pop(workflow_id)
+
+        cli_actions.trace_event(trace, "downloaded")
+        return {
+            name: {"stepName": name, "expval": {"list": future.result()}}
+            for name, future in steps.items()
+        }
+
+    def details(self, workflow_id):
+        steps = self._workflows.get(workflow_id, {})
+        errors = [
+            f"{name}: {'cancelled' if future.cancelled() else repr(future.exception())}"
+            for name, future in steps.items()
+            if _step_failed(future)
+        ]
+        return "\n".join(errors)
+
+    def wait(self, workflow_id, timeout=300, schedule=None, stats=None, trace=None):
+        stats = {} if stats is None else stats
+        stats["polls"] = stats.get("polls", 0) + 1
+
+        steps = self._workflows[workflow_id]
+        _, not_done = concurrent.futures.wait(
+            steps.values(), timeout=timeout, return_when=concurrent.futures.FIRST_EXCEPTION
+        )
+
+        if self.statuses([workflow_id])[workflow_id] == "Failed":
+            details = self.details(workflow_id)
+            self._discard(workflow_id)
+            raise ValueError(f"Something went wrong with executing the workflow. {details}")
+
+        if not_done:
+            self._discard(workflow_id)
+            raise TimeoutError(
+                "The workflow results for workflow "
+                f"{workflow_id} were not obtained after {timeout/60} minutes. \n"
+                "The timeout can be adjusted by specifying the 'timeout' "
+                "keyword argument."
+            )
+
+        cli_actions.trace_event(trace, "finished")
+        return self.download_results(self.results_location(workflow_id), trace=trace)
+
+    def _discard(self, workflow_id):
+        """Forgets a workflow that is not waited for anymore, its steps that
+        did not start yet are cancelled."""
+        with self._lock:
+            steps = self._workflows.pop(workflow_id, {})
+
+        for future in steps.values():
+            future.cancel()
+
+    def close(self):
+        """Shuts down the process pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown()
+
+
+def create_transport(transport, **options):
+    """Creates the transport used by a device.
+
+    Args:
+        transport (str or Transport): the name of the transport (``"cli"``,
+            ``"api"`` or ``"local"``), or a transport to use as is
+        **options: keyword arguments passed to the transport created
+
+    Returns:
+        Transport: the transport
+    """
+    if isinstance(transport, Transport):
+        return transport
+
+    transports = {"cli": CLITransport, "api": APITransport, "local": LocalTransport}
+    if transport not in transports:
+        raise ValueError(f"Unknown transport {transport}, expected one of {', '.join(transports)}.")
+
+    return transports[transport](**options)
@@ -17,6 +17,11 @@ The original implementation of the ``_process_wires`` and
 ``_terms_to_qubit_operator`` functions is a part of the PennyLane-QChem
 library.
 """
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
 from pennylane.wires import Wires
 
 
@@ -116,7 +121,7 @@ def _process_wires(wires, n_wires=None):
     return wires
 
 
-def _terms_to_qubit_operator_string(coeffs, ops, wires=None):
+def _terms_to_qubit_operator_string(coeffs, ops, wires=None, wire_index=None):
     r"""Converts a 2-tuple of complex coefficients and PennyLane operations to
     a string representation of OpenFermion ``QubitOperator``.
 
@@ -135,6 +140,9 @@ def _terms_to_qubit_operator_string(coeffs, ops, wires=None):
             corresponding to the qubit number equal to its index.
             For type dict, only consecutive-int-valued dict (for wire-to-qubit conversion) is
             accepted. If None, will map sorted wires from all `ops` to consecutive int.
+        wire_index (dict): Precomputed mapping from each wire label to its qubit number,
+            which is used instead of `wires` when given. Callers serializing many
+            observables on the same wires should build it once and pass it.
 
     Returns:
         str: the string representation for an instance of ``openfermion.QubitOperator``.
@@ -150,16 +158,18 @@ def _terms_to_qubit_operator_string(coeffs, ops, wires=None):
     0.1 [X0] +
     0.2 [Y0 Z2]
     """
-    all_wires = Wires.all_wires([op.wires for op in ops], sort=True)
-
-    if wires is not None:
+    if wires is not None and wire_index is None:
         qubit_indexed_wires = _process_wires(
             wires,
         )
-        if not set(all_wires).issubset(set(qubit_indexed_wires)):
+        wire_index = {wire: idx for idx, wire in enumerate(qubit_indexed_wires.labels)}
+
+    if wire_index is not None:
+        if any(wire not in wire_index for op in ops for wire in op.wires.labels):
             raise ValueError("Supplied `wires` does not cover all wires defined in `ops`.")
     else:
-        qubit_indexed_wires = all_wires
+        all_wires = Wires.all_wires([op.wires for op in ops], sort=True)
+        wire_index = {wire: idx for idx, wire in enumerate(all_wires.labels)}
 
     q_op = []
     for coeff, op in zip(coeffs, ops):
@@ -180,8 +190,8 @@ def _terms_to_qubit_operator_string(coeffs, ops, wires=None):
         else:
             term_str = " ".join(
                 [
-                    "{}{}".format(pauli, qubit_indexed_wires.index(wire))
-                    for pauli, wire in zip(pauli_names, op.wires)
+                    "{}{}".format(pauli, wire_index[wire])
+                    for pauli, wire in zip(pauli_names, op.wires.labels)
                     if pauli != "Identity"
                 ]
             )
@@ -193,3 +203,260 @@ def _terms_to_qubit_operator_string(coeffs, ops, wires=None):
     # Remove the last ' + ' element
     q_op.pop()
     return "".join(q_op)
+
+
+class LRUCache:
+    """A bounded in-memory mapping that discards the least recently used
+    entries once it is full.
+
+    The number of lookups that found (``hits``) and did not find
+    (``misses``) an entry are recorded. The cache may be shared by several
+    threads.
+
+    Args:
+        maxsize (int): the maximum number of entries stored, caching is
+            disabled if it is ``0``
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Gets the value stored for a key and marks the entry as the most
+        recently used one.
+
+        Args:
+            key (Hashable): the key of the entry
+
+        Returns:
+            object: the value stored or ``None`` if there is no entry for the
+            key
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Stores a value, evicting the least recently used entry if the cache
+        is full.
+
+        Args:
+            key (Hashable): the key of the entry
+            value (object): the value to store
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Returns the statistics of the cache.
+
+        Returns:
+            dict: the number of hits, misses, entries stored and the maximum
+            number of entries
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+def _fingerprint(value):
+    """Creates a hashable representation of a value that is used as a part
+    of a cache key.
+
+    Arrays are represented by their shape, data type and raw bytes. Other
+    values are represented by their type and string representation, as
+    serializers format them using ``str``.
+
+    Args:
+        value (object): the value, e.g., a gate parameter
+
+    Returns:
+        tuple: the hashable representation of the value
+    """
+    if isinstance(value, np.ndarray):
+        return ("array", value.shape, value.dtype.str, value.tobytes())
+
+    if isinstance(value, (list, tuple)):
+        return ("sequence",) + tuple(_fingerprint(v) for v in value)
+
+    return (type(value).__qualname__, str(value))
+
+
+def _bind_parameters(template, row):
+    """Substitutes the placeholders ``{p0}``, ``{p1}``, etc. of an OpenQASM
+    2.0 template by parameter values.
+
+    Args:
+        template (str): the OpenQASM 2.0 template
+        row (list[float]): the value of each parameter
+
+    Returns:
+        str: the OpenQASM 2.0 program
+    """
+    return re.sub(r"\{p(\d+)\}", lambda match: str(row[int(match.group(1))]), template)
+
+
+def _qwc_groups(words):
+    """Greedily partitions words into groups of qubit-wise commuting words.
+
+    Two words commute qubit-wise if they measure the same single-qubit
+    observable on every wire that they share. Longer words are placed first
+    and each word joins the first group it commutes with. Repeated words are
+    only placed once.
+
+    **Example**
+
+    >>> words = [((0, "PauliZ"),), ((0, "PauliX"),), ((0, "PauliZ"), (1, "PauliZ"))]
+    >>> _qwc_groups(words)
+    [({0: 'PauliZ', 1: 'PauliZ'}, [((0, 'PauliZ'), (1, 'PauliZ')), ((0, 'PauliZ'),)]),
+     ({0: 'PauliX'}, [((0, 'PauliX'),)])]
+
+    Args:
+        words (Iterable[tuple]): the words, each a tuple of pairs of a wire
+            label and the name of the observable measured on the wire
+
+    Returns:
+        list[tuple[dict, list[tuple]]]: the measurement basis of each group,
+        mapping wire labels to the observable measured, and the words of the
+        group
+    """
+    groups = []
+
+    unique_words = list(dict.fromkeys(words))
+    for word in sorted(unique_words, key=len, reverse=True):
+        for basis, group_words in groups:
+            if all(basis.get(wire, name) == name for wire, name in word):
+                basis.update(word)
+                group_words.append(word)
+                break
+        else:
+            groups.append((dict(word), [word]))
+
+    return groups
+
+
+def _pauli_decomposition(matrix, tol=1e-8):
+    r"""Decomposes a Hermitian matrix into a linear combination of Pauli
+    words.
+
+    The coefficient of the Pauli word :math:`P` is
+    :math:`\mathrm{Tr}(PH)/2^n`. A Pauli word maps the basis state
+    :math:`|k\rangle` to :math:`i^{n_Y} (-1)^{|k \wedge z|} |k \oplus x\rangle`,
+    where :math:`x` and :math:`z` are the masks of the qubits acted on by
+    :math:`X` or :math:`Y` and by :math:`Z` or :math:`Y`, respectively. Hence
+    :math:`\mathrm{Tr}(PH) = i^{n_Y} \sum_k (-1)^{|k \wedge z|} H_{k, k \oplus
+    x}`, and the traces for every :math:`z` mask are obtained at once by a fast
+    Walsh-Hadamard transform of the entries :math:`H_{k, k \oplus x}`. This
+    takes :math:`O(n 4^n)` operations instead of the :math:`O(8^n)` operations
+    of computing the trace of each Pauli word separately.
+
+    The words are returned in the order used by
+    ``pennylane.utils.decompose_hamiltonian``: the first qubit corresponds to
+    the first factor of the Kronecker product and the words are sorted
+    lexicographically with ``I < X < Y < Z``.
+
+    **Example**
+
+    >>> _pauli_decomposition(np.array([[1, 1], [1, -1]]) / np.sqrt(2))
+    ([0.7071067811865475, 0.7071067811865475], ['X', 'Z'])
+
+    Args:
+        matrix (array[complex]): a Hermitian matrix of dimension
+            :math:`2^n\times 2^n`
+        tol (float): the coefficients whose absolute value does not exceed
+            ``tol`` are dropped
+
+    Returns:
+        tuple[list[float], list[str]]: the coefficient of each term and its
+        Pauli word, a string containing one of ``"I"``, ``"X"``, ``"Y"`` and
+        ``"Z"`` for each qubit
+
+    Raises:
+        ValueError: if the matrix does not have the shape ``(2**n, 2**n)`` for
+            a positive ``n`` or is not Hermitian
+    """
+    matrix = np.asarray(matrix)
+    num_qubits = int(np.log2(len(matrix))) if len(matrix) else 0
+    dim = 2 ** num_qubits
+
+    if num_qubits < 1 or matrix.shape != (dim, dim):
+        raise ValueError(
+            "The Hamiltonian should have shape (2**n, 2**n), for any qubit number n>=1"
+        )
+
+    if not np.allclose(matrix, matrix.conj().T):
+        raise ValueError("The Hamiltonian is not Hermitian")
+
+    # traces[x, k] = H[k, k ^ x] before the transform
+    indices = np.arange(dim)
+    traces = matrix[indices[np.newaxis, :], indices[np.newaxis, :] ^ indices[:, np.newaxis]]
+    traces = traces.astype(complex)
+
+    # Fast Walsh-Hadamard transform over the bits of k: traces[x, z] becomes
+    # the sum of (-1)^|k & z| H[k, k ^ x] over k
+    for bit in range(num_qubits):
+        step = 2 ** bit
+        blocks = traces.reshape(dim, dim // (2 * step), 2, step)
+        low = blocks[:, :, 0, :].copy()
+        high = blocks[:, :, 1, :]
+        blocks[:, :, 0, :] += high
+        blocks[:, :, 1, :] = low - high
+
+    # The masks of each Pauli word in lexicographic order, where the first
+    # qubit is the most significant bit of the matrix indices
+    terms = np.arange(4 ** num_qubits)
+    x_masks = np.zeros_like(terms)
+    z_masks = np.zeros_like(terms)
+    for qubit in range(num_qubits):
+        digits = (terms >> (2 * (num_qubits - 1 - qubit))) & 3
+        bit = 1 << (num_qubits - 1 - qubit)
+        x_masks |= np.where((digits == 1) | (digits == 2), bit, 0)
+        z_masks |= np.where(digits >= 2, bit, 0)
+
+    num_y = np.zeros_like(terms)
+    y_masks = x_masks & z_masks
+    for qubit in range(num_qubits):
+        num_y += (y_masks >> qubit) & 1
+
+    coeffs = traces[x_masks, z_masks] * (1j ** num_y) / dim
+    coeffs = np.real(coeffs)
+
+    keep = np.flatnonzero(np.abs(coeffs) > tol)
+    letters = "IXYZ"
+    words = [
+        "".join(
+            letters[(term >> (2 * (num_qubits - 1 - qubit))) & 3] for qubit in range(num_qubits)
+        )
+        for term in keep
+    ]
+
+    return coeffs[keep].tolist(), words
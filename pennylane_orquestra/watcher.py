@@ -0,0 +1,248 @@
+"""
+This module contains the workflow watcher that waits for the results of
+several Orquestra workflows using a single polling loop.
+"""
+import threading
+import time
+import urllib.error
+from concurrent.futures import Future
+
+from pennylane_orquestra import cli_actions
+from pennylane_orquestra.cli_actions import PollingSchedule
+from pennylane_orquestra.transport import FAILED_STATUSES, FINISHED_STATUS, CLITransport
+
+MAX_STATUS_ERRORS = 3
+"""int: the number of consecutive sweeps failing to query the statuses of the
+workflows after which the outstanding workflows are failed"""
+
+
+class WorkflowWatcher:
+    """Waits for the results of many workflows using a single background
+    polling loop.
+
+    Each sweep of the loop checks the status of every outstanding workflow
+    with a single query (e.g., a ``qe list workflow`` CLI call when using the
+    CLI transport). The results of a workflow are only queried once its
+    status shows that it succeeded. Therefore, the number of queries made
+    while waiting does not grow with the number of outstanding workflows.
+
+    The background thread is started when a workflow is watched and stops
+    once there are no outstanding workflows left. If querying the statuses
+    fails, the workflows are kept waiting for the next sweep, unless the
+    queries of ``MAX_STATUS_ERRORS`` consecutive sweeps failed.
+
+    Keyword Args:
+        schedule (PollingSchedule): the schedule used for sleeping between
+            sweeps, a default schedule is used if not specified
+        transport (Transport): the transport used for the queries, the CLI
+            is used if not specified
+    """
+
+    def __init__(self, schedule=None, transport=None):
+        self._schedule = schedule or PollingSchedule()
+        self._transport = transport or CLITransport()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._status_errors = 0
+        self.sweeps = 0
+        self.spawns = 0
+
+    @property
+    def pending(self):
+        """The IDs of the outstanding workflows.
+
+        Returns:
+            list[str]: the workflow IDs
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def watch(self, workflow_id, callback=None, stats=None, trace=None):
+        """Starts watching a workflow.
+
+        Args:
+            workflow_id (str): the ID of the workflow to wait for
+
+        Keyword Args:
+            callback (callable): function called with the future of the
+                workflow once it is completed
+            stats (dict): dictionary in which the number of sweeps the
+                workflow took part in (``"polls"``) and the number of CLI calls
+                made solely for it (``"spawns"``) are recorded
+            trace (dict): dictionary in which the progress of the workflow is
+                recorded (see ``cli_actions.loop_until_finished``)
+
+        Returns:
+            concurrent.futures.Future: the future holding the results of the
+            workflow
+        """
+        if stats is not None:
+            stats.setdefault("polls", 0)
+            stats.setdefault("spawns", 0)
+
+        with self._lock:
+            if workflow_id in self._pending:
+                future = self._pending[workflow_id][0]
+            else:
+                future = Future()
+                self._pending[workflow_id] = (future, stats, trace)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        return future
+
+    def unwatch(self, workflow_id):
+        """Stops watching a workflow, its future is cancelled.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+        """
+        with self._lock:
+            entry = self._pending.pop(workflow_id, None)
+
+        if entry is not None:
+            entry[0].cancel()
+
+    def sweep(self):
+        """Checks the status of every outstanding workflow at once and
+        completes the futures of the workflows that finished."""
+        with self._lock:
+            pending = dict(self._pending)
+
+        if not pending:
+            return
+
+        self.sweeps += 1
+        self.spawns += int(self._transport.spawns_processes)
+        try:
+            statuses = self._transport.statuses(pending)
+        except Exception as e:  # pylint: disable=broad-except
+            # A transient error only fails the workflows if it persists
+            self._status_errors += 1
+            if self._status_errors >= MAX_STATUS_ERRORS:
+                self._status_errors = 0
+                for workflow_id in pending:
+                    self._complete(workflow_id, exception=e)
+            return
+
+        self._status_errors = 0
+
+        for workflow_id, (_, stats, trace) in pending.items():
+            if stats is not None:
+                stats["polls"] += 1
+
+            status = statuses.get(workflow_id, None)
+            if status == "Running":
+                cli_actions.trace_event(trace, "running", first=True)
+
+            if status in FAILED_STATUSES:
+                try:
+                    details = self._transport.details(workflow_id)
+                    self._count_spawn(stats)
+                except Exception as e:  # pylint: disable=broad-except
+                    self._complete(workflow_id, exception=e)
+                    continue
+
+                msg = f"Something went wrong with executing the workflow. {details}"
+                self._complete(workflow_id, exception=ValueError(msg))
+
+            elif status == FINISHED_STATUS:
+                try:
+                    location = self._transport.results_location(workflow_id)
+                    self._count_spawn(stats)
+
+                    if location is None:
+                        # The results were not uploaded yet
+                        continue
+
+                    cli_actions.trace_event(trace, "finished")
+                    data = self._transport.download_results(location, trace=trace)
+                except urllib.error.URLError:
+                    # The results were not uploaded yet
+                    continue
+                except Exception as e:  # pylint: disable=broad-except
+                    self._complete(workflow_id, exception=e)
+                    continue
+
+                self._complete(workflow_id, result=data)
+
+    def _count_spawn(self, stats):
+        """Records a CLI call made for a single workflow."""
+        if not self._transport.spawns_processes:
+            return
+
+        self.spawns += 1
+        if stats is not None:
+            stats["spawns"] += 1
+
+    def _complete(self, workflow_id, result=None, exception=None):
+        """Completes the future of a workflow and stops watching it."""
+        with self._lock:
+            entry = self._pending.pop(workflow_id, None)
+
+        if entry is None or not entry[0].set_running_or_notify_cancel():
+            # The workflow was unwatched in the meantime
+            return
+
+        if exception is not None:
+            entry[0].set_exception(exception)
+        else:
+            entry[0].set_result(result)
+
+    def _run(self):
+        """The polling loop run by the background thread."""
+        intervals = self._schedule.intervals()
+        try:
+            while True:
+                time.sleep(next(intervals))
+
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+
+                self.sweep()
+        except Exception as e:  # pylint: disable=broad-except
+            # An unexpected error stops the loop, so the outstanding
+            # workflows are failed instead of being left waiting
+            with self._lock:
+                self._thread = None
+                pending = list(self._pending)
+
+            for workflow_id in pending:
+                self._complete(workflow_id, exception=e)
+
+
+_watchers = {}
+_watcher_lock = threading.Lock()
+
+
+def get_watcher(transport=None, schedule=None):
+    """Returns the workflow watcher shared by the whole process for a
+    transport and a polling schedule.
+
+    Keyword Args:
+        transport (Transport): the transport used by the watcher, the CLI is
+            used if not specified
+        schedule (PollingSchedule): the schedule used by the watcher for
+            sleeping between sweeps, a default schedule is used if not
+            specified
+
+    Returns:
+        WorkflowWatcher: the shared watcher
+    """
+    transport = transport or CLITransport()
+    schedule = schedule or PollingSchedule()
+    key = (transport.key, schedule.key)
+
+    with _watcher_lock:
+        if key not in _watchers:
+            _watchers[key] = WorkflowWatcher(schedule=schedule, transport=transport)
+
+        return _watchers[key]
@@ -6,6 +6,7 @@ Functions defined in this file may be included in an Orquestra workflow file as
 a workflow step. Such workflow steps are executed on a remote Orquestra node.
 """
 import json
+import re
 
 import numpy as np
 from openfermion import IsingOperator, QubitOperator
@@ -45,20 +46,242 @@ def run_circuit_and_get_expval(
 
     backend = create_object(backend_specs)
 
-    # 1. Parse circuit
-    qc = QuantumCircuit.from_qasm_str(circuit)
+    # 1. Create operators
+    ops = _create_operators(backend, operators)
+
+    # 2. Parse circuit
+    circuit = _prepare_circuit(circuit, ops)
+
+    # 3. Expval
+    results = _get_expval(backend, circuit, ops)
+
+    save_list(results, "expval.json")
+
+
+def run_circuits_and_get_expval(
+    backend_specs: dict,
+    circuits: str,
+    operators: str,
+):
+    """Takes several circuits to obtain the expectation value of operators for
+    each of them on a given backend.
+
+    The backend is created once and used for every circuit, such that the cost
+    of starting a step is shared by all the circuits it computes.
+
+    Args:
+        backend_specs (dict): the parsed Orquestra backend specifications
+        circuits (str): the json list of circuits, each represented as an
+            OpenQASM 2.0 program
+        operators (str): the json list of the operators to compute for each
+            circuit, each operator in an ``openfermion.QubitOperator`` or
+            ``openfermion.IsingOperator`` representation
+    """
+    backend_specs = json.loads(backend_specs)
+    circuits = json.loads(circuits)
+    operators = json.loads(operators)
+
+    backend = create_object(backend_specs)
+
+    results = []
+    for circuit, circuit_operators in zip(circuits, operators):
+        ops = _create_operators(backend, circuit_operators)
+        results.append(_get_expval(backend, _prepare_circuit(circuit, ops), ops))
+
+    save_list(results, "expval.json")
+
+
+def run_circuit_template_and_get_expval(
+    backend_specs: dict,
+    circuit: str,
+    parameters: str,
+    operators: str,
+):
+    """Binds each row of a parameter table to a circuit template to obtain the
+    expectation value of operators for each parametrized circuit on a given
+    backend.
+
+    The circuit template is an OpenQASM 2.0 program where gate parameters are
+    replaced by the placeholders ``{p0}``, ``{p1}``, etc. The ``k``-th
+    placeholder is substituted by the ``k``-th value of a row. The same
+    operators are computed for each row.
+
+    Args:
+        backend_specs (dict): the parsed Orquestra backend specifications
+        circuit (str): the circuit template represented as an OpenQASM 2.0
+            program with placeholders
+        parameters (str): the json list of rows, each a list of the parameter
+            values of a circuit
+        operators (str): the operator in an ``openfermion.QubitOperator``
+            or ``openfermion.IsingOperator`` representation
+    """
+    backend_specs = json.loads(backend_specs)
+    parameters = json.loads(parameters)
+    operators = json.loads(operators)
+
+    backend = create_object(backend_specs)
+    ops = _create_operators(backend, operators)
+
+    results = []
+    for row in parameters:
+        qasm_circuit = _bind_parameters(circuit, row)
+        results.append(_get_expval(backend, _prepare_circuit(qasm_circuit, ops), ops))
+
+    save_list(results, "expval.json")
+
+
+def run_circuit_template_and_get_gradient(
+    backend_specs: dict,
+    circuit: str,
+    parameters: str,
+    shifts: str,
+    operators: str,
+):
+    """Computes the gradient of the expectation value of operators with
+    respect to the parameters of a circuit template using the
+    parameter-shift rule on a given backend.
+
+    Every shifted circuit is generated by binding shifted parameter values to
+    the circuit template. For a parameter with the value :math:`p` and the
+    gradient recipe :math:`\\{(c_i, a_i, s_i)\\}`, the derivative of the
+    expectation value :math:`f` is :math:`\\sum_i c_i f(a_i p + s_i)`.
+
+    Args:
+        backend_specs (dict): the parsed Orquestra backend specifications
+        circuit (str): the circuit template represented as an OpenQASM 2.0
+            program with placeholders
+        parameters (str): the json list of the parameter values of the circuit
+        shifts (str): the json list of the parameters to differentiate, each
+            given as the index of the parameter and its gradient recipe, a
+            list of ``[coefficient, multiplier, shift]`` terms
+        operators (str): the operator in an ``openfermion.QubitOperator``
+            or ``openfermion.IsingOperator`` representation
+    """
+    backend_specs = json.loads(backend_specs)
+    parameters = json.loads(parameters)
+    shifts = json.loads(shifts)
+    operators = json.loads(operators)
+
+    backend = create_object(backend_specs)
+    ops = _create_operators(backend, operators)
+
+    results = []
+    for param_idx, recipe in shifts:
+        gradient = np.zeros(len(ops))
+
+        for coeff, multiplier, shift in recipe:
+            row = list(parameters)
+            row[param_idx] = multiplier * row[param_idx] + shift
+
+            qasm_circuit = _bind_parameters(circuit, row)
+            expvals = _get_expval(backend, _prepare_circuit(qasm_circuit, ops), ops)
+            gradient += coeff * np.array(expvals, dtype=float)
+
+        results.append(gradient.tolist())
+
+    save_list(results, "expval.json")
+
+
+def _bind_parameters(template, row):
+    """Substitutes the placeholders of a circuit template by parameter values.
+
+    Args:
+        template (str): OpenQASM 2.0 program with placeholders
+        row (list[float]): the value of each parameter
+
+    Returns:
+        str: the OpenQASM 2.0 program
+    """
+    return re.sub(r"\{p(\d+)\}", lambda match: str(row[int(match.group(1))]), template)
+
+
+def _create_operators(backend, operators):
+    """Creates the OpenFermion operators matching the computation mode of the
+    backend.
+
+    Operators may also be given as the json string of their compact encoding
+    (see ``_decode_operator``).
+
+    Args:
+        backend (QuantumBackend): the Orquestra quantum backend to use
+        operators (list[str]): the operators in an ``openfermion.QubitOperator``
+            or ``openfermion.IsingOperator`` representation
+
+    Returns:
+        list: the operators as ``openfermion.QubitOperator`` or
+        ``openfermion.IsingOperator`` objects
+    """
+    if backend.n_samples is not None:
+        # Operator for Backend/Simulator in sampling mode
+        operator_class = IsingOperator
+    else:
+        # Operator for Simulator exact mode
+        operator_class = QubitOperator
 
-    # 2. Create operators
     ops = []
     for op in operators:
-        if backend.n_samples is not None:
-            # Operator for Backend/Simulator in sampling mode
-            ops.append(IsingOperator(op))
+        if op.startswith("{"):
+            ops.append(_decode_operator(json.loads(op), operator_class))
         else:
-            # Operator for Simulator exact mode
-            ops.append(QubitOperator(op))
+            ops.append(operator_class(op))
+
+    return ops
+
+
+def _decode_operator(encoding, operator_class):
+    """Creates an operator from its compact encoding without parsing an
+    operator string.
+
+    The encoding contains the coefficient and a pair of bitmasks for each
+    term: bit ``i`` of the X mask is set if the term acts on qubit ``i`` with
+    :math:`X` or :math:`Y` and bit ``i`` of the Z mask is set if it acts with
+    :math:`Z` or :math:`Y`. Repeated terms are summed.
+
+    Args:
+        encoding (dict): the coefficients (``"coeffs"``), the X masks (``"x"``)
+            and the Z masks (``"z"``) of the terms
+        operator_class (type): ``openfermion.QubitOperator`` or
+            ``openfermion.IsingOperator``
+
+    Returns:
+        openfermion.QubitOperator or openfermion.IsingOperator: the operator
+
+    Raises:
+        ValueError: if an ``openfermion.IsingOperator`` is requested for terms
+            that act with :math:`X` or :math:`Y`
+    """
+    paulis = {(1, 0): "X", (1, 1): "Y", (0, 1): "Z"}
+    operator = operator_class()
+
+    for coeff, x_mask, z_mask in zip(encoding["coeffs"], encoding["x"], encoding["z"]):
+        if x_mask and operator_class is IsingOperator:
+            raise ValueError("Only terms acting with Z may be measured in sampling mode.")
+
+        term = []
+        for qubit in range((x_mask | z_mask).bit_length()):
+            bits = ((x_mask >> qubit) & 1, (z_mask >> qubit) & 1)
+            if bits != (0, 0):
+                term.append((qubit, paulis[bits]))
+
+        term = tuple(term)
+        operator.terms[term] = operator.terms.get(term, 0) + coeff
+
+    return operator
+
+
+def _prepare_circuit(circuit, ops):
+    """Parses a circuit and activates the qubits measured by the operators.
+
+    Args:
+        circuit (str): the circuit represented as an OpenQASM 2.0 program
+        ops (list): the operators as ``openfermion.QubitOperator`` or
+            ``openfermion.IsingOperator`` objects
+
+    Returns:
+        zquantum.core.circuit.Circuit: the circuit to run
+    """
+    qc = QuantumCircuit.from_qasm_str(circuit)
 
-    # 2.+1
     # Activate the qubits that are measured but were not acted on
     # By applying the identity
     # Note: this is a temporary logic subject to be removed once supported by
@@ -73,8 +296,8 @@ def run_circuit_and_get_expval(
     active_qubits = set(active_qubits)
 
     # Get the qubits we'd like to measure
-    # Data for identities is not stored, need to account for empty terms
-    op_qubits = [term[0][0] for op in ops for term in op.terms if term]
+    # Data for identities is not stored, empty terms contribute no qubits
+    op_qubits = [qubit for op in ops for term in op.terms for qubit, _ in term]
 
     need_to_activate = set(op_qubits) - active_qubits
     if not need_to_activate == set():
@@ -88,12 +311,7 @@ def run_circuit_and_get_expval(
         qc.id(qc.qubits[0])
 
     # Convert to zquantum.core.circuit.Circuit
-    circuit = Circuit(qc)
-
-    # 3. Expval
-    results = _get_expval(backend, circuit, ops)
-
-    save_list(results, "expval.json")
+    return Circuit(qc)
 
 
 def _get_expval(backend, circuit, ops):
@@ -101,10 +319,12 @@ def _get_expval(backend, circuit, ops):
     given a quantum circuit and a quantum backend.
 
     In sampling mode, the same measurement outcomes are post-processed for each
-    operator. In exact mode, the statevector prepared by the quantum circuit is
-    simulated separately for each operator. This is required so that the
-    standard ``get_exact_expectation_values`` method of the ``QuantumBackend``
-    interface can be used.
+    operator. In exact mode, the wavefunction prepared by the quantum circuit is
+    simulated once and every term of every operator is evaluated against it
+    (see ``pauli_expvals``). Backends that cannot return their wavefunction
+    fall back to the standard ``get_exact_expectation_values`` method of the
+    ``QuantumBackend`` interface, which simulates the circuit separately for
+    each operator.
 
     Args:
         backend (QuantumBackend): the Orquestra quantum backend to use
@@ -133,6 +353,11 @@ def _get_expval(backend, circuit, ops):
             # E.g., <psi|Z0 + Z1|psi> = <psi|Z0|psi> + <psi|Z1|psi>
             val = np.sum(expectation_values.values)
             results.append(val)
+
+    elif hasattr(backend, "get_wavefunction"):
+        wavefunction = backend.get_wavefunction(circuit)
+        results = pauli_expvals(wavefunction.amplitudes, ops)
+
     else:
         for op in ops:
             expectation_values = backend.get_exact_expectation_values(circuit, op)
@@ -141,3 +366,77 @@ def _get_expval(backend, circuit, ops):
             results.append(val)
 
     return results
+
+
+def pauli_expvals(amplitudes, ops):
+    """Evaluates the expectation values of operators given as sums of Pauli
+    terms with respect to a state vector.
+
+    The amplitudes are indexed in little-endian order: qubit ``i`` corresponds
+    to bit ``i`` of the index of an amplitude. A Pauli term maps the basis
+    state :math:`|k\\rangle` to :math:`i^{n_Y} (-1)^{|k \\wedge z|}
+    |k \\oplus x\\rangle`, where :math:`x` and :math:`z` are the masks of the
+    qubits acted on by :math:`X` or :math:`Y` and by :math:`Z` or :math:`Y`,
+    respectively. Terms are evaluated with vectorized operations over every
+    amplitude at once, and the products of amplitudes are computed once for
+    all the terms sharing the same :math:`x` mask.
+
+    Args:
+        amplitudes (array[complex]): the state vector
+        ops (list): the operators as ``openfermion.QubitOperator`` objects or
+            any objects with a ``terms`` dictionary mapping tuples of
+            ``(qubit, pauli)`` pairs to coefficients
+
+    Returns:
+        list[float]: the expectation value of each operator
+    """
+    amplitudes = np.asarray(amplitudes, dtype=complex)
+    indices = np.arange(len(amplitudes))
+
+    # Group the terms of every operator by their x mask
+    terms_by_x_mask = {}
+    for op_idx, op in enumerate(ops):
+        for term, coeff in op.terms.items():
+            x_mask = z_mask = 0
+            num_y = 0
+            for qubit, pauli in term:
+                if pauli in ("X", "Y"):
+                    x_mask |= 1 << qubit
+                if pauli in ("Y", "Z"):
+                    z_mask |= 1 << qubit
+                if pauli == "Y":
+                    num_y += 1
+
+            terms_by_x_mask.setdefault(x_mask, []).append((op_idx, z_mask, num_y, coeff))
+
+    results = np.zeros(len(ops), dtype=complex)
+    for x_mask, terms in terms_by_x_mask.items():
+        # <psi|k ^ x> <k|psi> for every basis state k
+        products = np.conj(amplitudes[indices ^ x_mask]) * amplitudes
+
+        for op_idx, z_mask, num_y, coeff in terms:
+            if z_mask:
+                signs = 1 - 2 * _parity(indices & z_mask)
+                value = np.dot(signs, products)
+            else:
+                value = np.sum(products)
+
+            results[op_idx] += coeff * 1j ** num_y * value
+
+    return list(np.real(results))
+
+
+def _parity(values):
+    """Computes the parity of the number of set bits of each integer.
+
+    Args:
+        values (array[int]): non-negative integers less than :math:`2^{64}`
+
+    Returns:
+        array[int]: 1 for integers with an odd number of set bits, 0 otherwise
+    """
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        values ^= values >> shift
+
+    return values & 1
@@ -63,6 +63,132 @@ class TestExpvalExact:
         expval.run_circuit_and_get_expval(backend_specs, hadamard_qasm, op)
         assert math.isclose(lst[0][0], 0.0, abs_tol=analytic_tol)
 
+    def test_run_circuits_and_get_expval(self, backend_specs, monkeypatch):
+        """Tests that the expectation values are computed for each circuit of
+        a multi-circuit step and that the backend is created once."""
+        lst = []
+        created = []
+
+        qasm = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\n'
+        circuits = json.dumps([qasm + "x q[0];\n", qasm + "h q[0];\n", qasm + "x q[1];\n"])
+        op = json.dumps([["[Z0]"], ["[Z0]", "[X0]"], ["[Z0]", "[Z1]"]])
+
+        create_object = expval.create_object
+
+        def mock_create_object(specs):
+            created.append(specs)
+            return create_object(specs)
+
+        monkeypatch.setattr(expval, "save_list", lambda val, name: lst.append(val))
+        monkeypatch.setattr(expval, "create_object", mock_create_object)
+
+        expval.run_circuits_and_get_expval(backend_specs, circuits, op)
+        assert len(created) == 1
+        assert len(lst[0]) == 3
+        assert np.allclose(lst[0][0], [-1], atol=analytic_tol)
+        assert np.allclose(lst[0][1], [0, 1], atol=analytic_tol)
+        assert np.allclose(lst[0][2], [1, -1], atol=analytic_tol)
+
+    def test_encoded_operator(self, backend_specs, monkeypatch):
+        """Tests that an operator given by its compact encoding yields the same
+        result as its operator string."""
+        lst = []
+
+        qasm = (
+            'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[3];\ncreg c[3];\n'
+            "ry(0.3) q[0];\nrx(0.7) q[1];\ncx q[0],q[2];\n"
+        )
+        encoding = json.dumps(
+            {"coeffs": [0.5, 0.25, -1.0, 2.0], "x": [1, 6, 0, 0], "z": [2, 4, 5, 0]}
+        )
+        op = json.dumps([encoding, "0.5 [X0 Z1] + 0.25 [X1 Y2] + -1.0 [Z0 Z2] + 2.0 []"])
+
+        monkeypatch.setattr(expval, "save_list", lambda val, name: lst.append(val))
+
+        expval.run_circuit_and_get_expval(backend_specs, qasm, op)
+        assert math.isclose(lst[0][0], lst[0][1], abs_tol=analytic_tol)
+
+    def test_run_circuit_template_and_get_expval(self, backend_specs, monkeypatch):
+        """Tests that each row of the parameter table is bound to the circuit
+        template and that the results are returned for each row."""
+        lst = []
+
+        template = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nry({p0}) q[0];\n'
+        parameters = json.dumps([[0.0], [math.pi], [math.pi / 2]])
+        op = '["[Z0]"]'
+
+        monkeypatch.setattr(expval, "save_list", lambda val, name: lst.append(val))
+
+        expval.run_circuit_template_and_get_expval(backend_specs, template, parameters, op)
+        assert np.allclose(lst[0], [[1], [-1], [0]], atol=analytic_tol)
+
+    def test_run_circuit_template_and_get_gradient(self, backend_specs, monkeypatch):
+        """Tests that the gradient of each operator is computed for each
+        parameter using the parameter-shift rule."""
+        lst = []
+
+        template = (
+            'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\n'
+            "ry({p0}) q[0];\nrx({p1}) q[1];\n"
+        )
+        x, y = 0.4, 0.7
+        recipe = [[0.5, 1, math.pi / 2], [-0.5, 1, -math.pi / 2]]
+        shifts = json.dumps([[0, recipe], [1, recipe]])
+        op = '["[Z0]", "[Z1]"]'
+
+        monkeypatch.setattr(expval, "save_list", lambda val, name: lst.append(val))
+
+        expval.run_circuit_template_and_get_gradient(
+            backend_specs, template, json.dumps([x, y]), shifts, op
+        )
+        assert np.allclose(lst[0], [[-np.sin(x), 0], [0, -np.sin(y)]], atol=analytic_tol)
+
+    def test_single_wavefunction_simulation(self, backend_specs, monkeypatch):
+        """Tests that the wavefunction is simulated once for all the operators
+        and that the results match evaluating each operator separately."""
+        qasm = (
+            'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[3];\ncreg c[3];\n'
+            "ry(0.3) q[0];\nrx(0.7) q[1];\ncx q[0],q[2];\nh q[1];\ns q[2];\n"
+        )
+        op = '["0.5 [X0 Z1] + 0.25 [Y2]", "[Z0 Z2]", "[X1] + [Y0 X1 Y2]", "[]"]'
+
+        backend = expval.create_object(json.loads(backend_specs))
+        ops = expval._create_operators(backend, json.loads(op))
+        circuit = expval._prepare_circuit(qasm, ops)
+
+        expected = [np.sum(backend.get_exact_expectation_values(circuit, o).values) for o in ops]
+
+        simulations = []
+        get_wavefunction = backend.get_wavefunction
+
+        def mock_get_wavefunction(circuit):
+            simulations.append(circuit)
+            return get_wavefunction(circuit)
+
+        monkeypatch.setattr(backend, "get_wavefunction", mock_get_wavefunction)
+
+        res = expval._get_expval(backend, circuit, ops)
+        assert len(simulations) == 1
+        assert np.allclose(res, np.real(expected), atol=analytic_tol)
+
+    def test_pauli_expvals(self, backend_specs):
+        """Tests that the expectation values of Pauli words are evaluated
+        against a state vector using the little-endian qubit ordering."""
+        # |psi> = (|0> + i|1>) / sqrt(2) on qubit 1, |0> on qubit 0
+        amplitudes = np.array([1, 0, 1j, 0]) / np.sqrt(2)
+
+        class Op:
+            def __init__(self, terms):
+                self.terms = terms
+
+        ops = [
+            Op({((1, "Y"),): 1.0}),
+            Op({((1, "X"),): 1.0}),
+            Op({((0, "Z"),): 2.0, (): -0.5}),
+            Op({((0, "Z"), (1, "Y")): 1.0}),
+        ]
+        assert np.allclose(expval.pauli_expvals(amplitudes, ops), [1, 0, 1.5, 1])
+
 
 @pytest.mark.parametrize("backend_specs", sampling_devices)
 class TestExpvalSampling:
@@ -94,6 +220,23 @@ class TestExpvalSampling:
         expval.run_circuit_and_get_expval(backend_specs, hadamard_qasm, op)
         assert math.isclose(lst[0][0], 0.0, abs_tol=tol)
 
+    def test_encoded_operator(self, backend_specs, monkeypatch):
+        """Tests that an operator given by its compact encoding is measured in
+        sampling mode and that terms acting with X or Y are rejected."""
+        lst = []
+
+        x_qasm = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nx q[0];\n'
+        encoding = json.dumps({"coeffs": [0.5, 2.0, 1.0], "x": [0, 0, 0], "z": [1, 3, 0]})
+
+        monkeypatch.setattr(expval, "save_list", lambda val, name: lst.append(val))
+
+        expval.run_circuit_and_get_expval(backend_specs, x_qasm, json.dumps([encoding]))
+        assert math.isclose(lst[0][0], -0.5 - 2.0 + 1.0, abs_tol=tol)
+
+        encoding = json.dumps({"coeffs": [1.0], "x": [1], "z": [0]})
+        with pytest.raises(ValueError, match="Only terms acting with Z"):
+            expval.run_circuit_and_get_expval(backend_specs, x_qasm, json.dumps([encoding]))
+
     def test_hadamard_expectation(self, backend_specs, monkeypatch):
         """Test that the expectation value of the Hadamard is computed
         correctly."""
@@ -7,6 +7,8 @@ import os
 import pennylane as qml
 from copy import deepcopy
 
+import pennylane_orquestra
+
 # Auxiliary classes and functions
 def qe_list_workflow():
     """Function for a CLI call to list workflows.
@@ -38,6 +40,19 @@ class MockPopen:
                 return self.msg
 
         self.stdout = MockStdOut(msg)
+        self.input = None
+
+    def communicate(self, input=None):
+        """Records the data piped to the process and returns its output."""
+        self.input = input
+        return "".join(self.stdout.readlines()), None
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch, tmp_path):
+    """Place the default result cache of the devices into a temporary
+    directory, such that results are not shared between tests."""
+    monkeypatch.setattr(pennylane_orquestra.cache, "user_data_dir", lambda *args: str(tmp_path))
 
 
 @pytest.fixture(
@@ -0,0 +1,409 @@
+"""
+This module contains a local stand-in for the Orquestra workflow API, which
+can be used for testing and benchmarking the API transport without the real
+platform.
+"""
+
+import http.server
+import io
+import itertools
+import json
+import os
+import random
+import stat
+import sys
+import tarfile
+import threading
+import time
+import urllib.parse
+
+import yaml
+
+from pennylane_orquestra.cli_actions import RESULTS_FILENAME
+from pennylane_orquestra.gen_workflow import step_inputs
+
+DOWNLOAD_INTERVAL = 0.01
+"""float: seconds between the chunks sent when the download rate is limited"""
+
+
+def zero_results(workflow):
+    """Creates workflow results where every expectation value is zero.
+
+    The results of each step have the shape expected for the function run by
+    the step.
+
+    Args:
+        workflow (dict): the workflow generated by ``gen_expval_workflow``
+
+    Returns:
+        dict: the workflow results
+    """
+    results = {}
+    for step in workflow["steps"]:
+        inputs = step_inputs(step)
+        ops = json.loads(inputs["operators"])
+
+        if "shifts" in inputs:
+            expvals = [[0.0] * len(ops) for _ in json.loads(inputs["shifts"])]
+        elif "parameters" in inputs:
+            expvals = [[0.0] * len(ops) for _ in json.loads(inputs["parameters"])]
+        elif "circuits" in inputs:
+            expvals = [[0.0] * len(circuit_ops) for circuit_ops in ops]
+        else:
+            expvals = [0.0] * len(ops)
+
+        results[step["name"]] = {"stepName": step["name"], "expval": {"list": expvals}}
+
+    return results
+
+
+def results_archive(results, padding=0):
+    """Creates the gzipped tar archive holding the results of a workflow.
+
+    Args:
+        results (dict): the workflow results
+
+    Keyword Args:
+        padding=0 (int): the number of random bytes stored in an additional
+            member preceding the results, which makes the archive larger
+
+    Returns:
+        bytes: the archive
+    """
+    content = json.dumps(results).encode("utf-8")
+    buffer = io.BytesIO()
+
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        if padding:
+            info = tarfile.TarInfo("padding.bin")
+            info.size = padding
+            tar.addfile(info, io.BytesIO(os.urandom(padding)))
+
+        info = tarfile.TarInfo(RESULTS_FILENAME)
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+
+    return buffer.getvalue()
+
+
+class MockOrquestraHandler(http.server.BaseHTTPRequestHandler):
+    """Handles the requests sent to the mock server over keep-alive
+    connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    # The headers and the body of responses are written separately
+    disable_nagle_algorithm = True
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Submits a workflow."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+
+        if not self._authorized():
+            return
+
+        if urllib.parse.urlsplit(self.path).path != "/workflows":
+            self._send_json(404, {"error": "Not found."})
+            return
+
+        try:
+            workflow = yaml.load(body, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            workflow["steps"]  # pylint: disable=pointless-statement
+        except (yaml.YAMLError, TypeError, KeyError):
+            self._send_json(400, {"error": "The workflow could not be parsed."})
+            return
+
+        workflow_id = self.server.add_workflow(workflow)
+        self._send_json(201, {"id": workflow_id})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Queries workflows or downloads the results of a workflow."""
+        parsed = urllib.parse.urlsplit(self.path)
+        parts = parsed.path.strip("/").split("/")
+        time.sleep(self.server.latency)
+
+        if parts[0] == "results" and len(parts) == 2:
+            self._send_results(parts[1].rsplit(".", 1)[0])
+            return
+
+        if not self._authorized():
+            return
+
+        if parts == ["workflows"]:
+            query = urllib.parse.parse_qs(parsed.query)
+            ids = [i for value in query.get("ids", []) for i in value.split(",") if i]
+            if "ids" not in query:
+                ids = self.server.workflow_ids()
+
+            with self.server.lock:
+                self.server.stats["queries"] += 1
+
+            workflows = [self.server.workflow_info(i) for i in ids]
+            self._send_json(200, {"workflows": [wf for wf in workflows if wf is not None]})
+            return
+
+        if parts[0] == "workflows" and len(parts) == 2:
+            with self.server.lock:
+                self.server.stats["queries"] += 1
+
+            info = self.server.workflow_info(urllib.parse.unquote(parts[1]))
+            if info is None:
+                self._send_json(404, {"error": f"Unknown workflow {parts[1]}."})
+            else:
+                self._send_json(200, info)
+            return
+
+        self._send_json(404, {"error": "Not found."})
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _authorized(self):
+        """Checks the token sent, responding with an error if it is
+        invalid."""
+        token = self.server.token
+        if token is None or self.headers.get("Authorization") == f"Bearer {token}":
+            return True
+
+        self._send_json(401, {"error": "Invalid token."})
+        return False
+
+    def _send_results(self, workflow_id):
+        """Sends the archive of the results of a workflow, supporting
+        conditional requests."""
+        info = self.server.workflow_info(workflow_id)
+        if info is None or info["result"] is None:
+            self._send(404, b"Not found.", "text/plain")
+            return
+
+        etag = f'"{workflow_id}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        with self.server.lock:
+            self.server.stats["downloads"] += 1
+
+        body = self.server.archive(workflow_id)
+        rate = self.server.download_rate
+        if rate is None:
+            self._send(200, body, "application/gzip", {"ETag": etag})
+            return
+
+        # Throttle the download by sending the archive in chunks
+        self._send(200, b"", "application/gzip", {"ETag": etag, "Content-Length": len(body)})
+        chunk_size = max(1, int(rate * DOWNLOAD_INTERVAL))
+        for start in range(0, len(body), chunk_size):
+            self.wfile.write(body[start : start + chunk_size])
+            time.sleep(DOWNLOAD_INTERVAL)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, content_type, headers=None):
+        headers = dict({"Content-Length": len(body)}, **(headers or {}))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockOrquestraServer(http.server.ThreadingHTTPServer):
+    """A local server answering the requests of the API transport.
+
+    Submitted workflows are reported as running for a while, after which
+    they either fail or succeed and their results can be downloaded from the
+    server. The number of submissions (``"submissions"``), status queries
+    (``"queries"``) and result downloads (``"downloads"``) are recorded in the
+    ``stats`` attribute.
+
+    The latency of the platform can be injected by delaying the responses,
+    randomizing the time spent by workflows in the queue, failing workflows
+    at random and making the results larger and slower to download. The
+    ``qe`` CLI can be emulated on top of the server (see ``write_qe_shim``).
+
+    The server runs in a background thread while used as a context manager.
+
+    Keyword Args:
+        results=None (callable): function creating the results of a
+            submitted workflow from the workflow, by default every
+            expectation value is zero
+        duration=0 (float): the mean number of seconds for which a workflow
+            is running
+        duration_spread=0 (float): the durations are drawn uniformly from
+            ``duration * (1 +/- duration_spread)``
+        latency=0 (float): seconds by which each response is delayed
+        failure_rate=0 (float): the probability that a workflow fails
+        result_padding=0 (int): the number of random bytes added to the
+            archive of the results of each workflow
+        download_rate=None (float): the maximum number of bytes per second
+            sent when downloading results, unlimited by default
+        seed=None (int): the seed of the random durations and failures
+        token=None (str): the token expected from the clients, any request is
+            accepted if not specified
+        host="127.0.0.1" (str): the address to listen on
+        port=0 (int): the port to listen on, a free port is chosen by default
+    """
+
+    daemon_threads = True
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        results=None,
+        duration=0,
+        duration_spread=0,
+        latency=0,
+        failure_rate=0,
+        result_padding=0,
+        download_rate=None,
+        seed=None,
+        token=None,
+        host="127.0.0.1",
+        port=0,
+    ):
+        super().__init__((host, port), MockOrquestraHandler)
+        self.results = results or zero_results
+        self.duration = duration
+        self.duration_spread = duration_spread
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.result_padding = result_padding
+        self.download_rate = download_rate
+        self.token = token
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.stats = {"submissions": 0, "queries": 0, "downloads": 0}
+        self._workflows = {}
+        self._archives = {}
+        self._ids = itertools.count()
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base URL of the server.
+
+        Returns:
+            str: the URL
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_workflow(self, workflow):
+        """Registers a submitted workflow.
+
+        Args:
+            workflow (dict): the workflow
+
+        Returns:
+            str: the ID of the workflow
+        """
+        with self.lock:
+            workflow_id = f"expval-{next(self._ids)}"
+            spread = self._rng.uniform(-self.duration_spread, self.duration_spread)
+            self._workflows[workflow_id] = {
+                "workflow": workflow,
+                "finished": time.time() + self.duration * (1 + spread),
+                "failed": self._rng.random() < self.failure_rate,
+            }
+            self.stats["submissions"] += 1
+
+        return workflow_id
+
+    def workflow_ids(self):
+        """Returns the IDs of every submitted workflow.
+
+        Returns:
+            list[str]: the IDs in the order of submission
+        """
+        with self.lock:
+            return list(self._workflows)
+
+    def workflow_info(self, workflow_id):
+        """Returns the status of a workflow and the URL of its results.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+
+        Returns:
+            dict or None: the status and the URL of the results of the
+            workflow, or ``None`` for unknown workflows
+        """
+        with self.lock:
+            entry = self._workflows.get(workflow_id, None)
+
+        if entry is None:
+            return None
+
+        if time.time() < entry["finished"]:
+            return {"id": workflow_id, "status": "Running", "result": None}
+
+        if entry["failed"]:
+            return {"id": workflow_id, "status": "Failed", "result": None}
+
+        return {
+            "id": workflow_id,
+            "status": "Succeeded",
+            "result": f"{self.url}/results/{workflow_id}.tgz",
+        }
+
+    def archive(self, workflow_id):
+        """Returns the archive of the results of a workflow, creating it on
+        first use.
+
+        Args:
+            workflow_id (str): the ID of the workflow
+
+        Returns:
+            bytes: the archive
+        """
+        with self.lock:
+            if workflow_id not in self._archives:
+                results = self.results(self._workflows[workflow_id]["workflow"])
+                self._archives[workflow_id] = results_archive(results, self.result_padding)
+
+            return self._archives[workflow_id]
+
+    def write_qe_shim(self, directory):
+        """Writes an executable named ``qe`` emulating the Orquestra CLI on top
+        of the server.
+
+        The ``qe submit workflow``, ``qe get workflow``, ``qe get
+        workflowresult`` and ``qe list workflow`` commands are supported.
+        Placing the directory at the front of the ``PATH`` environment
+        variable makes the CLI transport use the server.
+
+        Args:
+            directory (str): the directory to write the executable to
+
+        Returns:
+            str: the path of the executable
+        """
+        shim = os.path.join(os.path.dirname(os.path.abspath(__file__)), "qe_shim.py")
+        path = os.path.join(directory, "qe")
+
+        with open(path, "w") as file:
+            file.write(
+                "#!/bin/sh\n"
+                f"ORQUESTRA_MOCK_URL='{self.url}' exec '{sys.executable}' '{shim}' \"$@\"\n"
+            )
+
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return path
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
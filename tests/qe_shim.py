@@ -0,0 +1,85 @@
+"""
+Emulates the Orquestra Quantum Engine command line interface on top of the
+local mock server of the workflow API.
+
+The URL of the server is read from the ``ORQUESTRA_MOCK_URL`` environment
+variable. The output of the commands mimics the output of the ``qe`` CLI
+parsed by ``cli_actions``. The script is run as a file by the executable
+written by ``MockOrquestraServer.write_qe_shim`` and only uses the standard
+library, such that each call starts quickly.
+"""
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+USAGE = "Usage: qe submit workflow <file> | qe get workflow|workflowresult <id> | qe list workflow"
+
+
+def call(method, path, body=None):
+    """Sends a request to the mock server.
+
+    Args:
+        method (str): the HTTP method
+        path (str): the path of the endpoint
+
+    Keyword Args:
+        body=None (bytes): the body of the request
+
+    Returns:
+        dict: the response parsed from JSON
+    """
+    request = urllib.request.Request(os.environ["ORQUESTRA_MOCK_URL"] + path, body, method=method)
+
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        return json.load(e)
+
+
+def main(argv):
+    """Runs a ``qe`` command.
+
+    Args:
+        argv (list[str]): the arguments of the command
+
+    Returns:
+        list[str]: the lines of the output
+    """
+    if argv[:2] == ["submit", "workflow"] and len(argv) == 3:
+        with open(argv[2], "rb") as file:
+            response = call("POST", "/workflows", file.read())
+
+        if "id" not in response:
+            return [f"Error: {response.get('error')}"]
+
+        return [
+            "Successfully submitted workflow to quantum engine!",
+            f"Workflow ID: {response['id']}",
+        ]
+
+    if argv[:2] == ["get", "workflow"] and len(argv) == 3:
+        info = call("GET", f"/workflows/{argv[2]}")
+        if "error" in info:
+            return [f"Error: {info['error']}"]
+
+        return [f"Name: {info['id']}", f"Status: {info['status']}"]
+
+    if argv[:2] == ["get", "workflowresult"] and len(argv) == 3:
+        info = call("GET", f"/workflows/{argv[2]}")
+        if info.get("result") is None:
+            return [f"Workflow result for {argv[2]} is not available yet"]
+
+        return [f"Name: {info['id']}", f"Location: {info['result']}"]
+
+    if argv[:2] == ["list", "workflow"]:
+        workflows = call("GET", "/workflows")["workflows"]
+        return ["ID Status"] + [f"{wf['id']} {wf['status']}" for wf in workflows]
+
+    return [USAGE]
+
+
+if __name__ == "__main__":
+    print("\n".join(main(sys.argv[1:])))
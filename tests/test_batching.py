@@ -0,0 +1,109 @@
+"""
+Unit tests for the ``batching`` module.
+"""
+import pytest
+
+from pennylane_orquestra.batching import AdaptiveBatchSize
+
+
+def record_linear(sizer, sizes, overhead, per_step):
+    """Records workflows whose duration is exactly linear in their size."""
+    for idx, size in enumerate(sizes):
+        sizer.record(f"wf-{idx}", size, 0.1 * overhead, 0.9 * overhead + per_step * size)
+
+
+class TestAdaptiveBatchSize:
+    """Test choosing the batch size from the duration of past workflows."""
+
+    def test_invalid_initial_size(self):
+        """Test that an error is raised for a non-positive initial size."""
+        with pytest.raises(ValueError, match="initial batch size must be positive"):
+            AdaptiveBatchSize(initial_size=0)
+
+    def test_initial_and_exploration(self):
+        """Test that the initial size is used without any data and that a
+        different size is explored before a model can be fitted."""
+        sizer = AdaptiveBatchSize(initial_size=4)
+        assert sizer.size(100) == 4
+        assert sizer.size(3) == 3
+
+        sizer.record("wf-0", 4, 1.0, 2.0)
+        assert sizer.model() is None
+        assert sizer.size(100) == 8
+
+    def test_exploration_capped(self):
+        """Test that a smaller size is explored if doubling the size recorded
+        exceeds the number of circuits."""
+        sizer = AdaptiveBatchSize(initial_size=10)
+        assert sizer.size(5) == 5
+
+        sizer.record("wf-0", 5, 1.0, 2.0)
+        assert sizer.size(5) == 2
+
+        sizer.record("wf-1", 2, 1.0, 1.5)
+        assert sizer.model() is not None
+
+    def test_model(self):
+        """Test that the overhead and the cost per step are fitted."""
+        sizer = AdaptiveBatchSize()
+        record_linear(sizer, [2, 5, 10], overhead=20.0, per_step=0.5)
+        overhead, per_step = sizer.model()
+        assert overhead == pytest.approx(20.0)
+        assert per_step == pytest.approx(0.5)
+
+    def test_model_clipped(self):
+        """Test that negative coefficients are clipped."""
+        sizer = AdaptiveBatchSize()
+        sizer.record("wf-0", 1, 0.0, 5.0)
+        sizer.record("wf-1", 10, 0.0, 1.0)
+        assert sizer.model()[1] == 0.0
+
+    def test_sequential_prefers_large_batches(self):
+        """Test that a single batch is chosen when the workflows run one
+        after the other and each has a large overhead."""
+        sizer = AdaptiveBatchSize()
+        record_linear(sizer, [2, 5, 10], overhead=20.0, per_step=0.5)
+        assert sizer.size(60) == 60
+
+    def test_max_size(self):
+        """Test that the chosen size does not exceed the maximum size."""
+        sizer = AdaptiveBatchSize(max_size=16)
+        record_linear(sizer, [2, 5, 10], overhead=20.0, per_step=0.5)
+        assert sizer.size(60) == 15
+
+    def test_parallel_workflows(self):
+        """Test that the circuits are spread over the workflows that may run
+        at the same time."""
+        sizer = AdaptiveBatchSize()
+        record_linear(sizer, [2, 5, 10], overhead=1.0, per_step=1.0)
+        assert sizer.size(60, parallel=4) == 15
+        assert sizer.size(60, parallel=60) == 1
+
+    def test_stats(self):
+        """Test that the recorded durations and the choices are exposed."""
+        sizer = AdaptiveBatchSize(history=2)
+        record_linear(sizer, [2, 5, 10], overhead=20.0, per_step=0.5)
+        sizer.size(10)
+
+        stats = sizer.stats
+        assert [w["workflow_id"] for w in stats["workflows"]] == ["wf-1", "wf-2"]
+        assert stats["workflows"][0]["total"] == pytest.approx(22.5)
+
+        choice = stats["choices"][0]
+        assert choice["batch_size"] == 10
+        assert choice["predicted"] == pytest.approx(25.0)
+
+    def test_record_stages(self):
+        """Test that the queueing and running times and the running time per
+        step are recorded along with the number of circuits."""
+        sizer = AdaptiveBatchSize()
+        sizer.record("wf-0", 10, 0.5, 12.0, queue=4.0, run=6.0, steps=3)
+        sizer.record("wf-1", 5, 0.5, 3.0)
+
+        first, second = sizer.stats["workflows"]
+        assert first["circuits"] == 10
+        assert first["steps"] == 3
+        assert first["queue"] == 4.0
+        assert first["per_step"] == pytest.approx(2.0)
+        assert first["total"] == pytest.approx(12.5)
+        assert second["queue"] is None and second["per_step"] is None
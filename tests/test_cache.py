@@ -0,0 +1,218 @@
+"""
+Unit tests for the ``cache`` module and for caching the results of device
+executions, without sending any requests to Orquestra.
+"""
+import os
+import subprocess
+import time
+
+import numpy as np
+import pytest
+
+import pennylane as qml
+import pennylane_orquestra
+from pennylane_orquestra.cache import ResultCache
+
+from conftest import MockPopen, backend_specs_default, qasm_circuit_default
+
+
+class TestResultCache:
+    """Test the on-disk result cache."""
+
+    def test_key(self):
+        """Test that the key depends on each part of the computation."""
+        key = ResultCache.key(backend_specs_default, qasm_circuit_default, "1 [Z0]")
+        assert key == ResultCache.key(backend_specs_default, qasm_circuit_default, "1 [Z0]")
+        assert key != ResultCache.key(backend_specs_default, qasm_circuit_default, "1 [Z1]")
+        assert key != ResultCache.key(backend_specs_default, "Other circuit", "1 [Z0]")
+        assert key != ResultCache.key("{}", qasm_circuit_default, "1 [Z0]")
+
+    @pytest.mark.parametrize("name, value", [("__version__", "0.0.0"), ("STEPS_VERSION", 0)])
+    def test_key_version(self, name, value, monkeypatch):
+        """Test that the key depends on the versions of the plugin and of the
+        steps."""
+        key = ResultCache.key(backend_specs_default, qasm_circuit_default, "1 [Z0]")
+        monkeypatch.setattr(pennylane_orquestra.cache, name, value)
+        assert key != ResultCache.key(backend_specs_default, qasm_circuit_default, "1 [Z0]")
+
+    def test_get_and_update(self, tmpdir):
+        """Test that stored values are returned and hits and misses are
+        counted."""
+        cache = ResultCache(directory=str(tmpdir))
+
+        assert cache.get("key0") is None
+        cache.update([("key0", 0.5), ("key1", -1)])
+
+        assert cache.get("key0") == 0.5
+        assert cache.get("key1") == -1
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    def test_persistent(self, tmpdir):
+        """Test that the entries are shared by caches using the same
+        directory."""
+        ResultCache(directory=str(tmpdir)).update([("key0", 0.5)])
+        assert ResultCache(directory=str(tmpdir)).get("key0") == 0.5
+
+    def test_ttl(self, tmpdir, monkeypatch):
+        """Test that expired entries are removed."""
+        cache = ResultCache(directory=str(tmpdir), ttl=10)
+        cache.update([("key0", 0.5)])
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 11)
+        assert cache.get("key0") is None
+        assert not os.listdir(tmpdir)
+
+    def test_lru_eviction(self, tmpdir):
+        """Test that the least recently used entries are evicted once the
+        maximum size is exceeded."""
+        cache = ResultCache(directory=str(tmpdir))
+        cache.update([("key0", 0.0), ("key1", 1.0)])
+        entry_size = os.path.getsize(tmpdir.join("key0.json"))
+
+        # Make key1 less recently used than key0
+        os.utime(tmpdir.join("key1.json"), (0, 0))
+
+        # Allow for small differences in the size of the entries
+        cache.max_size = 2 * entry_size + 5
+        cache.update([("key2", 2.0)])
+
+        assert cache.get("key1") is None
+        assert cache.get("key0") == 0.0
+        assert cache.get("key2") == 2.0
+
+    def test_corrupt_entry(self, tmpdir):
+        """Test that an entry that cannot be read counts as a miss."""
+        cache = ResultCache(directory=str(tmpdir))
+        with open(tmpdir.join("key0.json"), "w") as f:
+            f.write("{not json")
+
+        assert cache.get("key0") is None
+        assert cache.misses == 1
+
+    @pytest.mark.parametrize("content", ["[0.5]", '{"value": 0.5}', '{"created": "now"}'])
+    def test_malformed_entry(self, tmpdir, content):
+        """Test that an entry without the expected fields counts as a miss and
+        is removed."""
+        cache = ResultCache(directory=str(tmpdir))
+        with open(tmpdir.join("key0.json"), "w") as f:
+            f.write(content)
+
+        assert cache.get("key0") is None
+        assert cache.misses == 1
+        assert not os.listdir(tmpdir)
+
+    def test_clear(self, tmpdir):
+        """Test that clearing the cache removes every entry."""
+        cache = ResultCache(directory=str(tmpdir))
+        cache.update([("key0", 0.0), ("key1", 1.0)])
+        cache.clear()
+        assert cache.get("key0") is None
+        assert not os.listdir(tmpdir)
+
+
+class TestDeviceCache:
+    """Test caching the results of device executions."""
+
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({"analytic": True}, False),
+            ({"analytic": False}, False),
+            ({"analytic": True, "cache": True}, True),
+            ({"analytic": False, "cache": True}, True),
+            ({"analytic": True, "cache": False}, False),
+        ],
+    )
+    def test_cache_default(self, kwargs, expected):
+        """Test that caching is disabled unless requested."""
+        dev = qml.device("orquestra.forest", wires=2, **kwargs)
+        assert (dev.cache is not None) == expected
+
+    def test_cache_options(self, tmpdir):
+        """Test that the cache options are passed to the cache."""
+        dev = qml.device(
+            "orquestra.forest",
+            wires=2,
+            cache=True,
+            cache_options={"directory": str(tmpdir), "ttl": 5},
+        )
+        assert dev.cache.directory == str(tmpdir)
+        assert dev.cache.ttl == 5
+
+    def test_only_misses_submitted(self, monkeypatch, tmpdir):
+        """Test that cached results are served locally and that only the
+        operators without cached results are submitted."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=2, cache=True)
+
+        # Both circuits act on two wires, such that their serialization matches
+        with qml.tape.QuantumTape() as tape1:
+            qml.RX(0.1, wires=0)
+            qml.expval(qml.PauliZ(0))
+            qml.expval(qml.Identity(1))
+
+        with qml.tape.QuantumTape() as tape2:
+            qml.RX(0.1, wires=0)
+            qml.expval(qml.PauliZ(0))
+            qml.expval(qml.PauliX(1))
+
+        submitted = []
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.append(operators)
+
+        results = iter(
+            [
+                {"step0": {"expval": {"list": [0.25]}}},
+                {"step0": {"expval": {"list": [0.5]}}},
+            ]
+        )
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: next(results),
+            )
+
+            assert np.allclose(dev.execute(tape1), [0.25, 1])
+
+            # The first operator is cached, only the second one is submitted
+            assert np.allclose(dev.execute(tape2), [0.25, 0.5])
+
+            # Every result is cached, no submission needed
+            res = dev.batch_execute([tape1, tape2])
+            assert np.allclose(res[0], [0.25, 1])
+            assert np.allclose(res[1], [0.25, 0.5])
+
+        assert submitted == [['["1 [Z0]"]'], ['["1 [X1]"]']]
+        assert dev.cache.hits == 4
+        qml.disable_tape()
+
+    def test_no_keys_without_cache(self, monkeypatch, tmpdir):
+        """Test that no cache keys are computed if caching is disabled."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=1)
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RX(0.1, wires=0)
+            qml.expval(qml.PauliZ(0))
+
+        with monkeypatch.context() as m:
+            m.setattr(dev, "_cache_key", lambda *args: pytest.fail("Cache key computed"))
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: {"step0": {"expval": {"list": [0.25]}}},
+            )
+
+            assert np.allclose(dev.execute(tape), [0.25])
+
+        qml.disable_tape()
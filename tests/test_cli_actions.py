@@ -2,21 +2,57 @@
 Unit tests for the ```cli_actions`` module, without sending any requests to
 Orquestra.
 """
+import io
 import pytest
 import subprocess
 import tarfile
 import os
 import urllib.request
 import json
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
 import pennylane_orquestra.gen_workflow as gw
 import pennylane_orquestra
-from pennylane_orquestra.cli_actions import qe_submit, write_workflow_file, loop_until_finished
+from pennylane_orquestra.cli_actions import (
+    PollingSchedule,
+    qe_submit,
+    qe_submit_yaml,
+    write_workflow_file,
+    loop_until_finished,
+    download_results,
+    parse_results_archive,
+)
 
 from conftest import backend_specs_default, qasm_circuit_default, operator_string_default, MockPopen
 
 
+def make_results_archive(data, name="workflow_result.json", others=None):
+    """Creates a gzipped tar archive containing the workflow results.
+
+    Args:
+        data (dict): the workflow results
+        name (str): the name of the member containing the results
+        others (dict): maps the names of other members to their contents
+
+    Returns:
+        bytes: the archive
+    """
+    members = dict(others or {})
+    members[name] = json.dumps(data).encode("utf-8")
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for member_name, content in members.items():
+            info = tarfile.TarInfo(member_name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+    return buffer.getvalue()
+
+
 class TestCLIFunctions:
     """Test functions for CLI actions work as expected."""
 
@@ -46,6 +82,113 @@ class TestCLIFunctions:
             with pytest.raises(ValueError, match=unexp_resp_msg):
                 workflow_id = qe_submit("some_filename")
 
+    def test_submit_yaml(self, monkeypatch):
+        """Test that a workflow is piped to the standard input of the CLI
+        call."""
+        processes = []
+
+        def mock_popen(args, **kwargs):
+            processes.append((args, MockPopen()))
+            return processes[-1][1]
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "_stdin_readable", True)
+            m.setattr(subprocess, "Popen", mock_popen)
+            workflow_id = qe_submit_yaml("steps: []\n")
+
+        assert workflow_id == "SomeWorkflowID"
+
+        args, process = processes[0]
+        assert args == ["qe", "submit", "workflow", pennylane_orquestra.cli_actions.STDIN_PATH]
+        assert process.input == "steps: []\n"
+
+    def test_submit_yaml_raises_no_success(self, monkeypatch):
+        """Test that the qe_submit_yaml method raises an error without
+        submitting the workflow again if not a successful message was
+        received."""
+        no_success_msg = ["Not a success message."]
+        calls = []
+
+        def mock_popen(args, **kwargs):
+            calls.append(args)
+            return MockPopen(no_success_msg)
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "_stdin_readable", True)
+            m.setattr(subprocess, "Popen", mock_popen)
+
+            with pytest.raises(ValueError, match="Not a success message"):
+                qe_submit_yaml("steps: []\n")
+
+        assert len(calls) == 1
+
+    def test_submit_yaml_file_fallback(self, monkeypatch):
+        """Test that the workflow is submitted using a temporary file that is
+        removed afterwards if the CLI could not read the standard input, and
+        that later workflows are submitted using files right away."""
+        submitted = []
+
+        def mock_popen(args, **kwargs):
+            if args[-1] == pennylane_orquestra.cli_actions.STDIN_PATH:
+                submitted.append((args[-1], None))
+                return MockPopen(["Error: open /dev/stdin: no such device or address"])
+
+            with open(args[-1]) as file:
+                submitted.append((args[-1], file.read()))
+            return MockPopen()
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "_stdin_readable", True)
+            m.setattr(subprocess, "Popen", mock_popen)
+            assert qe_submit_yaml("steps: []\n") == "SomeWorkflowID"
+            assert qe_submit_yaml("steps: [1]\n") == "SomeWorkflowID"
+
+        assert len(submitted) == 3
+        assert submitted[0][0] == pennylane_orquestra.cli_actions.STDIN_PATH
+
+        for (path, data), expected in zip(submitted[1:], ["steps: []\n", "steps: [1]\n"]):
+            assert data == expected
+            assert not os.path.exists(path)
+
+    def test_submit_yaml_file_fallback_error(self, monkeypatch):
+        """Test that the error raised if the submission using a file failed
+        contains the output of the submission via the standard input."""
+
+        def mock_popen(args, **kwargs):
+            if args[-1] == pennylane_orquestra.cli_actions.STDIN_PATH:
+                return MockPopen(["Error: cannot read /dev/stdin"])
+
+            return MockPopen(["Error: invalid workflow"])
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "_stdin_readable", True)
+            m.setattr(subprocess, "Popen", mock_popen)
+
+            with pytest.raises(ValueError, match="cannot read /dev/stdin.*invalid workflow"):
+                qe_submit_yaml("steps: []\n")
+
+    def test_submit_yaml_temporary_file(self, monkeypatch, tmpdir):
+        """Test that the workflow is submitted using a temporary file that is
+        removed afterwards if the standard input cannot be passed as a
+        file."""
+        submitted = []
+
+        def mock_popen(args, **kwargs):
+            with open(args[-1]) as file:
+                submitted.append((args[-1], file.read()))
+            return MockPopen()
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "STDIN_PATH", str(tmpdir.join("none")))
+            m.setattr(subprocess, "Popen", mock_popen)
+            workflow_id = qe_submit_yaml("steps: []\n")
+
+        assert workflow_id == "SomeWorkflowID"
+
+        path, data = submitted[0]
+        assert data == "steps: []\n"
+        assert not os.path.exists(path)
+
     def test_workflow_results(self, monkeypatch):
         """Test that the workflow_results function passes the correct option to
         qe_get."""
@@ -122,31 +265,23 @@ class TestCLIFunctions:
 
     def test_valid_url(self, monkeypatch, tmpdir):
         """Test that when receiving a valid url, data will be decoded and
-        returned."""
+        returned without writing any files."""
         decoded_data = {"res": "Decoded Data"}
-        test_file = os.path.join(tmpdir, "workflow_result.json")
-        test_tar = os.path.join(tmpdir, "test.tgz")
-
-        with open(test_file, "w") as outfile:
-            json.dump(decoded_data, outfile)
-
-        tar = tarfile.open(test_tar, mode="w:gz")
-        tar.add(test_tar)
-        tar.close()
+        archive = make_results_archive(decoded_data)
 
         # Change to the test directory
         os.chdir(tmpdir)
         with monkeypatch.context() as m:
-            status = "Status:              Failed\n"
             result_message = ["Some message2", "Some location"]
 
             m.setattr(
                 pennylane_orquestra.cli_actions, "workflow_results", lambda *args: result_message
             )
-            m.setattr(urllib.request, "urlopen", lambda arg: arg)
-            m.setattr(urllib.request, "urlretrieve", lambda *args, **kwargs: (test_tar,))
+            m.setattr(urllib.request, "urlopen", lambda arg: io.BytesIO(archive))
             assert loop_until_finished("Some ID", timeout=1) == decoded_data
 
+        assert os.listdir(tmpdir) == []
+
     def test_invalid_url_loop_till_timeout(self, monkeypatch):
         """Test that when receiving an invalid url, looping continues until the
         timeout."""
@@ -185,3 +320,130 @@ class TestCLIFunctions:
 
             with pytest.raises(TimeoutError, match="were not obtained after"):
                 loop_until_finished("Some ID", timeout=1)
+
+
+class TestParseResultsArchive:
+    """Test parsing the archive of the workflow results in memory."""
+
+    def test_nested_member(self):
+        """Test that the results are found in a nested directory among other
+        members of the archive."""
+        archive = make_results_archive(
+            {"step": {"expval": {"list": [1]}}},
+            name="some/dir/workflow_result.json",
+            others={"other.json": b"{}"},
+        )
+        res = parse_results_archive(io.BytesIO(archive))
+        assert res == {"step": {"expval": {"list": [1]}}}
+
+    def test_missing_member(self):
+        """Test that an error is raised if the archive does not contain the
+        results."""
+        archive = make_results_archive({}, name="other.json")
+        with pytest.raises(ValueError, match="does not contain workflow_result.json"):
+            parse_results_archive(io.BytesIO(archive))
+
+    def test_invalid_archive(self):
+        """Test that an error is raised if the data is not an archive."""
+        with pytest.raises(ValueError, match="could not be read from the archive"):
+            parse_results_archive(io.BytesIO(b"Not an archive"))
+
+    def test_concurrent_downloads(self, monkeypatch):
+        """Test that concurrent downloads do not interfere with each
+        other."""
+        archives = {f"url-{idx}": make_results_archive({"idx": idx}) for idx in range(8)}
+        monkeypatch.setattr(urllib.request, "urlopen", lambda url: io.BytesIO(archives[url]))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            res = list(executor.map(download_results, archives))
+
+        assert res == [{"idx": idx} for idx in range(8)]
+
+
+class TestPollingSchedule:
+    """Test the schedule used for querying workflow results."""
+
+    def test_intervals_backoff(self):
+        """Test that the intervals grow exponentially until the maximum
+        interval is reached."""
+        schedule = PollingSchedule(initial_delay=1, backoff=2, max_interval=5, jitter=0)
+        intervals = list(itertools.islice(schedule.intervals(), 6))
+        assert intervals == [1, 2, 4, 5, 5, 5]
+
+    def test_intervals_jitter(self):
+        """Test that the jitter changes the intervals by at most the specified
+        fraction."""
+        schedule = PollingSchedule(initial_delay=1, backoff=1, jitter=0.5)
+        intervals = list(itertools.islice(schedule.intervals(), 100))
+        assert all(0.5 <= i <= 1.5 for i in intervals)
+        assert len(set(intervals)) > 1
+
+    @pytest.mark.parametrize(
+        "kwargs, msg",
+        [
+            ({"initial_delay": -1}, "must be non-negative"),
+            ({"backoff": 0.5}, "must be at least 1"),
+            ({"jitter": 1}, r"must be in the \[0, 1\) interval"),
+            ({"status_every": 0}, "positive number of queries"),
+        ],
+    )
+    def test_invalid_schedule(self, kwargs, msg):
+        """Test that an error is raised for invalid schedule options."""
+        with pytest.raises(ValueError, match=msg):
+            PollingSchedule(**kwargs)
+
+    def test_loop_sleeps_and_records_stats(self, monkeypatch):
+        """Test that the loop sleeps according to the schedule between queries
+        and records the number of queries and CLI calls made."""
+        sleeps = []
+        answers = iter(["Not ready", "Not ready", "Not ready", "Not ready", ["Ready", "At url"]])
+
+        with monkeypatch.context() as m:
+            m.setattr(time, "sleep", sleeps.append)
+            m.setattr(
+                pennylane_orquestra.cli_actions, "workflow_details", lambda *args: "Running"
+            )
+            m.setattr(
+                pennylane_orquestra.cli_actions, "workflow_results", lambda *args: next(answers)
+            )
+            m.setattr(urllib.request, "urlopen", lambda arg: io.BytesIO(b""))
+
+            # Stop before parsing the results
+            def stop(*args, **kwargs):
+                raise StopIteration
+
+            m.setattr(pennylane_orquestra.cli_actions, "parse_results_archive", stop)
+
+            schedule = PollingSchedule(initial_delay=1, backoff=2, jitter=0, status_every=2)
+            stats = {}
+            with pytest.raises(StopIteration):
+                loop_until_finished("Some ID", timeout=100, schedule=schedule, stats=stats)
+
+        assert sleeps == [1, 2, 4, 8]
+
+        # 5 result queries and 2 status checks
+        assert stats == {"polls": 5, "spawns": 7}
+
+    def test_loop_records_trace(self, monkeypatch):
+        """Test that the loop records when the workflow was seen running and
+        when its results were found and downloaded."""
+        answers = iter(["Not ready", "Not ready", ["Ready", "At url"]])
+        archive = make_results_archive({"res": [1]})
+
+        with monkeypatch.context() as m:
+            m.setattr(time, "sleep", lambda *args: None)
+            m.setattr(
+                pennylane_orquestra.cli_actions, "workflow_details", lambda *args: "Running"
+            )
+            m.setattr(
+                pennylane_orquestra.cli_actions, "workflow_results", lambda *args: next(answers)
+            )
+            m.setattr(urllib.request, "urlopen", lambda arg: io.BytesIO(archive))
+
+            schedule = PollingSchedule(initial_delay=1, jitter=0, status_every=2)
+            trace = {}
+            res = loop_until_finished("Some ID", timeout=100, schedule=schedule, trace=trace)
+
+        assert res == {"res": [1]}
+        assert trace["running"] <= trace["finished"] <= trace["downloaded"]
+        assert trace["download_bytes"] == len(archive)
@@ -203,6 +203,46 @@ class TestOrquestraIntegration:
         assert np.allclose(res_orquestra, res_default_qubit)
         qml.disable_tape()
 
+    def test_jacobian_device(self):
+        """Test that the value of the jacobian computed by the device in a
+        single workflow corresponds to the value computed with the
+        default.qubit device."""
+        try_resp = qe_list_workflow()
+        need_login_msg = "token has expired, please log in again\n"
+
+        if need_login_msg in try_resp:
+            pytest.skip("Has not logged in to the Orquestra platform.")
+
+        qml.enable_tape()
+
+        qubits = 2
+        layers = 1
+        weights = qml.init.strong_ent_layers_uniform(layers, qubits)
+
+        dev1 = qml.device(
+            "orquestra.qiskit",
+            backend="statevector_simulator",
+            wires=qubits,
+            analytic=True,
+            keep_files=False,
+            device_jacobian=True,
+        )
+        dev2 = qml.device("default.qubit", wires=qubits, analytic=True)
+
+        def func(weights):
+            qml.templates.StronglyEntanglingLayers(weights, wires=range(qubits))
+            return qml.expval(qml.PauliZ(0))
+
+        orquestra_qnode = qml.QNode(func, dev1, diff_method="device")
+        default_qnode = qml.QNode(func, dev2)
+
+        res_orquestra = qml.grad(orquestra_qnode)(weights)
+        res_default_qubit = qml.grad(default_qnode)(weights)
+
+        assert np.allclose(res_orquestra, res_default_qubit)
+        qml.disable_tape()
+
+
 class TestOrquestraIBMQIntegration:
     def test_apply_x(self, token):
         """Test a simple circuit that applies PauliX on the first wire."""
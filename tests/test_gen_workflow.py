@@ -1,3 +1,4 @@
+import json
 import pytest
 import subprocess
 
@@ -97,3 +98,131 @@ class TestExpvalTemplate:
         compare_two_expval_steps(workflow["steps"][0], test_wf["steps"][0])
         compare_two_expval_steps(workflow["steps"][1], test_wf["steps"][1])
         assert workflow == test_wf
+
+    def test_parametric_step(self):
+        """Test that a parametric step runs the template step function and
+        receives the parameter table as an input."""
+        circuits = [qasm_circuit_default, "Some template"]
+        workflow = gw.gen_expval_workflow(
+            "qe-forest",
+            backend_specs_default,
+            circuits,
+            operator_string_default,
+            parameters=[None, "[[0.1], [0.2]]"],
+        )
+
+        regular, parametric = workflow["steps"]
+        assert regular["name"] == "run-circuit-and-get-expval-0"
+        assert parametric["name"] == "run-circuit-template-and-get-expval-1"
+
+        function = parametric["config"]["runtime"]["parameters"]["function"]
+        assert function == "run_circuit_template_and_get_expval"
+        assert parametric["inputs"][2] == {"circuit": "Some template", "type": "string"}
+        assert parametric["inputs"][3] == {"parameters": "[[0.1], [0.2]]", "type": "string"}
+        assert len(regular["inputs"]) == 3
+
+    def test_gradient_step(self):
+        """Test that a gradient step runs the gradient step function and
+        receives the parameters and the gradient recipes as inputs."""
+        workflow = gw.gen_expval_workflow(
+            "qe-forest",
+            backend_specs_default,
+            ["Some template"],
+            ['["[Z0]"]'],
+            parameters=["[0.1]"],
+            shifts=["[[0, [[0.5, 1, 1.57], [-0.5, 1, -1.57]]]]"],
+        )
+
+        step = workflow["steps"][0]
+        assert step["name"] == "run-circuit-template-and-get-gradient-0"
+        function = step["config"]["runtime"]["parameters"]["function"]
+        assert function == "run_circuit_template_and_get_gradient"
+        assert step["inputs"][3] == {"parameters": "[0.1]", "type": "string"}
+        assert step["inputs"][4] == {
+            "shifts": "[[0, [[0.5, 1, 1.57], [-0.5, 1, -1.57]]]]",
+            "type": "string",
+        }
+
+    def test_circuit_list_step(self):
+        """Test that a step computing several circuits runs the multi-circuit
+        step function and receives the list of circuits as input."""
+        circuits = json.dumps(["Some circuit", "Other circuit"])
+        ops = json.dumps([["[Z0]"], ["[Z0]", "[Z1]"]])
+        workflow = gw.gen_expval_workflow(
+            "qe-forest",
+            backend_specs_default,
+            [circuits, "Single circuit"],
+            [ops, '["[Z0]"]'],
+            circuit_lists=[True, False],
+        )
+
+        step = workflow["steps"][0]
+        assert step["name"] == "run-circuits-and-get-expval-0"
+        assert step["config"]["runtime"]["parameters"]["function"] == "run_circuits_and_get_expval"
+        assert step["inputs"][1] == {"operators": ops, "type": "string"}
+        assert step["inputs"][2] == {"circuits": circuits, "type": "string"}
+
+        step = workflow["steps"][1]
+        assert step["name"] == "run-circuit-and-get-expval-1"
+        assert step["inputs"][2] == {"circuit": "Single circuit", "type": "string"}
+
+    def test_steps_do_not_share_containers(self):
+        """Test that the steps created from the same skeleton can be modified
+        independently."""
+        circuits = [qasm_circuit_default, qasm_circuit_default]
+        workflow = gw.gen_expval_workflow(
+            "qe-forest", backend_specs_default, circuits, operator_string_default
+        )
+
+        workflow["steps"][0]["config"]["runtime"]["imports"].append("other")
+        workflow["steps"][0]["outputs"][0]["path"] = "other"
+
+        other = gw.gen_expval_workflow(
+            "qe-forest", backend_specs_default, circuits, operator_string_default
+        )
+        assert workflow["steps"][1] == other["steps"][1] == test_workflow["steps"][1]
+        assert other == test_workflow
+
+
+class TestSerializeWorkflow:
+    """Test serializing workflows into YAML."""
+
+    @pytest.mark.parametrize("resources", [None, resources_default])
+    def test_matches_python_emitter(self, resources):
+        """Test that the serialization is identical to the output of the pure
+        Python emitter."""
+        circuits = [qasm_circuit_default, "Some template", "Some template", "[]"]
+        workflow = gw.gen_expval_workflow(
+            "qe-qiskit",
+            backend_specs_default,
+            circuits,
+            operator_string_default * 2,
+            resources=resources,
+            parameters=[None, "[[0.1], [0.2]]", "[0.1]", None],
+            shifts=[None, None, "[[0, [[0.5, 1, 1.57]]]]", None],
+            circuit_lists=[False, False, False, True],
+        )
+
+        assert gw._c_emitter_compatible(workflow) == hasattr(yaml, "CDumper")
+        assert gw.serialize_workflow(workflow) == yaml.dump(workflow, sort_keys=False)
+
+    def test_matches_template(self):
+        """Test that the serialization of a workflow matches the serialization
+        of the pre-defined template."""
+        circuits = [qasm_circuit_default, qasm_circuit_default]
+        workflow = gw.gen_expval_workflow(
+            "qe-forest", backend_specs_default, circuits, operator_string_default
+        )
+
+        assert gw.serialize_workflow(workflow) == yaml.dump(test_workflow, sort_keys=False)
+
+    @pytest.mark.parametrize("value", ["tab\tseparated", "non-ASCII é", "space \nbreak"])
+    def test_double_quoted_strings(self, value):
+        """Test that workflows with strings emitted as double-quoted scalars
+        are serialized by the pure Python emitter."""
+        workflow = gw.gen_expval_workflow(
+            "qe-forest", backend_specs_default, [value * 20], operator_string_default
+        )
+
+        assert not gw._c_emitter_compatible(workflow)
+        assert gw.serialize_workflow(workflow) == yaml.dump(workflow, sort_keys=False)
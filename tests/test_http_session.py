@@ -0,0 +1,181 @@
+"""
+Unit tests for the ``http_session`` module, using a local HTTP server in
+place of the storage of the workflow results.
+"""
+import http.server
+import io
+import json
+import tarfile
+import threading
+import urllib.error
+
+import pytest
+
+import pennylane_orquestra
+from pennylane_orquestra.cli_actions import PollingSchedule, loop_until_finished
+from pennylane_orquestra.http_session import HTTPSession
+
+
+def results_archive(data):
+    """Creates a gzipped tar archive containing the workflow results."""
+    content = json.dumps(data).encode("utf-8")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        info = tarfile.TarInfo("workflow_result.json")
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+
+    return buffer.getvalue()
+
+
+class ResultsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the resources of the server, supporting conditional requests
+    and keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+
+        if self.path in server.redirects:
+            self.send_response(302)
+            self.send_header("Location", server.redirects[self.path])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if server.unavailable.get(self.path, 0) > 0 or self.path not in server.resources:
+            server.unavailable[self.path] = server.unavailable.get(self.path, 0) - 1
+            body = b"Not found"
+            self.send_response(404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        etag = f'"{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        body = server.resources[self.path]
+        server.payloads_sent += 1
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Runs a local HTTP server in a background thread."""
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ResultsHandler)
+    httpd.resources = {}
+    httpd.redirects = {}
+    httpd.unavailable = {}
+    httpd.requests = []
+    httpd.payloads_sent = 0
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestHTTPSession:
+    """Test the keep-alive HTTP session."""
+
+    def test_connection_reused(self, server):
+        """Test that a single connection is used for consecutive requests."""
+        server.resources = {"/a": b"first", "/b": b"second"}
+        session = HTTPSession()
+
+        assert session.get(server.url + "/a") == b"first"
+        assert session.get(server.url + "/b") == b"second"
+
+        with pytest.raises(urllib.error.HTTPError, match="404"):
+            session.get(server.url + "/missing")
+
+        assert session.get(server.url + "/a") == b"first"
+        assert session.stats["connections"] == 1
+        assert session.stats["requests"] == 4
+        session.close()
+
+    def test_conditional_request(self, server):
+        """Test that a resource requested again is not transferred again if
+        it did not change."""
+        server.resources = {"/res": b"payload"}
+        session = HTTPSession()
+
+        assert session.get(server.url + "/res") == b"payload"
+        assert session.get(server.url + "/res") == b"payload"
+
+        assert server.payloads_sent == 1
+        assert session.stats["not_modified"] == 1
+        session.close()
+
+    def test_redirect(self, server):
+        """Test that redirects are followed."""
+        server.resources = {"/target": b"payload"}
+        server.redirects = {"/source": "/target"}
+        session = HTTPSession()
+
+        assert session.get(server.url + "/source") == b"payload"
+        assert server.requests == ["/source", "/target"]
+        session.close()
+
+    def test_stale_connection_retried(self, server):
+        """Test that a request is retried on a new connection if the server
+        closed the idle connection."""
+        server.resources = {"/res": b"payload"}
+        session = HTTPSession(max_stored=0)
+
+        assert session.get(server.url + "/res") == b"payload"
+
+        # Close the idle connection as if the server dropped it
+        for connections in session._idle.values():
+            for connection in connections:
+                connection.sock.close()
+
+        assert session.get(server.url + "/res") == b"payload"
+        assert session.stats["connections"] == 2
+        session.close()
+
+    def test_unreachable(self):
+        """Test that a URLError is raised if the server cannot be reached."""
+        session = HTTPSession(timeout=1)
+        with pytest.raises(urllib.error.URLError):
+            session.get("http://127.0.0.1:1/res")
+
+    def test_loop_until_finished(self, server, monkeypatch):
+        """Test that the results are probed and downloaded using a single
+        connection, transferring the payload once."""
+        data = {"step0": {"expval": {"list": [0.5]}}}
+        server.resources = {"/results.tgz": results_archive(data)}
+        server.unavailable = {"/results.tgz": 2}
+        session = HTTPSession()
+
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "get_session", lambda: session)
+        monkeypatch.setattr(
+            pennylane_orquestra.cli_actions,
+            "workflow_results",
+            lambda *args: ["Workflow result:", f"Location: {server.url}/results.tgz"],
+        )
+
+        schedule = PollingSchedule(initial_delay=0, backoff=1, jitter=0, status_every=100)
+        assert loop_until_finished("Some ID", timeout=10, schedule=schedule) == data
+
+        assert server.requests == ["/results.tgz"] * 3
+        assert server.payloads_sent == 1
+        assert session.stats["connections"] == 1
+        session.close()
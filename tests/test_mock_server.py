@@ -0,0 +1,142 @@
+"""
+Unit tests for the ``mock_server`` module and the ``qe`` CLI shim built on top
+of it.
+"""
+import io
+import os
+import subprocess
+import time
+
+import numpy as np
+import pytest
+
+import pennylane as qml
+import pennylane_orquestra
+from pennylane_orquestra.cli_actions import parse_results_archive, qe_list, workflow_details
+from pennylane_orquestra.http_session import HTTPSession
+from pennylane_orquestra.transport import APITransport
+
+from mock_server import MockOrquestraServer, results_archive
+
+fast_polling = {"initial_delay": 0.01, "backoff": 1, "jitter": 0}
+
+workflow_yaml = """
+steps:
+- name: run-circuit-and-get-expval-0
+  inputs:
+  - operators: '["1 [Z0]"]'
+    type: string
+"""
+
+
+@pytest.fixture
+def workflow_file(tmpdir):
+    """Writes a minimal workflow file."""
+    path = tmpdir.join("expval.yaml")
+    path.write(workflow_yaml)
+    return str(path)
+
+
+class TestInjectedLatency:
+    """Test the options injecting latency and failures into the server."""
+
+    def test_failures(self, workflow_file):
+        """Test that workflows fail at the specified rate."""
+        with MockOrquestraServer(failure_rate=1) as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            workflow_id = transport.submit(workflow_file, keep_file=True)
+
+            with pytest.raises(ValueError, match="Something went wrong.*Failed"):
+                transport.wait(workflow_id, timeout=5)
+
+    def test_durations(self, workflow_file):
+        """Test that the durations of the workflows are spread around the
+        mean duration."""
+        with MockOrquestraServer(duration=10, duration_spread=0.5, seed=1) as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            for _ in range(20):
+                transport.submit(workflow_file, keep_file=True)
+
+            durations = [wf["finished"] - time.time() for wf in server._workflows.values()]
+
+        assert all(4.9 < d < 15 for d in durations)
+        assert len(set(durations)) == 20
+
+    def test_latency(self, workflow_file):
+        """Test that the responses are delayed."""
+        with MockOrquestraServer(latency=0.1) as server:
+            transport = APITransport(server.url, session=HTTPSession())
+
+            start = time.perf_counter()
+            transport.statuses(["unknown"])
+            assert time.perf_counter() - start >= 0.1
+
+    def test_large_slow_results(self, workflow_file):
+        """Test that padded results are parsed and that their download is
+        throttled."""
+        with MockOrquestraServer(result_padding=20000, download_rate=100000) as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            workflow_id = transport.submit(workflow_file, keep_file=True)
+
+            start = time.perf_counter()
+            res = transport.wait(workflow_id, timeout=5)
+            elapsed = time.perf_counter() - start
+
+        assert res["run-circuit-and-get-expval-0"]["expval"] == {"list": [0.0]}
+        assert elapsed >= 0.2
+
+    def test_padding(self):
+        """Test that the padding makes the archive larger but keeps the
+        results."""
+        data = {"res": [1]}
+        padded = results_archive(data, padding=5000)
+
+        assert len(padded) > len(results_archive(data)) + 5000
+        assert parse_results_archive(io.BytesIO(padded)) == data
+
+
+@pytest.mark.skipif(os.name == "nt", reason="The shim is a shell script")
+class TestQEShim:
+    """Test the emulation of the CLI on top of the server."""
+
+    @pytest.fixture
+    def shim_path(self, monkeypatch, tmpdir):
+        """Places the directory of the shim at the front of the path."""
+        monkeypatch.setenv("PATH", str(tmpdir) + os.pathsep + os.environ["PATH"])
+        return str(tmpdir)
+
+    def test_cli_queries(self, shim_path, workflow_file):
+        """Test that the output of the shim is parsed by the CLI actions."""
+        with MockOrquestraServer(failure_rate=1) as server:
+            server.write_qe_shim(shim_path)
+
+            workflow_id = pennylane_orquestra.cli_actions.qe_submit(workflow_file, keep_file=True)
+            assert workflow_id == "expval-0"
+            assert "Failed" in "".join(workflow_details(workflow_id))
+            assert any(workflow_id in line and "Failed" in line for line in qe_list())
+
+    def test_unknown_command(self, shim_path):
+        """Test that the usage is printed for unknown commands."""
+        with MockOrquestraServer() as server:
+            server.write_qe_shim(shim_path)
+            res = subprocess.run(["qe", "version"], stdout=subprocess.PIPE, check=True)
+
+        assert res.stdout.decode().startswith("Usage")
+
+    def test_device(self, shim_path, monkeypatch, tmpdir):
+        """Test that the device computes circuits through the CLI shim."""
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+
+        with MockOrquestraServer(duration=0.1) as server:
+            server.write_qe_shim(shim_path)
+            dev = qml.device("orquestra.forest", wires=2, cache=False, polling=fast_polling)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.Hadamard(0)
+                return qml.expval(qml.PauliZ(0)), qml.expval(qml.PauliZ(1))
+
+            assert np.allclose(circuit(), [0, 0])
+
+        assert server.stats["submissions"] == 1
+        assert server.stats["downloads"] == 1
@@ -1,14 +1,19 @@
 import pytest
 import subprocess
 import os
+import re
+import json
 import uuid
+import threading
 import time
 import numpy as np
+import yaml
 
 import pennylane as qml
 import pennylane.tape
 import pennylane_orquestra
 from pennylane_orquestra import OrquestraDevice, QeQiskitDevice, QeIBMQDevice
+from pennylane_orquestra.utils import _bind_parameters
 from conftest import (
     test_batch_res0,
     test_batch_res1,
@@ -228,6 +233,259 @@ class TestBaseDevice:
             assert recorder[0] == resources
 
 
+    def test_polling_schedule_and_stats(self, monkeypatch, tmpdir):
+        """Test that the polling options are passed to the polling schedule and
+        that the statistics of waiting for each workflow are recorded."""
+        dev = qml.device("orquestra.qiskit", wires=2, polling={"initial_delay": 2, "jitter": 0})
+        assert dev._polling.initial_delay == 2
+        assert dev._polling.jitter == 0
+
+        mock_res_dict = {"First": {"expval": {"list": [123456789]}}}
+        recorder = []
+
+        def mock_loop(workflow_id, **kwargs):
+            recorder.append(kwargs["schedule"])
+            kwargs["stats"]["polls"] += 3
+            kwargs["stats"]["spawns"] += 3
+            return mock_res_dict
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+
+            # Disable submitting to the Orquestra platform by mocking Popen
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.PauliX(0)
+                return qml.expval(qml.PauliZ(0))
+
+            assert circuit() == 123456789
+
+        assert recorder == [dev._polling]
+
+        # The submission is also counted as a CLI call
+        assert dev.poll_stats == {"SomeWorkflowID": {"polls": 3, "spawns": 4}}
+
+    def test_traces(self, monkeypatch, tmpdir):
+        """Test that the trace of each workflow is stored and passed to the
+        trace callback."""
+        traces = []
+        dev = qml.device("orquestra.qiskit", wires=2, trace_callback=traces.append, max_traces=2)
+        mock_res_dict = {"First": {"expval": {"list": [123456789]}}}
+
+        def mock_loop(workflow_id, **kwargs):
+            kwargs["stats"]["polls"] += 2
+            kwargs["trace"]["finished"] = time.perf_counter()
+            return mock_res_dict
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.PauliX(0)
+                return qml.expval(qml.PauliZ(0))
+
+            for _ in range(3):
+                circuit()
+
+        # Only the most recent traces are stored
+        assert len(traces) == 3
+        assert dev.traces == traces[1:]
+
+        trace = traces[0]
+        assert trace["workflow_id"] == "SomeWorkflowID"
+        assert trace["steps"] == 1
+        assert trace["payload_bytes"] > 0
+        assert trace["download_bytes"] is None
+        assert (trace["polls"], trace["spawns"]) == (2, 1)
+        assert trace["error"] is None
+        assert trace["submitted_at"] <= time.time()
+
+        timings = trace["timings"]
+        assert timings["queue"] is None
+        assert timings["download"] is None
+
+        stages = ["serialize", "generate", "write", "pending", "submit", "run", "parse"]
+        assert all(timings[stage] >= 0 for stage in stages)
+        assert timings["total"] == pytest.approx(sum(timings[stage] for stage in stages))
+
+    def test_trace_failed_workflow(self, monkeypatch, tmpdir):
+        """Test that the trace of a failed workflow records the error."""
+        traces = []
+        dev = qml.device("orquestra.qiskit", wires=2, trace_callback=traces.append)
+
+        def mock_loop(workflow_id, **kwargs):
+            raise ValueError("Something went wrong with executing the workflow.")
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.PauliX(0)
+                return qml.expval(qml.PauliZ(0))
+
+            with pytest.raises(ValueError, match="Something went wrong"):
+                circuit()
+
+        assert len(traces) == 1
+        assert "Something went wrong" in traces[0]["error"]
+        assert traces[0]["timings"]["submit"] >= 0
+        assert traces[0]["timings"]["wait"] is None
+
+
+class TestJacobian:
+    """Test computing the Jacobian using the device."""
+
+    def test_provides_jacobian(self):
+        """Test that the device provides the Jacobian only if requested and
+        only in tape mode."""
+        dev = QeQiskitDevice(wires=1, device_jacobian=True)
+        assert not dev.capabilities()["provides_jacobian"]
+
+        qml.enable_tape()
+        assert dev.capabilities()["provides_jacobian"]
+        assert not QeQiskitDevice(wires=1).capabilities()["provides_jacobian"]
+        assert not QeQiskitDevice.capabilities()["provides_jacobian"]
+        qml.disable_tape()
+
+    def test_best_diff_method(self):
+        """Test that QNodes differentiate using PennyLane by default and
+        using the device if the Jacobian was requested."""
+        qml.enable_tape()
+
+        def func(x):
+            qml.RX(x, wires=0)
+            return qml.expval(qml.PauliZ(0))
+
+        qnode = qml.QNode(func, QeQiskitDevice(wires=1))
+        assert qnode.diff_options["method"] != "device"
+
+        qnode = qml.QNode(func, QeQiskitDevice(wires=1, device_jacobian=True))
+        assert qnode.diff_options["method"] == "device"
+        qml.disable_tape()
+
+    def test_jacobian_single_step(self, monkeypatch, tmpdir):
+        """Test that the template of the circuit, its parameters and the
+        gradient recipes are sent in a single workflow step and that the
+        Jacobian is assembled from the gradients returned."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=3)
+
+        with qml.tape.JacobianTape() as tape:
+            qml.RX(0.4, wires=0)
+            qml.RZ(0.3, wires=0)
+            qml.RY(0.2, wires=1)
+            qml.expval(qml.PauliZ(0))
+            qml.expval(qml.Identity(2))
+            qml.expval(qml.PauliZ(1))
+
+        tape.trainable_params = {0, 2}
+
+        submitted = []
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.append((circuits, operators, kwargs["parameters"], kwargs["shifts"]))
+
+        # The gradient of each operator for each parameter
+        test_result = {"step0": {"expval": {"list": [[0.1, 0.2], [0.3, 0.4]]}}}
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            jac = dev.jacobian(tape)
+
+        expected = np.array([[0.1, 0.3], [0, 0], [0.2, 0.4]])
+        assert np.allclose(jac, expected)
+
+        assert len(submitted) == 1
+        circuits, operators, parameters, shifts = submitted[0]
+        assert "rx({p0}) q[0];\nrz({p1}) q[0];\nry({p2}) q[1];" in circuits[0]
+        assert operators == ['["1 [Z0]", "1 [Z1]"]']
+        assert parameters == ["[0.4, 0.3, 0.2]"]
+
+        # The template positions of the trainable parameters
+        shifts = json.loads(shifts[0])
+        assert [position for position, _ in shifts] == [0, 2]
+
+        recipe = [[0.5, 1.0, np.pi / 2], [-0.5, 1.0, -np.pi / 2]]
+        assert np.allclose(shifts[0][1], recipe)
+        qml.disable_tape()
+
+    def test_jacobian_shifted_circuits(self, monkeypatch, tmpdir):
+        """Test that the shifted circuits are computed by a single workflow if
+        the circuit cannot be represented by a template."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=2)
+
+        with qml.tape.JacobianTape() as tape:
+            qml.CRot(0.1, 0.2, 0.3, wires=[0, 1])
+            qml.expval(qml.PauliZ(1))
+
+        tape.trainable_params = {0}
+
+        submitted = []
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.append(circuits)
+
+        recipe = tape.operations[0].get_parameter_shift(0)
+        test_result = {
+            f"step{idx}": {"expval": {"list": [idx + 1]}, "stepName": f"step-{idx}"}
+            for idx in range(len(recipe))
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            jac = dev.jacobian(tape)
+
+        expected = sum(c * (idx + 1) for idx, (c, _, _) in enumerate(recipe))
+        assert np.allclose(jac, [[expected]])
+
+        # A single workflow with a step for each shifted circuit
+        assert len(submitted) == 1
+        assert len(submitted[0]) == len(recipe)
+        qml.disable_tape()
+
+    def test_jacobian_identity(self, monkeypatch):
+        """Test that no workflow is submitted if only the identity is
+        measured."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=1)
+
+        with qml.tape.JacobianTape() as tape:
+            qml.RX(0.4, wires=0)
+            qml.expval(qml.Identity(0))
+
+        with monkeypatch.context() as m:
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: pytest.fail("Submitted"))
+            assert np.allclose(dev.jacobian(tape), [[0]])
+
+        qml.disable_tape()
+
+
 class TestCreateBackendSpecs:
     """Test the create_backend_specs function"""
 
@@ -293,6 +551,163 @@ class TestSerializeCircuit:
         assert qasm == expected
 
 
+    def test_serialization_cache(self):
+        """Test that serializing circuits with the same operations, parameters
+        and wires reuses the cached serialization."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=2, backend="statevector_simulator", analytic=True)
+
+        def make_tape(param, obs):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(param, wires=0)
+                qml.CNOT(wires=[0, 1])
+                qml.expval(obs)
+
+            return tape
+
+        qasm = dev.serialize_circuit(make_tape(0.1, qml.PauliZ(0)).graph)
+        assert dev.serialization_cache_info["misses"] == 1
+
+        # Same operations, different observable: no rotations in analytic mode
+        assert dev.serialize_circuit(make_tape(0.1, qml.PauliX(0)).graph) == qasm
+        assert dev.serialization_cache_info["hits"] == 1
+
+        # Different parameter
+        new_qasm = dev.serialize_circuit(make_tape(0.2, qml.PauliZ(0)).graph)
+        assert new_qasm != qasm
+        assert "rx(0.2)" in new_qasm
+        assert dev.serialization_cache_info == {"hits": 1, "misses": 2, "size": 2, "maxsize": 128}
+        qml.disable_tape()
+
+    def test_serialization_cache_rotations(self):
+        """Test that the observables are part of the cache key when rotations
+        are included in the serialization."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=1, shots=1000, backend="qasm_simulator", analytic=False)
+
+        with qml.tape.QuantumTape() as tape1:
+            qml.Hadamard(wires=[0])
+            qml.expval(qml.PauliZ(0))
+
+        with qml.tape.QuantumTape() as tape2:
+            qml.Hadamard(wires=[0])
+            qml.expval(qml.PauliX(0))
+
+        qasm1 = dev.serialize_circuit(tape1.graph)
+        qasm2 = dev.serialize_circuit(tape2.graph)
+
+        assert qasm1 != qasm2
+        assert dev.serialization_cache_info["misses"] == 2
+        assert dev.serialize_circuit(tape2.graph) == qasm2
+        assert dev.serialization_cache_info["hits"] == 1
+        qml.disable_tape()
+
+    def test_serialization_keeps_tape_operations(self):
+        """Test that including the rotations in the serialization of a tape
+        does not append the diagonalizing gates to the operations of the
+        tape."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(
+            wires=1, shots=1000, backend="qasm_simulator", analytic=False, circuit_cache_size=0
+        )
+
+        with qml.tape.QuantumTape() as tape:
+            qml.Hadamard(wires=[0])
+            qml.expval(qml.PauliX(0))
+
+        qasm = dev.serialize_circuit(tape.graph)
+
+        assert len(tape.operations) == 1
+        assert dev.serialize_circuit(tape.graph) == qasm
+        qml.disable_tape()
+
+    def test_serialization_cache_disabled(self):
+        """Test that no circuits are stored if the cache size is zero."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=1, backend="statevector_simulator", circuit_cache_size=0)
+
+        with qml.tape.QuantumTape() as tape:
+            qml.Hadamard(wires=[0])
+            qml.expval(qml.PauliZ(0))
+
+        dev.serialize_circuit(tape.graph)
+        dev.serialize_circuit(tape.graph)
+        assert dev.serialization_cache_info == {"hits": 0, "misses": 2, "size": 0, "maxsize": 0}
+        qml.disable_tape()
+
+    def test_serialize_circuit_template(self):
+        """Test that circuits only differing in their parameters share the
+        same template and that binding the parameters recovers their
+        serialization."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=2, backend="statevector_simulator", analytic=True)
+
+        def make_tape(a, b):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(a, wires=0)
+                qml.Rot(b, 0.3, a, wires=1)
+                qml.CNOT(wires=[0, 1])
+                qml.expval(qml.PauliZ(0))
+
+            return tape
+
+        template, row = dev.serialize_circuit_template(make_tape(0.1, 0.2).graph)
+        expected = (
+            'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nrx({p0}) q[0];\n'
+            "rz({p1}) q[1];\nry({p2}) q[1];\nrz({p3}) q[1];\ncx q[0],q[1];\n"
+        )
+        assert template == expected
+        assert row == [0.1, 0.2, 0.3, 0.1]
+
+        tape = make_tape(np.array(0.5), 1)
+        new_template, row = dev.serialize_circuit_template(tape.graph)
+        assert new_template == template
+        assert row == [0.5, 1, 0.3, 0.5]
+        assert _bind_parameters(template, row) == dev.serialize_circuit(tape.graph)
+
+        # The template is created once
+        assert dev.serialization_cache_info["hits"] == 1
+        qml.disable_tape()
+
+    def test_serialize_circuit_template_rotations(self):
+        """Test that the rotations diagonalizing the observables are included
+        in the template."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=1, shots=1000, backend="qasm_simulator", analytic=False)
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RY(0.4, wires=0)
+            qml.expval(qml.PauliX(0))
+
+        template, row = dev.serialize_circuit_template(tape.graph)
+        assert template.endswith("ry({p0}) q[0];\nh q[0];\n")
+        assert row == [0.4]
+        qml.disable_tape()
+
+    def test_serialize_circuit_no_template(self):
+        """Test that no template is created for circuits whose serialization
+        depends on a function of their parameters or whose parameters are not
+        scalars."""
+        qml.enable_tape()
+        dev = QeQiskitDevice(wires=2, backend="statevector_simulator", analytic=True)
+
+        with qml.tape.QuantumTape() as tape1:
+            # Decomposed into gates depending on half the angles
+            qml.CRot(0.1, 0.2, 0.3, wires=[0, 1])
+            qml.expval(qml.PauliZ(0))
+
+        with qml.tape.QuantumTape() as tape2:
+            qml.BasisState(np.array([1, 0]), wires=[0, 1])
+            qml.expval(qml.PauliZ(0))
+
+        assert dev.serialize_circuit_template(tape1.graph) is None
+        assert dev.serialize_circuit_template(tape2.graph) is None
+
+        # The parameters of the operations are restored
+        assert tape1.graph.operations[0].parameters == [0.1, 0.2, 0.3]
+        qml.disable_tape()
+
+
 mx = np.diag(np.array([1, 2, 3, 4]))
 
 obs_serialize = [
@@ -371,6 +786,60 @@ class TestSerializeOperator:
         op_str = dev.qubit_operator_string(obs)
         assert op_str == expected
 
+    def test_qubit_operator_permuted_int_wires(self):
+        """Test that the qubit of each wire is its index on a device with
+        permuted integer wire labels."""
+        dev = QeQiskitDevice(wires=[2, 0, 1], backend="statevector_simulator", analytic=True)
+        assert dev.qubit_operator_string(qml.PauliZ(2) @ qml.PauliX(1)) == "1 [Z0 X2]"
+        assert dev.qubit_operator_string(qml.Hadamard(0)) == (
+            "0.7071067811865475 [X1] + 0.7071067811865475 [Z1]"
+        )
+
+    def test_qubit_operator_wires_not_processed(self, monkeypatch):
+        """Test that the wire index built by the device is used instead of
+        processing the device wires for every observable."""
+        dev = QeQiskitDevice(
+            wires=["a", "b"], backend="statevector_simulator", analytic=True, operator_cache_size=0
+        )
+
+        def mock_process_wires(*args, **kwargs):
+            raise AssertionError("The wires were processed")
+
+        monkeypatch.setattr(pennylane_orquestra.utils, "_process_wires", mock_process_wires)
+        assert dev.qubit_operator_string(qml.PauliZ("b") @ qml.PauliX("a")) == "1 [Z1 X0]"
+
+    def test_operator_cache(self, monkeypatch):
+        """Test that serializing the same observable again reuses the cached
+        string and that the cache can be cleared."""
+        dev = QeQiskitDevice(wires=3, backend="statevector_simulator", analytic=True)
+        mat = np.array([[1, 2j], [-2j, 0]])
+
+        decompositions = []
+        decompose = dev._decompose_observable
+
+        def mock_decompose(observable):
+            decompositions.append(observable)
+            return decompose(observable)
+
+        monkeypatch.setattr(dev, "_decompose_observable", mock_decompose)
+
+        op_str = dev.qubit_operator_string(qml.Hermitian(mat, wires=[1]) @ qml.PauliZ(0))
+        assert op_str == dev.qubit_operator_string(qml.Hermitian(mat, wires=[1]) @ qml.PauliZ(0))
+        assert len(decompositions) == 1
+        assert dev.operator_cache_info == {"hits": 1, "misses": 1, "size": 1, "maxsize": 128}
+
+        # Different matrix, wires or order of the factors
+        dev.qubit_operator_string(qml.Hermitian(mat.conj(), wires=[1]) @ qml.PauliZ(0))
+        dev.qubit_operator_string(qml.Hermitian(mat, wires=[2]) @ qml.PauliZ(0))
+        dev.qubit_operator_string(qml.PauliZ(0) @ qml.Hermitian(mat, wires=[1]))
+        assert len(decompositions) == 4
+        assert dev.operator_cache_info["hits"] == 1
+
+        dev.clear_operator_cache()
+        assert dev.operator_cache_info == {"hits": 0, "misses": 0, "size": 0, "maxsize": 128}
+        dev.qubit_operator_string(qml.Hermitian(mat, wires=[1]) @ qml.PauliZ(0))
+        assert len(decompositions) == 5
+
     @pytest.mark.parametrize("obs, expected", serialize_needs_rot)
     def test_serialize_operator_needs_rotation(self, obs, expected):
         """Test that a device that needs to include rotations serializes the
@@ -437,6 +906,216 @@ class TestSerializeOperator:
                 circuit()
 
 
+class TestGrouping:
+    """Test measuring qubit-wise commuting groups of terms in sampling
+    mode."""
+
+    @pytest.mark.parametrize(
+        "obs, expected",
+        [
+            (qml.PauliZ(1), [(1, ((1, "PauliZ"),))]),
+            (qml.Identity(0), [(1, ())]),
+            (qml.PauliY(1) @ qml.Hadamard(0), [(1, ((0, "Hadamard"), (1, "PauliY")))]),
+            (qml.PauliX(0) @ qml.Identity(1), [(1, ((0, "PauliX"),))]),
+            (
+                qml.Hermitian(mx, wires=[0, 1]),
+                [(2.5, ()), (-0.5, ((1, "PauliZ"),)), (-1.0, ((0, "PauliZ"),))],
+            ),
+        ],
+    )
+    def test_measurement_terms(self, obs, expected):
+        """Test that observables are split into words of single-qubit
+        observables that can be measured by rotations."""
+        dev = qml.device("orquestra.forest", wires=2, analytic=False)
+        assert dev.measurement_terms(obs) == expected
+
+    def test_grouped_execution(self, monkeypatch, tmpdir):
+        """Test that a rotated circuit is submitted for each group of
+        qubit-wise commuting terms and that the results are recombined."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=2, analytic=False, grouping=True)
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RX(0.1, wires=0)
+            qml.expval(qml.PauliZ(0) @ qml.PauliZ(1))
+            qml.expval(qml.PauliX(0))
+            qml.expval(qml.PauliZ(1))
+            qml.expval(qml.Identity(0))
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators)
+
+        test_result = {
+            "step0": {"expval": {"list": [0.5, 0.25]}, "stepName": "a-0"},
+            "step1": {"expval": {"list": [0.75]}, "stepName": "b-1"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.execute(tape)
+
+        assert np.allclose(res, [0.5, 0.75, 0.25, 1])
+
+        # Two groups: {Z0 Z1, Z1} and {X0}
+        base = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nrx(0.1) q[0];\n'
+        assert submitted["circuits"] == [base, base + "h q[0];\n"]
+        assert submitted["operators"] == ['["[Z0 Z1]", "[Z1]"]', '["[Z0]"]']
+        qml.disable_tape()
+
+    def test_compatible_observables_single_group(self, monkeypatch, tmpdir):
+        """Test that qubit-wise commuting observables are measured by a single
+        circuit rotated in the same way as without grouping."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=3, analytic=False, grouping=True)
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RX(0.1, wires=0)
+            qml.expval(qml.PauliY(0) @ qml.Hadamard(1))
+            qml.expval(qml.PauliX(2))
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators)
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: {"step0": {"expval": {"list": [0.1, 0.2]}}},
+            )
+
+            res = dev.execute(tape)
+
+        assert np.allclose(res, [0.1, 0.2])
+        assert submitted["circuits"] == [dev.serialize_circuit(tape.graph)]
+        assert submitted["operators"] == ['["[Z0 Z1]", "[Z2]"]']
+        qml.disable_tape()
+
+
+
+class TestHamiltonian:
+    """Test computing the expectation value of Hamiltonians."""
+
+    def test_encode_hamiltonian(self):
+        """Test that the terms of a Hamiltonian are encoded by their
+        coefficients and X and Z bitmasks over the device wires."""
+        dev = qml.device("orquestra.forest", wires=["a", "b", "c"])
+        H = qml.Hamiltonian(
+            [0.5, -1, 2],
+            [qml.PauliX("a") @ qml.PauliY("c"), qml.Identity("b"), qml.PauliZ("b")],
+        )
+
+        encoding = json.loads(dev.encode_hamiltonian(H))
+        assert encoding == {"coeffs": [0.5, -1.0, 2.0], "x": [5, 0, 0], "z": [4, 0, 2]}
+
+    def test_encode_hamiltonian_decomposition(self):
+        """Test that terms that are not Pauli words are decomposed."""
+        dev = qml.device("orquestra.forest", wires=2)
+        H = qml.Hamiltonian([2], [qml.Hermitian(mx, wires=[0, 1])])
+
+        encoding = json.loads(dev.encode_hamiltonian(H))
+        assert encoding == {"coeffs": [5.0, -1.0, -2.0], "x": [0, 0, 0], "z": [0, 2, 1]}
+
+    def test_hamiltonian_expval(self, monkeypatch, tmpdir):
+        """Test that the encoded Hamiltonian is computed for each circuit by
+        a single workflow."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=2, cache=False)
+        H = qml.Hamiltonian([0.5, 1], [qml.PauliX(0) @ qml.PauliZ(1), qml.PauliY(1)])
+
+        circuits = []
+        for param in [0.1, 0.2]:
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(param, wires=0)
+                qml.CNOT(wires=[0, 1])
+
+            circuits.append(tape)
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators)
+
+        test_result = {
+            "step0": {"expval": {"list": [0.25]}, "stepName": "a-0"},
+            "step1": {"expval": {"list": [-0.5]}, "stepName": "b-1"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.hamiltonian_expval(circuits, H)
+
+        assert np.allclose(res, [0.25, -0.5])
+        assert "qreg q[2];" in submitted["circuits"][0]
+        assert "rx(0.2) q[0];" in submitted["circuits"][1]
+        assert submitted["operators"] == [json.dumps([dev.encode_hamiltonian(H)])] * 2
+        qml.disable_tape()
+
+    def test_hamiltonian_expval_sampling(self, monkeypatch, tmpdir):
+        """Test that the terms of the Hamiltonian are measured in groups of
+        qubit-wise commuting terms in sampling mode."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=2, analytic=False)
+        H = qml.Hamiltonian(
+            [0.5, 2, -1, 3],
+            [qml.PauliZ(0) @ qml.PauliZ(1), qml.PauliZ(1), qml.PauliX(0), qml.Identity(1)],
+        )
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RX(0.1, wires=0)
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators)
+
+        test_result = {
+            "step0": {"expval": {"list": [0.5, 0.25]}, "stepName": "a-0"},
+            "step1": {"expval": {"list": [0.75]}, "stepName": "b-1"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.hamiltonian_expval([tape], H)
+
+        assert np.allclose(res, [0.5 * 0.5 + 2 * 0.25 - 0.75 + 3])
+
+        base = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\nrx(0.1) q[0];\n'
+        assert submitted["circuits"] == [base, base + "h q[0];\n"]
+        assert submitted["operators"] == ['["[Z0 Z1]", "[Z1]"]', '["[Z0]"]']
+        qml.disable_tape()
+
+
 class TestExecute:
     """Tests for the execute method of the base OrquestraDevice class."""
 
@@ -647,6 +1326,45 @@ class TestBatchExecute:
 
         qml.disable_tape()
 
+    def test_batch_exec_from_memory(self, monkeypatch, tmpdir, test_batch_result):
+        """Test that the workflow is piped to the CLI without writing any file
+        unless the files should be kept."""
+        qml.enable_tape()
+        dev = qml.device("orquestra.forest", wires=3)
+        processes = []
+
+        def mock_popen(args, **kwargs):
+            processes.append((args, MockPopen()))
+            return processes[-1][1]
+
+        with qml.tape.QuantumTape() as tape:
+            qml.RX(0.432, wires=0)
+            qml.expval(qml.PauliZ(wires=[0]))
+
+        data_dir = tmpdir.join("data")
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: data_dir)
+            m.setattr(subprocess, "Popen", mock_popen)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_batch_result,
+            )
+
+            dev.batch_execute([tape])
+
+        assert not os.path.exists(data_dir)
+        assert dev.filenames == []
+
+        args, process = processes[0]
+        assert args[:3] == ["qe", "submit", "workflow"]
+
+        workflow = yaml.safe_load(process.input)
+        assert len(workflow["steps"]) == 1
+        assert dev.traces[0]["payload_bytes"] == len(process.input)
+
+        qml.disable_tape()
+
     @pytest.mark.parametrize("keep", [True, False])
     @pytest.mark.parametrize(
         "dev_name", ["orquestra.forest", "orquestra.qiskit", "orquestra.qulacs"]
@@ -685,6 +1403,11 @@ class TestBatchExecute:
         assert not os.path.exists(tmpdir.join(f"expval-{test_uuid}-1.yaml"))
         assert not os.path.exists(tmpdir.join(f"expval-{test_uuid}-2.yaml"))
 
+        # Each workflow contains a single step: return the result of each step
+        # of the test result in a separate workflow
+        get_step_name = lambda dct: dct["stepName"]
+        step_results = iter(sorted(test_batch_result.values(), key=get_step_name))
+
         with monkeypatch.context() as m:
             m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
 
@@ -693,7 +1416,7 @@ class TestBatchExecute:
             m.setattr(
                 pennylane_orquestra.orquestra_device,
                 "loop_until_finished",
-                lambda *args, **kwargs: test_batch_result,
+                lambda *args, **kwargs: {"expval-id": next(step_results)},
             )
 
             # Disable random uuid generation
@@ -765,3 +1488,450 @@ class TestBatchExecute:
                 assert np.allclose(r, e)
 
         qml.disable_tape()
+
+    @pytest.mark.parametrize("max_workflows", [None, 1, 2])
+    def test_batch_exec_concurrent(self, max_workflows, tmpdir, monkeypatch):
+        """Test that the batch_execute method returns the results in the order
+        in which the circuits were submitted when the workflows are executed
+        concurrently and that the number of workflows in flight is capped."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(4):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.1 * idx, wires=0)
+                qml.expval(qml.PauliZ(wires=[0]))
+
+            circuits.append(tape)
+
+        dev = qml.device(
+            "orquestra.qulacs",
+            wires=2,
+            batch_size=1,
+            concurrent=True,
+            max_workflows=max_workflows,
+        )
+
+        in_flight = []
+        max_in_flight = []
+        submitted = []
+
+        def mock_submit(data):
+            submitted.append(data)
+
+            # The index of the circuit is recovered from its rotation angle
+            angle = re.search(r"rx\((.*)\)", data).group(1)
+            return str(round(float(angle) / 0.1))
+
+        def mock_loop(workflow_id, **kwargs):
+            in_flight.append(workflow_id)
+            max_in_flight.append(len(in_flight))
+
+            # Later workflows finish earlier
+            time.sleep(0.05 * (4 - int(workflow_id)))
+            in_flight.remove(workflow_id)
+            return {"First": {"expval": {"list": [int(workflow_id)]}, "stepName": "a-0"}}
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(pennylane_orquestra.orquestra_device, "qe_submit_yaml", mock_submit)
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            res = dev.batch_execute(circuits)
+
+        assert len(submitted) == 4
+        assert np.allclose(res, [[0], [1], [2], [3]])
+
+        cap = max_workflows or len(circuits)
+        assert max(max_in_flight) <= cap
+
+        qml.disable_tape()
+
+    def test_batch_exec_concurrent_serializes_on_calling_thread(self, tmpdir, monkeypatch):
+        """Test that the circuits are serialized and the workflows are
+        generated by the calling thread when the workflows are executed
+        concurrently, such that only the submissions run in worker threads."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(3):
+            with qml.tape.QuantumTape() as tape:
+                qml.Hadamard(wires=0)
+                qml.RX(0.1 * idx, wires=0)
+                qml.expval(qml.PauliZ(wires=[0]))
+
+            circuits.append(tape)
+
+        dev = qml.device(
+            "orquestra.qulacs", wires=1, batch_size=1, concurrent=True, circuit_cache_size=0
+        )
+        threads = {"serialize": set(), "generate": set(), "submit": set()}
+
+        serialize_circuit = dev.serialize_circuit
+        gen_workflow = pennylane_orquestra.orquestra_device.gen_expval_workflow
+
+        def mock_serialize(*args, **kwargs):
+            threads["serialize"].add(threading.current_thread())
+            return serialize_circuit(*args, **kwargs)
+
+        def mock_gen_workflow(*args, **kwargs):
+            threads["generate"].add(threading.current_thread())
+            return gen_workflow(*args, **kwargs)
+
+        def mock_submit(data):
+            threads["submit"].add(threading.current_thread())
+            return re.search(r"rx\((.*)\)", data).group(1)
+
+        def mock_loop(workflow_id, **kwargs):
+            return {"First": {"expval": {"list": [float(workflow_id)]}, "stepName": "a-0"}}
+
+        with monkeypatch.context() as m:
+            m.setattr(dev, "serialize_circuit", mock_serialize)
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(pennylane_orquestra.orquestra_device, "qe_submit_yaml", mock_submit)
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            res = dev.batch_execute(circuits)
+
+        assert np.allclose(res, [[0], [0.1], [0.2]])
+        assert threads["serialize"] == threads["generate"] == {threading.current_thread()}
+        assert threading.current_thread() not in threads["submit"]
+
+        qml.disable_tape()
+
+    def test_batch_exec_concurrent_submit_timing(self, monkeypatch):
+        """Test that the time a workflow waited for a thread to submit it is
+        not part of its submission time."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(3):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.1 * idx, wires=0)
+                qml.expval(qml.PauliZ(wires=[0]))
+
+            circuits.append(tape)
+
+        dev = qml.device(
+            "orquestra.qulacs", wires=1, batch_size=1, concurrent=True, max_workflows=1
+        )
+
+        def mock_submit(data):
+            time.sleep(0.1)
+            return "SomeWorkflowID"
+
+        def mock_loop(workflow_id, **kwargs):
+            return {"First": {"expval": {"list": [0.0]}, "stepName": "a-0"}}
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.orquestra_device, "qe_submit_yaml", mock_submit)
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            dev.batch_execute(circuits)
+
+        timings = [trace["timings"] for trace in dev.traces]
+        assert all(0.1 <= t["submit"] < 0.15 for t in timings)
+        assert max(t["pending"] for t in timings) >= 0.15
+
+        qml.disable_tape()
+
+    def test_batch_exec_auto_batch_size(self, tmpdir, monkeypatch):
+        """Test that the batch size is chosen automatically and that the
+        duration of each workflow is recorded."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(25):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.01 * idx, wires=0)
+                qml.expval(qml.PauliZ(0))
+
+            circuits.append(tape)
+
+        dev = qml.device("orquestra.forest", wires=1, batch_size="auto", cache=False)
+        assert dev.batch_stats == {"workflows": [], "choices": []}
+
+        num_steps = []
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            num_steps.append(len(circuits))
+
+        def mock_loop(workflow_id, **kwargs):
+            return {
+                f"step{idx}": {"expval": {"list": [idx]}, "stepName": f"a-{idx}"}
+                for idx in range(num_steps[-1])
+            }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            res = dev.batch_execute(circuits)
+
+        # The initial batch size is used until a model can be fitted
+        assert num_steps == [10, 10, 5]
+        assert np.allclose(res, [[idx % 10] for idx in range(25)])
+
+        stats = dev.batch_stats
+        assert [w["circuits"] for w in stats["workflows"]] == [10, 10, 5]
+        assert [w["steps"] for w in stats["workflows"]] == [10, 10, 5]
+        assert all(w["total"] >= w["submission"] >= 0 for w in stats["workflows"])
+        assert stats["choices"] == [
+            {"circuits": 25, "parallel": 1, "batch_size": 10, "model": None, "predicted": None}
+        ]
+        qml.disable_tape()
+
+    def test_batch_exec_auto_batch_size_concurrent(self, monkeypatch):
+        """Test that the time a workflow waited for a thread to submit it is
+        not recorded as part of its submission for choosing the batch
+        size."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(25):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.01 * idx, wires=0)
+                qml.expval(qml.PauliZ(0))
+
+            circuits.append(tape)
+
+        dev = qml.device(
+            "orquestra.forest", wires=1, batch_size="auto", concurrent=True, max_workflows=1
+        )
+
+        def mock_submit(data):
+            time.sleep(0.1)
+            return "SomeWorkflowID"
+
+        def mock_loop(workflow_id, **kwargs):
+            return {
+                f"step{idx}": {"expval": {"list": [idx]}, "stepName": f"a-{idx}"}
+                for idx in range(10)
+            }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.orquestra_device, "qe_submit_yaml", mock_submit)
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            dev.batch_execute(circuits)
+
+        workflows = dev.batch_stats["workflows"]
+        assert [obs["circuits"] for obs in workflows] == [10, 10, 5]
+        assert all(0.1 <= obs["submission"] < 0.15 for obs in workflows)
+
+        qml.disable_tape()
+
+    def test_batch_exec_auto_batch_size_records_circuits(self, tmpdir, monkeypatch):
+        """Test that the number of circuits of each batch is recorded rather
+        than the number of steps and that only the workflows of batch
+        executions are recorded."""
+        qml.enable_tape()
+
+        circuits = []
+        for _ in range(12):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.1, wires=0)
+                qml.expval(qml.PauliZ(0))
+
+            circuits.append(tape)
+
+        dev = qml.device("orquestra.forest", wires=1, batch_size="auto", cache=False)
+
+        def mock_loop(workflow_id, **kwargs):
+            return {"step0": {"expval": {"list": [0.5]}, "stepName": "a-0"}}
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "loop_until_finished", mock_loop)
+
+            dev.execute(circuits[0])
+            res = dev.batch_execute(circuits)
+
+        assert np.allclose(res, 0.5)
+
+        # The identical circuits of a batch are computed by a single step
+        stats = dev.batch_stats
+        assert [w["circuits"] for w in stats["workflows"]] == [10, 2]
+        assert [w["steps"] for w in stats["workflows"]] == [1, 1]
+        qml.disable_tape()
+
+    def test_fixed_batch_size_no_stats(self):
+        """Test that no batch statistics are available for a fixed batch
+        size."""
+        dev = qml.device("orquestra.forest", wires=1, batch_size=3)
+        assert dev.batch_stats is None
+
+    def test_batch_exec_duplicate_circuits(self, tmpdir, monkeypatch):
+        """Test that identical circuits are computed by a single step for the
+        union of their operators and that the results are split back to each
+        circuit in order."""
+        qml.enable_tape()
+
+        def make_tape(param, *observables):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(param, wires=0)
+                qml.CNOT(wires=[0, 1])
+                for obs in observables:
+                    qml.expval(obs)
+
+            return tape
+
+        circuits = [
+            make_tape(0.1, qml.PauliZ(0)),
+            make_tape(0.2, qml.PauliZ(0)),
+            make_tape(0.1, qml.PauliZ(1), qml.PauliZ(0)),
+            make_tape(0.1, qml.PauliX(0), qml.Identity(1)),
+        ]
+
+        dev = qml.device("orquestra.forest", wires=2, cache=False)
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators)
+
+        test_result = {
+            "step0": {"expval": {"list": [0.1, 0.2, 0.3]}, "stepName": "a-0"},
+            "step1": {"expval": {"list": [0.4]}, "stepName": "b-1"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.batch_execute(circuits)
+
+        assert submitted["circuits"] == [
+            dev.serialize_circuit(circuits[0].graph),
+            dev.serialize_circuit(circuits[1].graph),
+        ]
+        assert submitted["operators"] == ['["1 [Z0]", "1 [Z1]", "1 [X0]"]', '["1 [Z0]"]']
+
+        expected = [[0.1], [0.4], [0.2, 0.1], [0.3, 1]]
+        for r, e in zip(res, expected):
+            assert np.allclose(r, e)
+
+        qml.disable_tape()
+
+    def test_batch_exec_parametric_templates(self, tmpdir, monkeypatch):
+        """Test that structurally identical circuits are computed by a single
+        parametric step and that the results are returned in the order of the
+        circuits."""
+        qml.enable_tape()
+
+        def make_tape(param, obs):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(param, wires=0)
+                qml.CNOT(wires=[0, 1])
+                qml.expval(obs)
+
+            return tape
+
+        with qml.tape.QuantumTape() as other:
+            qml.Hadamard(wires=0)
+            qml.expval(qml.PauliZ(0))
+
+        circuits = [
+            make_tape(0.1, qml.PauliZ(0)),
+            other,
+            make_tape(0.2, qml.PauliZ(0)),
+            make_tape(0.3, qml.PauliZ(1)),
+            make_tape(0.4, qml.PauliZ(0)),
+        ]
+
+        dev = qml.device("orquestra.forest", wires=2, parametric_templates=True, cache=False)
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators, **kwargs)
+
+        test_result = {
+            "step0": {"expval": {"list": [[0.1], [0.2], [0.4]]}, "stepName": "a-0"},
+            "step1": {"expval": {"list": [1.0]}, "stepName": "b-1"},
+            "step2": {"expval": {"list": [0.3]}, "stepName": "c-2"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.batch_execute(circuits)
+
+        assert np.allclose(res, [[0.1], [1.0], [0.2], [0.3], [0.4]])
+
+        # A single template with the parameters of three circuits, the other
+        # circuits are sent as they are
+        assert "rx({p0})" in submitted["circuits"][0]
+        assert submitted["parameters"] == ["[[0.1], [0.2], [0.4]]", None, None]
+        assert submitted["circuits"][1] == dev.serialize_circuit(other.graph)
+        assert "rx(0.3)" in submitted["circuits"][2]
+        assert submitted["operators"] == ['["1 [Z0]"]', '["1 [Z0]"]', '["1 [Z1]"]']
+        qml.disable_tape()
+
+    def test_batch_exec_circuits_per_step(self, tmpdir, monkeypatch):
+        """Test that several circuits are computed by each step and that the
+        results are returned in the order of the circuits."""
+        qml.enable_tape()
+
+        circuits = []
+        for idx in range(5):
+            with qml.tape.QuantumTape() as tape:
+                qml.RX(0.1 * idx, wires=0)
+                qml.expval(qml.PauliZ(0))
+                qml.expval(qml.PauliZ(1))
+
+            circuits.append(tape)
+
+        dev = qml.device("orquestra.forest", wires=2, circuits_per_step=2, cache=False)
+
+        submitted = {}
+
+        def mock_gen_workflow(component, backend_specs, circuits, operators, **kwargs):
+            submitted.update(circuits=circuits, operators=operators, **kwargs)
+
+        test_result = {
+            "step0": {"expval": {"list": [[0.0, 0.5], [0.1, 0.5]]}, "stepName": "a-0"},
+            "step2": {"expval": {"list": [0.4, 0.5]}, "stepName": "c-2"},
+            "step1": {"expval": {"list": [[0.2, 0.5], [0.3, 0.5]]}, "stepName": "b-1"},
+        }
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "gen_expval_workflow", mock_gen_workflow)
+            m.setattr(
+                pennylane_orquestra.orquestra_device,
+                "loop_until_finished",
+                lambda *args, **kwargs: test_result,
+            )
+
+            res = dev.batch_execute(circuits)
+
+        assert np.allclose(res, [[0.1 * idx, 0.5] for idx in range(5)])
+
+        # Two steps with two circuits each and a regular step for the last one
+        assert submitted["circuit_lists"] == [True, True, False]
+        assert json.loads(submitted["circuits"][0]) == [
+            dev.serialize_circuit(circuits[0].graph),
+            dev.serialize_circuit(circuits[1].graph),
+        ]
+        assert submitted["circuits"][2] == dev.serialize_circuit(circuits[4].graph)
+        assert json.loads(submitted["operators"][1]) == [["1 [Z0]", "1 [Z1]"]] * 2
+        assert submitted["operators"][2] == '["1 [Z0]", "1 [Z1]"]'
+        qml.disable_tape()
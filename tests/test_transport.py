@@ -0,0 +1,477 @@
+"""
+Unit tests for the ``transport`` module, using the local mock server in place
+of the Orquestra workflow API.
+"""
+
+import json
+import os
+import subprocess
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+import yaml
+
+import pennylane as qml
+import pennylane_orquestra
+from pennylane_orquestra.cli_actions import PollingSchedule, write_workflow_file
+from pennylane_orquestra.gen_workflow import gen_expval_workflow, step_inputs
+from pennylane_orquestra.http_session import HTTPSession
+from pennylane_orquestra.transport import (
+    APITransport,
+    CLITransport,
+    LocalTransport,
+    Transport,
+    create_transport,
+    default_steps_file,
+)
+from pennylane_orquestra.watcher import WorkflowWatcher, get_watcher
+
+from conftest import MockPopen, backend_specs_default, qasm_circuit_default
+from mock_server import MockOrquestraServer
+
+fast_polling = {"initial_delay": 0.01, "backoff": 1, "jitter": 0}
+
+
+@pytest.fixture
+def workflow_file(monkeypatch, tmpdir):
+    """Writes a workflow file into a temporary directory."""
+    monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+    workflow = gen_expval_workflow(
+        "qe-forest", backend_specs_default, [qasm_circuit_default], ['["1 [Z0]", "1 [Z1]"]']
+    )
+    return write_workflow_file("expval-test.yaml", workflow)
+
+
+class TestAPITransport:
+    """Test the transport using the workflow API."""
+
+    def test_submit_and_wait(self, workflow_file):
+        """Test that a workflow is submitted, awaited and its results are
+        downloaded over a single connection."""
+        session = HTTPSession()
+
+        with MockOrquestraServer(duration=0.2) as server:
+            transport = APITransport(server.url, session=session)
+            workflow_id = transport.submit(workflow_file)
+
+            assert transport.statuses([workflow_id]) == {workflow_id: "Running"}
+            assert transport.results_location(workflow_id) is None
+
+            stats = {}
+            schedule = PollingSchedule(**fast_polling)
+            res = transport.wait(workflow_id, timeout=5, schedule=schedule, stats=stats)
+
+        assert res == {
+            "run-circuit-and-get-expval-0": {
+                "stepName": "run-circuit-and-get-expval-0",
+                "expval": {"list": [0.0, 0.0]},
+            }
+        }
+        assert stats["polls"] > 1
+        assert server.stats["submissions"] == 1
+        assert server.stats["downloads"] == 1
+        assert session.stats["connections"] == 1
+        session.close()
+
+    def test_file_removed(self, workflow_file, tmpdir):
+        """Test that the workflow file is removed after submission unless it
+        should be kept."""
+        with MockOrquestraServer() as server:
+            transport = APITransport(server.url, session=HTTPSession())
+
+            transport.submit(workflow_file, keep_file=True)
+            assert tmpdir.join("expval-test.yaml").exists()
+
+            transport.submit(workflow_file)
+            assert not tmpdir.join("expval-test.yaml").exists()
+
+    def test_submit_yaml(self, workflow_file):
+        """Test that a workflow is submitted from memory."""
+        with open(workflow_file) as file:
+            data = file.read()
+
+        with MockOrquestraServer() as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            workflow_id = transport.submit_yaml(data)
+            res = transport.wait(workflow_id, timeout=5)
+
+        assert res["run-circuit-and-get-expval-0"]["expval"] == {"list": [0.0, 0.0]}
+
+    def test_token(self, workflow_file):
+        """Test that the token is sent and that errors of the API are
+        raised."""
+        with MockOrquestraServer(token="secret") as server:
+            transport = APITransport(server.url, token="secret", session=HTTPSession())
+            workflow_id = transport.submit(workflow_file, keep_file=True)
+            assert transport.statuses([workflow_id, "unknown"]) == {workflow_id: "Succeeded"}
+
+            transport = APITransport(server.url, token="wrong", session=HTTPSession())
+            with pytest.raises(ValueError, match="status 401: Invalid token"):
+                transport.submit(workflow_file)
+
+    def test_invalid_workflow(self, tmpdir):
+        """Test that an error is raised if the API rejects the workflow."""
+        filepath = tmpdir.join("invalid.yaml")
+        filepath.write("Not a workflow")
+
+        with MockOrquestraServer() as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            with pytest.raises(ValueError, match="status 400: The workflow could not be parsed"):
+                transport.submit(str(filepath))
+
+    def test_watcher(self, workflow_file):
+        """Test that the watcher queries the status of the workflows using
+        the transport."""
+        with MockOrquestraServer() as server:
+            transport = APITransport(server.url, session=HTTPSession())
+            ids = [transport.submit(workflow_file, keep_file=True) for _ in range(5)]
+
+            watcher = WorkflowWatcher(transport=transport)
+            watcher._thread = "Some thread"
+            futures = [watcher.watch(workflow_id) for workflow_id in ids]
+            watcher.sweep()
+
+            assert all(f.result()["run-circuit-and-get-expval-0"] for f in futures)
+
+        # A single query for the status of every workflow
+        assert server.stats["queries"] == 1 + len(ids)
+
+    def test_shared_watcher(self):
+        """Test that a watcher is shared by the transports reaching the same
+        platform."""
+        first = APITransport("http://localhost:1234/")
+        second = APITransport("http://localhost:1234")
+
+        assert get_watcher(first) is get_watcher(second)
+        assert get_watcher(first) is not get_watcher(APITransport("http://other"))
+        assert get_watcher(CLITransport()) is get_watcher()
+
+
+class TestCreateTransport:
+    """Test creating the transports."""
+
+    def test_names(self):
+        """Test that the transports are created by name."""
+        assert isinstance(create_transport("cli"), CLITransport)
+        assert isinstance(create_transport("local", max_workers=2), LocalTransport)
+
+        transport = create_transport("api", url="http://localhost:1234/", token="secret")
+        assert isinstance(transport, APITransport)
+        assert transport.url == "http://localhost:1234"
+        assert transport.token == "secret"
+
+    def test_instance(self):
+        """Test that a transport passed is used as is."""
+        transport = CLITransport()
+        assert create_transport(transport) is transport
+
+    def test_unknown(self):
+        """Test that an error is raised for unknown transports."""
+        with pytest.raises(ValueError, match="Unknown transport ssh"):
+            create_transport("ssh")
+
+
+class TestSubmitYAML:
+    """Test submitting workflows from memory using transports that only
+    submit files."""
+
+    def test_temporary_file(self, tmpdir):
+        """Test that the workflow is submitted using a temporary file, which
+        is removed afterwards."""
+        submitted = []
+
+        class FileTransport(Transport):
+            def submit(self, filepath, keep_file=False):
+                with open(filepath) as file:
+                    submitted.append(file.read())
+
+                os.remove(filepath)
+                return "wf-1"
+
+            def statuses(self, workflow_ids):
+                return {}
+
+            def results_location(self, workflow_id):
+                return None
+
+            def details(self, workflow_id):
+                return ""
+
+        assert FileTransport().submit_yaml("steps: []\n") == "wf-1"
+        assert submitted == ["steps: []\n"]
+
+
+class TestCLITransport:
+    """Test the transport calling the CLI."""
+
+    def test_queries(self, monkeypatch):
+        """Test that the output of the CLI calls is parsed."""
+        outputs = {
+            ("list", "workflow"): ["ID Status\n", "wf-1 Succeeded\n", "wf-2 Running\n"],
+            ("get", "workflowresult"): ["Workflow result:\n", "Location: some_url\n"],
+            ("get", "workflow"): ["Status: Failed\n"],
+        }
+
+        def mock_popen(args, **kwargs):
+            return MockPopen(outputs[tuple(args[1:3])])
+
+        monkeypatch.setattr(subprocess, "Popen", mock_popen)
+        transport = CLITransport()
+
+        assert transport.statuses(["wf-1", "wf-2"]) == {"wf-1": "Succeeded", "wf-2": "Running"}
+        assert transport.results_location("wf-1") == "some_url"
+        assert transport.details("wf-1") == "Status: Failed\n"
+
+        outputs[("get", "workflowresult")] = ["Not ready\n"]
+        assert transport.results_location("wf-2") is None
+
+
+class TestDeviceWithAPITransport:
+    """Test executing circuits using the API transport."""
+
+    @pytest.mark.parametrize("use_watcher", [False, True])
+    def test_execute(self, monkeypatch, tmpdir, use_watcher):
+        """Test that circuits are computed using the workflows submitted to
+        the API."""
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+
+        def results(workflow):
+            res = {}
+            for step in workflow["steps"]:
+                ops = json.loads(step_inputs(step)["operators"])
+                res[step["name"]] = {"stepName": step["name"], "expval": {"list": [0.5] * len(ops)}}
+            return res
+
+        with MockOrquestraServer(results=results) as server:
+            dev = qml.device(
+                "orquestra.forest",
+                wires=2,
+                transport="api",
+                transport_options={"url": server.url, "session": HTTPSession()},
+                polling=fast_polling,
+                use_watcher=use_watcher,
+                cache=False,
+            )
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.Hadamard(0)
+                return qml.expval(qml.PauliZ(0)), qml.expval(qml.PauliX(1))
+
+            assert np.allclose(circuit(), [0.5, 0.5])
+
+        assert server.stats["submissions"] == 1
+        assert dev.poll_stats[dev.latest_id]["spawns"] == 0
+        assert not tmpdir.listdir()
+
+    @pytest.mark.parametrize("use_watcher", [False, True])
+    def test_traces(self, monkeypatch, tmpdir, use_watcher):
+        """Test that the stages of the execution observed by the transport are
+        traced."""
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+        traces = []
+
+        with MockOrquestraServer(duration=0.2) as server:
+            dev = qml.device(
+                "orquestra.forest",
+                wires=2,
+                transport="api",
+                transport_options={"url": server.url, "session": HTTPSession()},
+                polling=fast_polling,
+                use_watcher=use_watcher,
+                cache=False,
+                trace_callback=traces.append,
+            )
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.Hadamard(0)
+                return qml.expval(qml.PauliZ(0))
+
+            circuit()
+
+        assert traces == dev.traces
+        trace = traces[0]
+        assert trace["workflow_id"] == dev.latest_id
+        assert trace["download_bytes"] == len(server.archive(dev.latest_id))
+
+        timings = trace["timings"]
+        assert all(value >= 0 for value in timings.values())
+        assert timings["queue"] + timings["run"] >= 0.15
+        assert timings["wait"] == pytest.approx(
+            timings["queue"] + timings["run"] + timings["download"] + timings["parse"]
+        )
+
+
+fake_steps = '''
+import json
+import time
+
+save_list = None
+
+
+def run_circuit_and_get_expval(backend_specs, circuit, operators):
+    """Returns the number of lines of the circuit for each operator."""
+    ops = json.loads(operators)
+    save_list([float(len(circuit.splitlines()))] * len(ops), "expval.json")
+
+
+def run_circuits_and_get_expval(backend_specs, circuits, operators):
+    results = []
+    for circuit, ops in zip(json.loads(circuits), json.loads(operators)):
+        results.append([float(len(circuit.splitlines()))] * len(ops))
+    save_list(results, "expval.json")
+
+
+def run_failing_step(backend_specs, circuit, operators):
+    raise RuntimeError("Step failed")
+
+
+def run_slow_step(backend_specs, circuit, operators):
+    time.sleep(0.5)
+    save_list([0.0], "expval.json")
+'''
+
+
+@pytest.fixture
+def steps_file(tmpdir):
+    """Writes a file defining fake step functions."""
+    path = tmpdir.join("fake_steps.py")
+    path.write(fake_steps)
+    return str(path)
+
+
+class TestLocalTransport:
+    """Test the transport running the workflow steps locally."""
+
+    def test_default_steps_file(self):
+        """Test that the step functions of the plugin are found."""
+        path = default_steps_file()
+        assert path.endswith(os.path.join("steps", "expval.py"))
+        assert os.path.isfile(path)
+
+    def test_run_workflow(self, workflow_file, steps_file):
+        """Test that every step of a workflow is run and that the results
+        have the shape of the results of remote workflows."""
+        transport = LocalTransport(max_workers=2, steps_file=steps_file)
+        workflow_id = transport.submit(workflow_file)
+        res = transport.wait(workflow_id, timeout=30)
+        transport.close()
+
+        num_lines = float(len(qasm_circuit_default.splitlines()))
+        assert res == {
+            "run-circuit-and-get-expval-0": {
+                "stepName": "run-circuit-and-get-expval-0",
+                "expval": {"list": [num_lines, num_lines]},
+            }
+        }
+
+    def test_failing_step(self, monkeypatch, tmpdir, steps_file):
+        """Test that an error is raised if a step fails."""
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+        workflow = gen_expval_workflow(
+            "qe-forest", backend_specs_default, [qasm_circuit_default], ['["1 [Z0]"]']
+        )
+        workflow["steps"][0]["config"]["runtime"]["parameters"]["function"] = "run_failing_step"
+        filepath = write_workflow_file("expval-failing.yaml", workflow)
+
+        transport = LocalTransport(steps_file=steps_file)
+        workflow_id = transport.submit(filepath)
+
+        with pytest.raises(ValueError, match="Something went wrong.*Step failed"):
+            transport.wait(workflow_id, timeout=30)
+
+        transport.close()
+
+    def test_timeout(self, monkeypatch, tmpdir, steps_file):
+        """Test that a workflow is forgotten and its pending steps are
+        cancelled if waiting for it times out."""
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+        workflow = gen_expval_workflow(
+            "qe-forest", backend_specs_default, [qasm_circuit_default] * 3, ['["1 [Z0]"]'] * 3
+        )
+        for step in workflow["steps"]:
+            step["config"]["runtime"]["parameters"]["function"] = "run_slow_step"
+
+        transport = LocalTransport(max_workers=1, steps_file=steps_file)
+        workflow_id = transport.submit_yaml(yaml.dump(workflow, sort_keys=False))
+
+        with pytest.raises(TimeoutError, match=workflow_id):
+            transport.wait(workflow_id, timeout=0.01)
+
+        assert transport.statuses([workflow_id]) == {}
+        assert not transport._workflows
+        transport.close()
+
+    def test_cancelled_step(self, workflow_file, steps_file):
+        """Test that a workflow with a cancelled step is reported as
+        failed."""
+        transport = LocalTransport(steps_file=steps_file)
+        transport._workflows["local-0"] = {"step-0": Future()}
+        transport._workflows["local-0"]["step-0"].cancel()
+
+        assert transport.statuses(["local-0"]) == {"local-0": "Failed"}
+        with pytest.raises(ValueError, match="step-0: cancelled"):
+            transport.wait("local-0", timeout=1)
+
+        assert not transport._workflows
+
+    def test_watcher_per_instance(self):
+        """Test that local transports do not share a watcher, as each of them
+        creates its own workflow IDs."""
+        first = LocalTransport()
+        second = LocalTransport()
+
+        assert get_watcher(first) is get_watcher(first)
+        assert get_watcher(first) is not get_watcher(second)
+
+    @pytest.mark.parametrize("circuits_per_step", [1, 2])
+    def test_device_batch_execute(self, monkeypatch, tmpdir, steps_file, circuits_per_step):
+        """Test that the circuits of a batch are computed by the local
+        transport in the order of the circuits."""
+        qml.enable_tape()
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+
+        dev = qml.device(
+            "orquestra.forest",
+            wires=2,
+            transport="local",
+            transport_options={"max_workers": 2, "steps_file": steps_file},
+            circuits_per_step=circuits_per_step,
+            cache=False,
+        )
+
+        tapes = []
+        for num_gates in range(1, 5):
+            with qml.tape.QuantumTape() as tape:
+                for _ in range(num_gates):
+                    qml.Hadamard(0)
+                qml.expval(qml.PauliZ(0))
+                qml.expval(qml.PauliX(1))
+            tapes.append(tape)
+
+        res = dev.batch_execute(tapes)
+        dev._transport.close()
+        qml.disable_tape()
+
+        lengths = [len(dev.serialize_circuit(tape.graph).splitlines()) for tape in tapes]
+        assert np.allclose(res, [[length, length] for length in lengths])
+        assert tmpdir.listdir() == [tmpdir.join("fake_steps.py")]
+
+    def test_real_steps(self, monkeypatch, tmpdir):
+        """Test that the step functions of the plugin compute the expectation
+        values locally."""
+        pytest.importorskip("zquantum.core")
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+
+        dev = qml.device("orquestra.qulacs", wires=2, transport="local", cache=False)
+
+        @qml.qnode(dev)
+        def circuit(x):
+            qml.RX(x, wires=0)
+            qml.CNOT(wires=[0, 1])
+            return qml.expval(qml.PauliZ(0)), qml.expval(qml.PauliZ(1))
+
+        assert np.allclose(circuit(0.3), [np.cos(0.3), np.cos(0.3)])
+        dev._transport.close()
@@ -84,6 +84,26 @@ class TestUtils:
         expected = "0.1 [X3]"
         assert op_str == expected
 
+    def test_terms_to_qubit_operator_wire_index(self, monkeypatch):
+        """Test that a precomputed wire index is used instead of processing
+        the wires passed."""
+        coeffs = np.array([0.1, 0.2])
+        ops = [
+            qml.operation.Tensor(qml.PauliX(wires=["w0"])),
+            qml.operation.Tensor(qml.PauliY(wires=["w0"]), qml.PauliZ(wires=["w2"])),
+        ]
+
+        def mock_process_wires(*args, **kwargs):
+            raise AssertionError("The wires were processed")
+
+        monkeypatch.setattr(utils, "_process_wires", mock_process_wires)
+        wire_index = {"w2": 0, "w1": 1, "w0": 2}
+        op_str = utils._terms_to_qubit_operator_string(coeffs, ops, wire_index=wire_index)
+        assert op_str == "0.1 [X2] + 0.2 [Y2 Z0]"
+
+        with pytest.raises(ValueError, match="does not cover all wires"):
+            utils._terms_to_qubit_operator_string(coeffs, ops, wire_index={"w0": 0})
+
     def test_terms_to_qubit_operator_default(self):
         coeffs = np.array([0.1])
         ops = [
@@ -149,3 +169,145 @@ class TestUtils:
         # Remove new line characters
         op_str = op_str.replace("\n", "")
         assert op_str == "2.5 [] + -0.5 [Z1] + -1.0 [Z0]"
+
+
+class TestLRUCache:
+    """Test the in-memory LRU cache."""
+
+    def test_get_set(self):
+        """Test that stored values are returned and statistics recorded."""
+        cache = utils.LRUCache(maxsize=2)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.info() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+    def test_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = utils.LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        # Mark "a" as recently used
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_clear(self):
+        """Test that clearing removes the entries and the statistics."""
+        cache = utils.LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.clear()
+        assert cache.info() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 128}
+
+    @pytest.mark.parametrize(
+        "a, b",
+        [
+            (0.1, 0.2),
+            (1, 1.0),
+            (np.array([0, 1]), np.array([1, 0])),
+            (np.array([0, 1]), np.array([0.0, 1.0])),
+            ([0, 1], [0, 2]),
+        ],
+    )
+    def test_fingerprint(self, a, b):
+        """Test that different values have different fingerprints."""
+        assert utils._fingerprint(a) == utils._fingerprint(a)
+        assert utils._fingerprint(a) != utils._fingerprint(b)
+        hash(utils._fingerprint(a))
+
+
+class TestQWCGroups:
+    """Test grouping words into qubit-wise commuting groups."""
+
+    def test_groups(self):
+        """Test that commuting words share a group and that the measurement
+        basis of each group is recorded."""
+        z0 = ((0, "PauliZ"),)
+        x0 = ((0, "PauliX"),)
+        z0z1 = ((0, "PauliZ"), (1, "PauliZ"))
+        x0y2 = ((0, "PauliX"), (2, "PauliY"))
+
+        groups = utils._qwc_groups([z0, x0, z0z1, x0y2, z0])
+
+        assert groups == [
+            ({0: "PauliZ", 1: "PauliZ"}, [z0z1, z0]),
+            ({0: "PauliX", 2: "PauliY"}, [x0y2, x0]),
+        ]
+
+    def test_disjoint_wires(self):
+        """Test that words acting on different wires are placed in a single
+        group."""
+        words = [((idx, "PauliX"),) for idx in range(5)]
+        groups = utils._qwc_groups(words)
+
+        assert len(groups) == 1
+        assert groups[0][1] == words
+
+
+class TestPauliDecomposition:
+    """Test the fast decomposition of Hermitian matrices into Pauli words."""
+
+    @pytest.mark.parametrize("num_qubits", [1, 2, 3, 4])
+    def test_matches_decompose_hamiltonian(self, num_qubits):
+        """Test that the coefficients and the order of the terms match the
+        decomposition of PennyLane."""
+        rng = np.random.default_rng(num_qubits)
+        dim = 2 ** num_qubits
+        mat = rng.normal(size=(dim, dim)) + 1j * rng.normal(size=(dim, dim))
+        mat = mat + mat.conj().T
+
+        coeffs, words = utils._pauli_decomposition(mat)
+        expected_coeffs, expected_obs = qml.utils.decompose_hamiltonian(mat)
+
+        names = {"Identity": "I", "PauliX": "X", "PauliY": "Y", "PauliZ": "Z"}
+        expected_words = [
+            "".join(
+                names[name] for name in (obs.name if isinstance(obs.name, list) else [obs.name])
+            )
+            for obs in expected_obs
+        ]
+
+        assert words == expected_words
+        assert np.allclose(coeffs, expected_coeffs)
+
+    def test_reconstruct(self):
+        """Test that the linear combination of the Pauli words is the
+        matrix decomposed."""
+        mat = np.array(
+            [[-2, -2 + 1j, -2, -2], [-2 - 1j, 0, 0, -1], [-2, 0, -2, -1], [-2, -1, -1, 0]]
+        )
+        coeffs, words = utils._pauli_decomposition(mat)
+
+        paulis = {
+            "I": np.eye(2),
+            "X": qml.PauliX._matrix(),
+            "Y": qml.PauliY._matrix(),
+            "Z": qml.PauliZ._matrix(),
+        }
+        res = sum(c * np.kron(paulis[w[0]], paulis[w[1]]) for c, w in zip(coeffs, words))
+        assert np.allclose(res, mat)
+        assert coeffs == [-1.0, -1.5, -0.5, -1.0, -1.5, -1.0, -0.5, 1.0, -0.5, -0.5]
+
+    def test_drops_small_coefficients(self):
+        """Test that the terms with near-zero coefficients are dropped."""
+        mat = np.diag([1, 1 + 1e-10, 1, 1])
+        coeffs, words = utils._pauli_decomposition(mat)
+        assert words == ["II"]
+        assert np.allclose(coeffs, [1])
+        assert len(utils._pauli_decomposition(mat, tol=0)[1]) == 4
+
+    @pytest.mark.parametrize("mat", [np.eye(3), np.ones((2, 4)), np.array([[1]])])
+    def test_invalid_shape(self, mat):
+        """Test that an error is raised for a matrix with an invalid shape."""
+        with pytest.raises(ValueError, match="should have shape"):
+            utils._pauli_decomposition(mat)
+
+    def test_not_hermitian(self):
+        """Test that an error is raised for a matrix that is not Hermitian."""
+        with pytest.raises(ValueError, match="not Hermitian"):
+            utils._pauli_decomposition(np.array([[0, 1], [0, 0]]))
@@ -0,0 +1,322 @@
+"""
+Unit tests for the ``watcher`` module, without sending any requests to
+Orquestra.
+"""
+import pytest
+import subprocess
+
+import pennylane as qml
+import pennylane_orquestra
+from pennylane_orquestra.cli_actions import PollingSchedule
+from pennylane_orquestra.transport import parse_workflow_list
+from pennylane_orquestra.watcher import MAX_STATUS_ERRORS, WorkflowWatcher, get_watcher
+
+from conftest import MockPopen
+
+test_listing = [
+    "ID                  Status      Submitted\n",
+    "wf-success          Succeeded   2020-12-18\n",
+    "wf-failed           Failed      2020-12-18\n",
+    "wf-running          Running     2020-12-18\n",
+    "wf-other            Succeeded   2020-12-18\n",
+]
+
+mock_result_message = ["Workflow result:", "Location: some_url"]
+
+
+@pytest.fixture
+def mock_cli(monkeypatch):
+    """Mocks the CLI calls used by the watcher and records the calls made."""
+    calls = []
+
+    def mock_qe_list():
+        calls.append("list")
+        return test_listing
+
+    def mock_results(workflow_id):
+        calls.append(("results", workflow_id))
+        return mock_result_message
+
+    def mock_details(workflow_id):
+        calls.append(("details", workflow_id))
+        return "Status: Failed"
+
+    monkeypatch.setattr(pennylane_orquestra.cli_actions, "qe_list", mock_qe_list)
+    monkeypatch.setattr(pennylane_orquestra.cli_actions, "workflow_results", mock_results)
+    monkeypatch.setattr(pennylane_orquestra.cli_actions, "workflow_details", mock_details)
+    monkeypatch.setattr(
+        pennylane_orquestra.cli_actions,
+        "download_results",
+        lambda location, **kwargs: {"res": location},
+    )
+    return calls
+
+
+class TestParseWorkflowList:
+    """Test parsing the listing of workflows."""
+
+    def test_parse_statuses(self):
+        """Test that the status of the specified workflows are extracted."""
+        ids = ["wf-success", "wf-failed", "wf-running", "wf-unknown"]
+        statuses = parse_workflow_list(test_listing, ids)
+        assert statuses == {
+            "wf-success": "Succeeded",
+            "wf-failed": "Failed",
+            "wf-running": "Running",
+        }
+
+    def test_ignores_unknown_status(self):
+        """Test that lines without a known status are ignored."""
+        assert parse_workflow_list(["wf-1 Unknown\n"], ["wf-1"]) == {}
+
+
+class TestWorkflowWatcher:
+    """Test the workflow watcher."""
+
+    def test_sweep_completes_futures(self, mock_cli):
+        """Test that a single sweep completes the futures of the workflows
+        that finished and keeps watching the others."""
+        watcher = WorkflowWatcher()
+
+        # Do not start the background thread
+        watcher._thread = "Some thread"
+
+        success = watcher.watch("wf-success")
+        failed = watcher.watch("wf-failed")
+        running = watcher.watch("wf-running")
+
+        watcher.sweep()
+
+        assert success.result() == {"res": "some_url"}
+        with pytest.raises(ValueError, match="Something went wrong with executing the workflow"):
+            failed.result()
+
+        assert not running.done()
+        assert watcher.pending == ["wf-running"]
+
+        # One listing for all the workflows, then one call for each finished
+        # workflow
+        assert mock_cli == ["list", ("results", "wf-success"), ("details", "wf-failed")]
+        assert watcher.sweeps == 1
+        assert watcher.spawns == 3
+
+    def test_many_workflows_single_listing(self, mock_cli):
+        """Test that checking the status of many outstanding workflows costs a
+        single CLI call."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+
+        stats = [{} for _ in range(50)]
+        futures = [watcher.watch(f"wf-pending-{i}", stats=stats[i]) for i in range(50)]
+
+        watcher.sweep()
+        watcher.sweep()
+
+        assert mock_cli == ["list", "list"]
+        assert not any(f.done() for f in futures)
+        assert all(s == {"polls": 2, "spawns": 0} for s in stats)
+
+    def test_callback_and_unwatch(self, mock_cli):
+        """Test that callbacks are called upon completion and that unwatched
+        workflows are cancelled."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+
+        completed = []
+        watcher.watch("wf-success", callback=completed.append)
+        other = watcher.watch("wf-other")
+        watcher.unwatch("wf-other")
+
+        watcher.sweep()
+
+        assert len(completed) == 1
+        assert completed[0].result() == {"res": "some_url"}
+        assert other.cancelled()
+        assert ("results", "wf-other") not in mock_cli
+
+    def test_listing_error(self, monkeypatch):
+        """Test that an error when listing the workflows is passed to every
+        outstanding workflow once it persisted for several sweeps."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+
+        def raise_error():
+            raise FileNotFoundError("No qe")
+
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "qe_list", raise_error)
+        future = watcher.watch("wf-success")
+
+        for _ in range(MAX_STATUS_ERRORS - 1):
+            watcher.sweep()
+            assert not future.done()
+
+        watcher.sweep()
+        with pytest.raises(FileNotFoundError, match="No qe"):
+            future.result()
+
+    def test_transient_listing_error(self, mock_cli, monkeypatch):
+        """Test that the workflows keep waiting if listing the workflows
+        failed once."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+        future = watcher.watch("wf-success")
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "qe_list", lambda: 1 / 0)
+            watcher.sweep()
+
+        assert not future.done()
+
+        watcher.sweep()
+        assert future.result() == {"res": "some_url"}
+
+    def test_details_error(self, mock_cli, monkeypatch):
+        """Test that an error when querying the details of a failed workflow
+        is only passed to that workflow."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+
+        def raise_error(workflow_id):
+            raise ValueError("No details")
+
+        monkeypatch.setattr(pennylane_orquestra.cli_actions, "workflow_details", raise_error)
+        failed = watcher.watch("wf-failed")
+        success = watcher.watch("wf-success")
+        watcher.sweep()
+
+        with pytest.raises(ValueError, match="No details"):
+            failed.result()
+
+        assert success.result() == {"res": "some_url"}
+
+    def test_background_thread_error(self, mock_cli, monkeypatch):
+        """Test that an unexpected error in the background thread fails the
+        outstanding workflows and lets a new thread be started."""
+        watcher = WorkflowWatcher(schedule=PollingSchedule(initial_delay=0.01, jitter=0))
+
+        def raise_error():
+            raise RuntimeError("Unexpected")
+
+        monkeypatch.setattr(watcher, "sweep", raise_error)
+        future = watcher.watch("wf-running")
+
+        with pytest.raises(RuntimeError, match="Unexpected"):
+            future.result(timeout=5)
+
+        assert watcher._thread is None
+        assert watcher.pending == []
+
+    def test_background_thread(self, mock_cli):
+        """Test that the background thread completes the watched workflows and
+        stops once no workflows are outstanding."""
+        watcher = WorkflowWatcher(schedule=PollingSchedule(initial_delay=0.01, jitter=0))
+        future = watcher.watch("wf-success")
+
+        thread = watcher._thread
+        assert future.result(timeout=5) == {"res": "some_url"}
+
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert watcher._thread is None
+        assert watcher.pending == []
+
+    def test_shared_watcher(self):
+        """Test that the same watcher is shared by the process."""
+        assert get_watcher() is get_watcher()
+
+    def test_watcher_per_schedule(self):
+        """Test that a watcher is shared only by the devices polling with the
+        same schedule."""
+        fast = PollingSchedule(initial_delay=0.01, jitter=0)
+
+        assert get_watcher(schedule=fast) is get_watcher(
+            schedule=PollingSchedule(initial_delay=0.01, jitter=0)
+        )
+        assert get_watcher(schedule=fast) is not get_watcher()
+        assert get_watcher(schedule=PollingSchedule()) is get_watcher()
+        assert get_watcher(schedule=fast)._schedule is fast
+
+    def test_device_schedule(self, monkeypatch):
+        """Test that the device waits using a watcher with its polling
+        schedule."""
+        dev = qml.device(
+            "orquestra.forest",
+            wires=1,
+            use_watcher=True,
+            polling={"initial_delay": 0.02, "max_interval": 0.5},
+        )
+        schedules = []
+
+        def mock_get_watcher(transport=None, schedule=None):
+            schedules.append(schedule)
+            raise RuntimeError("Stop")
+
+        monkeypatch.setattr(pennylane_orquestra.orquestra_device, "get_watcher", mock_get_watcher)
+        with pytest.raises(RuntimeError, match="Stop"):
+            dev._wait_for_results("wf-0")
+
+        assert schedules == [dev._polling]
+        assert schedules[0].initial_delay == 0.02
+        assert schedules[0].max_interval == 0.5
+
+
+class TestDeviceWithWatcher:
+    """Test using the workflow watcher with the Orquestra device."""
+
+    def test_execute_with_watcher(self, monkeypatch, tmpdir):
+        """Test that the device waits for the results using the watcher."""
+        watched = []
+        test_res = {"First": {"expval": {"list": [123456789]}}}
+
+        class MockFuture:
+            def result(self, timeout=None):
+                return test_res
+
+        class MockWatcher:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def watch(self, workflow_id, **kwargs):
+                watched.append(workflow_id)
+                return MockFuture()
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(pennylane_orquestra.orquestra_device, "get_watcher", MockWatcher)
+
+            dev = qml.device("orquestra.forest", wires=1, use_watcher=True)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.PauliX(0)
+                return qml.expval(qml.PauliZ(0))
+
+            assert circuit() == 123456789
+
+        assert watched == ["SomeWorkflowID"]
+
+    def test_watcher_timeout(self, monkeypatch, tmpdir):
+        """Test that a timeout error is raised and the workflow is no longer
+        watched if the results are not obtained in time."""
+        watcher = WorkflowWatcher()
+        watcher._thread = "Some thread"
+
+        with monkeypatch.context() as m:
+            m.setattr(pennylane_orquestra.cli_actions, "user_data_dir", lambda *args: tmpdir)
+            m.setattr(subprocess, "Popen", lambda *args, **kwargs: MockPopen())
+            m.setattr(
+                pennylane_orquestra.orquestra_device, "get_watcher", lambda *args, **kwargs: watcher
+            )
+
+            dev = qml.device("orquestra.forest", wires=1, use_watcher=True, timeout=0.1)
+
+            @qml.qnode(dev)
+            def circuit():
+                qml.PauliX(0)
+                return qml.expval(qml.PauliZ(0))
+
+            with pytest.raises(TimeoutError, match="The workflow results for workflow"):
+                circuit()
+
+        assert watcher.pending == []